@@ -0,0 +1,2 @@
+# benchmarks
+# Medições de desempenho dos caminhos de carga, filtro, treino, previsão e gráficos.
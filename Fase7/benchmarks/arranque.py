@@ -0,0 +1,115 @@
+# arranque.py
+# Tempo de inicialização a frio de cada página do Streamlit.
+#
+# Cada página roda em um interpretador novo (como num pod recém-criado), com
+# cache em disco vazio e -X importtime. O relatório mostra o tempo até a
+# página terminar de renderizar, quanto disso foi importação e os pacotes
+# que mais pesaram.
+#
+# Uso (a partir da pasta Fase7):
+#     python -m benchmarks.arranque --saida arranque.json
+#     python -m benchmarks.arranque pages/2_Modelagem_preditiva.py --pacotes 5
+#     python -m benchmarks.executar --comparar antes.json arranque.json
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from farmtech.configuracao import DIRETORIO_APP
+
+# Executado no interpretador novo; o tempo inclui importar o Streamlit
+CODIGO_PAGINA = """
+import json, sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=600).run()
+print(json.dumps({
+    'segundos': time.perf_counter() - inicio,
+    'erros': [str(e.value) for e in app.exception],
+}))
+"""
+
+
+def paginas_padrao():
+    return [os.path.join(DIRETORIO_APP, 'Início.py')] + sorted(
+        glob.glob(os.path.join(DIRETORIO_APP, 'pages', '*.py'))
+    )
+
+
+def tempos_importacao(saida_importtime):
+    """Tempo próprio (s) de importação somado por pacote de primeiro nível."""
+    por_pacote = Counter()
+    for linha in saida_importtime.splitlines():
+        if not linha.startswith('import time:'):
+            continue
+        partes = linha[len('import time:'):].split('|')
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue
+        pacote = partes[2].strip().split('.')[0]
+        por_pacote[pacote] += int(partes[0]) / 1e6
+    return por_pacote
+
+
+def medir_pagina(caminho, n_pacotes):
+    cache = tempfile.mkdtemp(prefix='farmtech-arranque-')
+    try:
+        processo = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CODIGO_PAGINA, os.path.abspath(caminho)],
+            cwd=DIRETORIO_APP, capture_output=True, text=True,
+            env={**os.environ, 'FARMTECH_CACHE': cache, 'PYTHONPATH': DIRETORIO_APP},
+        )
+    finally:
+        shutil.rmtree(cache, ignore_errors=True)
+    if processo.returncode != 0:
+        raise RuntimeError(f'{caminho} falhou:\n{processo.stderr[-2000:]}')
+
+    execucao = json.loads(processo.stdout.strip().splitlines()[-1])
+    por_pacote = tempos_importacao(processo.stderr)
+    resultados = {
+        'arranque': execucao['segundos'],
+        'importacao': sum(por_pacote.values()),
+    }
+    for pacote, segundos in por_pacote.most_common(n_pacotes):
+        resultados[f'importacao_{pacote}'] = segundos
+    return resultados, execucao['erros']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de inicialização das páginas da aplicação FarmTech.')
+    parser.add_argument('paginas', nargs='*', help='scripts das páginas (padrão: todas)')
+    parser.add_argument('--pacotes', type=int, default=8, help='pacotes mais caros listados por página')
+    parser.add_argument('--saida', help='arquivo JSON com os resultados')
+    args = parser.parse_args()
+
+    saida = {
+        'meta': {
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+        },
+        'resultados': {},
+    }
+    for caminho in args.paginas or paginas_padrao():
+        nome = os.path.basename(caminho)
+        resultados, erros = medir_pagina(caminho, args.pacotes)
+        print(f'== {nome}', file=sys.stderr)
+        for chave, valor in resultados.items():
+            print(f'  {chave:40s} {valor:.6g}', file=sys.stderr)
+        for erro in erros:
+            print(f'  erro na página: {erro}', file=sys.stderr)
+        saida['resultados'][nome] = resultados
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(saida, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
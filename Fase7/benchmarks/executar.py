@@ -0,0 +1,305 @@
+# executar.py
+# Benchmarks dos caminhos de carga, filtro, treino, previsão, estatísticas,
+# features de séries temporais e gráficos, sobre datasets sintéticos com o
+# formato do data.csv.
+#
+# Uso (a partir da pasta Fase7):
+#     python -m benchmarks.executar --tamanhos 10000 1000000 10000000 --saida resultados.json
+#     python -m benchmarks.executar --comparar antes.json depois.json
+#
+# Cada medição de tempo é o melhor de N repetições, em segundos; medições
+# de payload (prefixo "json_") são o tamanho em bytes da figura serializada.
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+from scipy.signal import lfilter
+from sklearn.ensemble import RandomForestRegressor
+
+from farmtech import dados
+from farmtech.configuracao import CAMINHO_CSV, COLUNAS_NUMERICAS
+from farmtech.estatisticas import EstatisticasIncrementais
+from farmtech.figuras import (
+    criar_dispersao, criar_grafico_temporal, criar_histograma, criar_mapa_correlacao, criar_matriz_dispersao
+)
+from farmtech.filtros import MotorFiltros
+from farmtech.series import CacheFeatures, construir_features, preparar_serie
+
+# Intervalo entre leituras no data.csv
+CADENCIA = pd.Timedelta(minutes=43)
+
+# Acima destes tamanhos os caminhos originais (sem agregação) não são medidos
+LIMITE_FIGURAS_BRUTAS = 200_000
+
+
+# -----------------------------------------------------------
+# Dataset sintético
+# -----------------------------------------------------------
+def gerar_dataset(n, caminho, semente=42):
+    """Grava um CSV com `n` leituras no formato do data.csv.
+
+    Cada coluna é um processo AR(1) com média e desvio do data.csv original,
+    o que mantém a distribuição e a autocorrelação das leituras reais.
+    """
+    original = pd.read_csv(CAMINHO_CSV)
+    rng = np.random.default_rng(semente)
+    df = pd.DataFrame({
+        'timestamp': pd.Timestamp('2025-06-19') + np.arange(n) * CADENCIA
+    })
+    phi = 0.98
+    for col in COLUNAS_NUMERICAS:
+        media, desvio = original[col].mean(), original[col].std()
+        ruido = rng.normal(0, desvio * np.sqrt(1 - phi ** 2), n)
+        df[col] = np.round(media + lfilter([1], [1, -phi], ruido), 1)
+    df.to_csv(caminho, index=False)
+
+
+def cronometrar(func, repeticoes=3):
+    melhor, resultado = float('inf'), None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def tamanho_json(fig):
+    return len(fig.to_json())
+
+
+# -----------------------------------------------------------
+# Caminhos medidos
+# -----------------------------------------------------------
+def medir_carga(caminho, resultados, repeticoes):
+    def carga_original():
+        df = pd.read_csv(caminho)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df.sort_values('timestamp').reset_index(drop=True)
+
+    def carga_fria():
+        shutil.rmtree(dados.DIRETORIO_CACHE, ignore_errors=True)
+        return dados.ConjuntoDados(caminho).sincronizar()
+
+    def carga_cache_disco():
+        return dados.ConjuntoDados(caminho).sincronizar()
+
+    resultados['carga_csv_pandas'], _ = cronometrar(carga_original, repeticoes)
+    resultados['carga_fria'], _ = cronometrar(carga_fria, 1)
+    resultados['carga_cache_disco'], _ = cronometrar(carga_cache_disco, repeticoes)
+
+    conjunto = dados.ConjuntoDados(caminho)
+    conjunto.sincronizar()
+    resultados['carga_memoria'], _ = cronometrar(conjunto.sincronizar, repeticoes)
+
+    # Anexa 1000 leituras novas e mede apenas a leitura incremental
+    cauda = pd.read_csv(caminho).tail(1000)
+    cauda['timestamp'] = pd.to_datetime(cauda['timestamp']) + len(cauda) * CADENCIA
+    cauda.to_csv(caminho, mode='a', header=False, index=False)
+    resultados['anexar_1000_linhas'], _ = cronometrar(conjunto.sincronizar, 1)
+    return conjunto.df
+
+
+def medir_filtros(df, resultados, repeticoes):
+    faixas = {
+        col: (float(df[col].quantile(0.05)), float(df[col].quantile(0.95)))
+        for col in COLUNAS_NUMERICAS
+    }
+    periodo = (df['timestamp'].iloc[len(df) // 4], df['timestamp'].iloc[3 * len(df) // 4])
+
+    def filtro_encadeado():
+        filtrado = df.copy()
+        for col, (minimo, maximo) in faixas.items():
+            filtrado = filtrado[(filtrado[col] >= minimo) & (filtrado[col] <= maximo)]
+        return filtrado[(filtrado['timestamp'] >= periodo[0]) & (filtrado['timestamp'] <= periodo[1])]
+
+    resultados['filtro_encadeado'], esperado = cronometrar(filtro_encadeado, repeticoes)
+    resultados['filtro_indices_construcao'], motor = cronometrar(
+        lambda: MotorFiltros(df, COLUNAS_NUMERICAS), 1
+    )
+
+    def filtro_indices():
+        motor._cache.clear()
+        return motor.aplicar(faixas, periodo)
+
+    resultados['filtro_indices_consulta'], obtido = cronometrar(filtro_indices, repeticoes)
+    resultados['filtro_indices_cache'], _ = cronometrar(lambda: motor.aplicar(faixas, periodo), repeticoes)
+    assert obtido.index.equals(esperado.index), 'motor de filtros divergiu do filtro encadeado'
+
+
+def medir_modelo(df, resultados, repeticoes, max_linhas_treino):
+    amostra = df.iloc[:max_linhas_treino]
+    features = [col for col in COLUNAS_NUMERICAS if col != 'ph']
+    X, y = amostra[features].to_numpy(), amostra['ph'].to_numpy()
+    resultados['linhas_treino'] = len(amostra)
+
+    modelo = RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42)
+    resultados['treino_fit'], _ = cronometrar(lambda: modelo.fit(X, y), 1)
+    resultados['treino_fit_paralelo'], _ = cronometrar(
+        lambda: RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42, n_jobs=-1).fit(X, y), 1
+    )
+    resultados['previsao_lote'], _ = cronometrar(lambda: modelo.predict(X), repeticoes)
+    linha = X[:1]
+    resultados['previsao_linha'], _ = cronometrar(lambda: modelo.predict(linha), max(repeticoes, 10))
+
+
+def medir_estatisticas(df, resultados, repeticoes):
+    def estatisticas_pandas():
+        corr = df[COLUNAS_NUMERICAS].corr()
+        categoria = pd.cut(df['ph'], bins=[df['ph'].min(), df['ph'].median(), df['ph'].max()],
+                           labels=['Baixo', 'Alto'])
+        return corr, df.groupby(categoria, observed=False)[['temperatura_c', 'umidade_percent']].mean()
+
+    resultados['estatisticas_pandas'], _ = cronometrar(estatisticas_pandas, repeticoes)
+
+    estatisticas = EstatisticasIncrementais(COLUNAS_NUMERICAS)
+    resultados['estatisticas_incrementais_atualizar'], _ = cronometrar(
+        lambda: (estatisticas.reiniciar(), estatisticas.atualizar(df)), 1
+    )
+    resultados['estatisticas_incrementais_consulta'], _ = cronometrar(
+        lambda: (estatisticas.correlacao(),
+                 estatisticas.medias_por_faixa(['temperatura_c', 'umidade_percent'])),
+        repeticoes
+    )
+
+
+def medir_series(df, resultados, repeticoes):
+    def features_pandas():
+        colunas = df[COLUNAS_NUMERICAS]
+        partes = [colunas] + [colunas.shift(k) for k in (1, 2)]
+        for janela in (6, 24):
+            moveis = colunas.rolling(janela)
+            partes += [moveis.mean(), moveis.std(ddof=0)]
+        return pd.concat(partes, axis=1).iloc[23:].to_numpy(np.float32)
+
+    resultados['series_features_pandas'], _ = cronometrar(features_pandas, 1)
+    valores, grupos, _ = preparar_serie(df)
+    resultados['series_features'], _ = cronometrar(lambda: construir_features(valores, grupos), 1)
+    cache = CacheFeatures()
+    cache.obter(valores, grupos)
+    resultados['series_features_cache'], _ = cronometrar(lambda: cache.obter(valores, grupos), repeticoes)
+
+
+def medir_figuras(df, resultados):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    rotulos = {'temperatura_c': 'Temperatura C', 'umidade_percent': 'Umidade Percent', 'ph': 'pH'}
+    estatisticas = EstatisticasIncrementais(COLUNAS_NUMERICAS)
+    estatisticas.atualizar(df)
+    corr = estatisticas.correlacao()
+    figuras = {
+        'histograma': lambda: criar_histograma(df, 'ph', 'pH'),
+        'temporal': lambda: criar_grafico_temporal(df, 'ph', 'pH'),
+        'dispersao': lambda: criar_dispersao(df, 'temperatura_c', 'umidade_percent', 'Dispersão', rotulos),
+        'matriz_dispersao': lambda: criar_matriz_dispersao(df, COLUNAS_NUMERICAS, 'Matriz de dispersão'),
+        'mapa_correlacao': lambda: criar_mapa_correlacao(corr, 'Correlação'),
+    }
+    if len(df) <= LIMITE_FIGURAS_BRUTAS:
+        figuras['histograma_bruto'] = lambda: px.histogram(df, x='ph', nbins=30, marginal='box')
+        figuras['temporal_bruto'] = lambda: go.Figure(go.Scatter(x=df['timestamp'], y=df['ph'], mode='lines'))
+        figuras['dispersao_bruta'] = lambda: px.scatter(
+            df, x='temperatura_c', y='umidade_percent', color='ph', hover_data=['timestamp']
+        )
+        figuras['matriz_dispersao_bruta'] = lambda: px.scatter_matrix(
+            df, dimensions=COLUNAS_NUMERICAS, color='ph', hover_data=['timestamp']
+        )
+
+    for nome, construtor in figuras.items():
+        segundos, fig = cronometrar(construtor, 1)
+        resultados[f'figura_{nome}'] = segundos
+        resultados[f'json_{nome}'] = tamanho_json(fig)
+
+
+# -----------------------------------------------------------
+# Execução e comparação
+# -----------------------------------------------------------
+def executar(tamanhos, repeticoes, max_linhas_treino, diretorio):
+    saida = {
+        'meta': {
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'cpus': os.cpu_count(),
+            'repeticoes': repeticoes,
+        },
+        'resultados': {},
+    }
+    for n in tamanhos:
+        print(f'== {n} linhas', file=sys.stderr)
+        caminho = os.path.join(diretorio, f'sensores_{n}.csv')
+        gerar_dataset(n, caminho)
+
+        resultados = {}
+        df = medir_carga(caminho, resultados, repeticoes)
+        medir_filtros(df, resultados, repeticoes)
+        medir_modelo(df, resultados, repeticoes, max_linhas_treino)
+        medir_estatisticas(df, resultados, repeticoes)
+        medir_series(df, resultados, repeticoes)
+        medir_figuras(df, resultados)
+
+        for chave, valor in resultados.items():
+            print(f'  {chave:40s} {valor:.6g}', file=sys.stderr)
+        saida['resultados'][str(n)] = resultados
+        os.remove(caminho)
+    return saida
+
+
+def comparar(base, atual):
+    """Imprime a razão atual/base de cada medição em comum."""
+    for n, medicoes in atual['resultados'].items():
+        anteriores = base['resultados'].get(n)
+        if anteriores is None:
+            continue
+        print(f'== {n} linhas' if n.isdigit() else f'== {n}')
+        for chave, valor in medicoes.items():
+            if chave in anteriores and anteriores[chave]:
+                razao = valor / anteriores[chave]
+                print(f'  {chave:40s} {anteriores[chave]:12.6g} -> {valor:12.6g}  ({razao:.2f}x)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks da aplicação FarmTech.')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--max-linhas-treino', type=int, default=200_000,
+                        help='linhas usadas no fit/predict do RandomForest')
+    parser.add_argument('--saida', help='arquivo JSON com os resultados')
+    parser.add_argument('--comparar', nargs='+', metavar='JSON',
+                        help='compara com um resultado anterior (ou compara dois arquivos)')
+    args = parser.parse_args()
+
+    if args.comparar and len(args.comparar) == 2:
+        with open(args.comparar[0]) as f_base, open(args.comparar[1]) as f_atual:
+            comparar(json.load(f_base), json.load(f_atual))
+        return
+
+    # O cache em disco dos benchmarks fica isolado do cache da aplicação. A
+    # configuração já foi lida na importação: o dados.py é apontado para o
+    # diretório diretamente, e a variável vale para processos filhos.
+    diretorio = tempfile.mkdtemp(prefix='farmtech-bench-')
+    os.environ['FARMTECH_CACHE'] = os.path.join(diretorio, 'cache')
+    dados.DIRETORIO_CACHE = os.environ['FARMTECH_CACHE']
+    try:
+        resultado = executar(args.tamanhos, args.repeticoes, args.max_linhas_treino, diretorio)
+        if args.saida:
+            with open(args.saida, 'w') as f:
+                json.dump(resultado, f, indent=2)
+        if args.comparar:
+            with open(args.comparar[0]) as f:
+                comparar(json.load(f), resultado)
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# farmtech
+# Módulos compartilhados entre as páginas do aplicativo Streamlit.
@@ -0,0 +1,300 @@
+# ajuste.py
+# Ajuste automático dos hiperparâmetros da floresta aleatória (página de
+# Modelagem Preditiva) por busca aleatória com successive halving.
+#
+# Configurações sorteadas da mesma grade dos sliders são avaliadas em
+# rodadas: na primeira, todas treinam com uma fração pequena das linhas de
+# treino; a cada rodada, só o melhor 1/eta segue, com eta vezes mais linhas,
+# até a última rodada usar o treino inteiro. As tentativas rodam em um pool
+# de processos (uma árvore por núcleo não escala como um treino por núcleo)
+# e a pontuação é medida numa validação separada do treino, sem tocar no
+# conjunto de teste da página.
+#
+# Os dados vão para os processos uma única vez, como arquivos .npy abertos
+# com mmap, e a pontuação de cada tentativa fica em cache por impressão
+# digital dos dados: repetir uma busca no mesmo recorte não treina nada.
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from farmtech.configuracao import DIRETORIO_CACHE
+
+DIRETORIO_AJUSTE = os.path.join(DIRETORIO_CACHE, 'ajuste')
+
+# Cada busca em andamento deixa um marcador no diretório do seu recorte; a
+# limpeza do disco não remove recortes marcados. Marcadores sem atualização
+# há mais de VALIDADE_MARCADOR segundos são de buscas interrompidas.
+PREFIXO_MARCADOR = 'em_uso-'
+VALIDADE_MARCADOR = 6 * 3600
+
+# parâmetro -> (mínimo, máximo, passo), os mesmos dos sliders da página
+ESPACO_PADRAO = {
+    'n_estimators': (10, 200, 10),
+    'max_depth': (1, 20, 1),
+    'min_samples_split': (2, 20, 1),
+}
+
+PARAMETROS_FIXOS = {'random_state': 42}
+
+
+def sortear_configuracoes(n, espaco=ESPACO_PADRAO, semente=42):
+    """Sorteia até `n` configurações distintas da grade."""
+    grades = {nome: np.arange(minimo, maximo + passo, passo) for nome, (minimo, maximo, passo) in espaco.items()}
+    total = math.prod(len(g) for g in grades.values())
+    rng = np.random.default_rng(semente)
+    indices = rng.choice(total, size=min(n, total), replace=False)
+    configuracoes = []
+    for indice in indices.tolist():
+        configuracao = {}
+        for nome, grade in grades.items():
+            indice, posicao = divmod(indice, len(grade))
+            configuracao[nome] = int(grade[posicao])
+        configuracoes.append(configuracao)
+    return configuracoes
+
+
+def rodadas(n_configuracoes, n_linhas, eta=3, min_linhas=200):
+    """Plano da busca: lista de (configurações avaliadas, linhas de treino) por rodada."""
+    n_rodadas = max(1, int(math.floor(math.log(max(n_configuracoes, 1), eta) + 1e-9)) + 1)
+    # Sem linhas suficientes, as primeiras rodadas ficam com o mínimo
+    plano = []
+    for r in range(n_rodadas):
+        avaliadas = max(1, math.ceil(n_configuracoes / eta ** r))
+        linhas = n_linhas // eta ** (n_rodadas - 1 - r)
+        plano.append((avaliadas, min(n_linhas, max(linhas, min_linhas))))
+    return plano
+
+
+# -----------------------------------------------------------
+# Execução nos processos do pool
+# -----------------------------------------------------------
+_dados_processo = {}
+
+
+def _carregar(diretorio):
+    if diretorio not in _dados_processo:
+        _dados_processo.clear()
+        _dados_processo[diretorio] = tuple(
+            np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode='r')
+            for nome in ('X_treino', 'y_treino', 'X_validacao', 'y_validacao')
+        )
+    return _dados_processo[diretorio]
+
+
+def avaliar_tentativa(diretorio, parametros, n_linhas):
+    """Treina com as primeiras `n_linhas` do treino e pontua na validação."""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_squared_error, r2_score
+
+    X_treino, y_treino, X_validacao, y_validacao = _carregar(diretorio)
+    inicio = time.perf_counter()
+    modelo = RandomForestRegressor(**parametros, **PARAMETROS_FIXOS, n_jobs=1)
+    modelo.fit(X_treino[:n_linhas], y_treino[:n_linhas])
+    previsto = modelo.predict(X_validacao)
+    return {
+        'r2': float(r2_score(y_validacao, previsto)),
+        'rmse': float(np.sqrt(mean_squared_error(y_validacao, previsto))),
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+_executor = None
+_lock_executor = threading.Lock()
+
+
+def executor_ajuste(reiniciar=False):
+    """Pool de processos compartilhado entre as buscas (um processo por núcleo)."""
+    global _executor
+    with _lock_executor:
+        if reiniciar and _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        if _executor is None:
+            # forkserver evita copiar o processo do Streamlit (e suas threads)
+            metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            contexto = multiprocessing.get_context(metodo)
+            if metodo == 'forkserver':
+                contexto.set_forkserver_preload(['farmtech.ajuste', 'sklearn.ensemble'])
+            _executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=contexto)
+        return _executor
+
+
+# -----------------------------------------------------------
+# Cache de tentativas
+# -----------------------------------------------------------
+class CacheTentativas:
+    """Pontuações por (impressão dos dados, parâmetros, linhas), gravadas em JSON."""
+
+    def __init__(self, diretorio=DIRETORIO_AJUSTE):
+        self.diretorio = diretorio
+        self._memoria = {}
+        self._lock = threading.Lock()
+
+    def _caminho(self, impressao):
+        return os.path.join(self.diretorio, impressao, 'tentativas.json')
+
+    def _tentativas(self, impressao):
+        if impressao not in self._memoria:
+            try:
+                with open(self._caminho(impressao)) as f:
+                    self._memoria[impressao] = json.load(f)
+            except (OSError, ValueError):
+                self._memoria[impressao] = {}
+        return self._memoria[impressao]
+
+    @staticmethod
+    def _chave(parametros, n_linhas):
+        return json.dumps([parametros, n_linhas], sort_keys=True)
+
+    def obter(self, impressao, parametros, n_linhas):
+        with self._lock:
+            return self._tentativas(impressao).get(self._chave(parametros, n_linhas))
+
+    def guardar(self, impressao, parametros, n_linhas, pontuacao):
+        with self._lock:
+            self._tentativas(impressao)[self._chave(parametros, n_linhas)] = pontuacao
+
+    def gravar(self, impressao):
+        with self._lock:
+            tentativas = dict(self._tentativas(impressao))
+        caminho = self._caminho(impressao)
+        try:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            with open(caminho + '.tmp', 'w') as f:
+                json.dump(tentativas, f)
+            os.replace(caminho + '.tmp', caminho)
+        except OSError:
+            pass
+
+
+cache_tentativas = CacheTentativas()
+
+
+# -----------------------------------------------------------
+# Busca
+# -----------------------------------------------------------
+def _preparar_dados(destino, X_treino, y_treino, validacao):
+    """Grava treino e validação embaralhados em .npy para os processos do pool."""
+    if not os.path.exists(os.path.join(destino, 'y_validacao.npy')):
+        n = len(y_treino)
+        ordem = np.random.default_rng(42).permutation(n)
+        n_validacao = max(1, int(round(n * validacao)))
+        validacao_idx, treino_idx = ordem[:n_validacao], ordem[n_validacao:]
+        for nome, valores in (
+            ('X_treino', X_treino[treino_idx]), ('y_treino', y_treino[treino_idx]),
+            ('X_validacao', X_treino[validacao_idx]), ('y_validacao', y_treino[validacao_idx]),
+        ):
+            np.save(os.path.join(destino, f'{nome}.tmp.npy'), np.ascontiguousarray(valores, dtype=np.float64))
+            os.replace(os.path.join(destino, f'{nome}.tmp.npy'), os.path.join(destino, f'{nome}.npy'))
+    os.utime(destino)
+
+
+def _marcar(destino):
+    """Cria o marcador de uso do recorte por esta busca e retorna o seu caminho."""
+    os.makedirs(destino, exist_ok=True)
+    marcador = os.path.join(destino, f'{PREFIXO_MARCADOR}{os.getpid()}-{threading.get_ident()}-{time.monotonic_ns()}')
+    open(marcador, 'w').close()
+    return marcador
+
+
+def _em_uso(caminho, agora):
+    try:
+        nomes = os.listdir(caminho)
+    except OSError:
+        return False
+    for nome in nomes:
+        if nome.startswith(PREFIXO_MARCADOR):
+            try:
+                if agora - os.path.getmtime(os.path.join(caminho, nome)) < VALIDADE_MARCADOR:
+                    return True
+            except OSError:
+                pass
+    return False
+
+
+def _limpar_disco(diretorio, limite):
+    """Remove os recortes mais antigos além de `limite`, exceto os de buscas em andamento."""
+    recortes = [os.path.join(diretorio, nome) for nome in os.listdir(diretorio)]
+    recortes = [caminho for caminho in recortes if os.path.isdir(caminho)]
+    if len(recortes) <= limite:
+        return
+    agora = time.time()
+    recortes.sort(key=os.path.getmtime)
+    for caminho in recortes[:len(recortes) - limite]:
+        if not _em_uso(caminho, agora):
+            shutil.rmtree(caminho, ignore_errors=True)
+
+
+def _submeter(destino, configuracoes, linhas):
+    try:
+        executor = executor_ajuste()
+        return {executor.submit(avaliar_tentativa, destino, p, linhas): p for p in configuracoes}
+    except BrokenProcessPool:
+        # Um processo morreu numa busca anterior (ex.: falta de memória)
+        executor = executor_ajuste(reiniciar=True)
+        return {executor.submit(avaliar_tentativa, destino, p, linhas): p for p in configuracoes}
+
+
+def busca_sucessiva(X_treino, y_treino, impressao, n_configuracoes=27, eta=3, espaco=ESPACO_PADRAO,
+                    validacao=0.2, semente=42, cache=cache_tentativas, diretorio=DIRETORIO_AJUSTE,
+                    limite_disco=4):
+    """Executa a busca e produz cada tentativa à medida que ela termina.
+
+    Cada tentativa é um dicionário com rodada, linhas, os parâmetros, r2,
+    rmse, segundos de treino e `em_cache`. `impressao` identifica o recorte
+    de dados (ex.: modelos.impressao_digital) e é a chave do cache. No
+    máximo `limite_disco` recortes ficam em disco, sem contar os de buscas
+    em andamento.
+    """
+    X_treino = np.asarray(X_treino, dtype=np.float64)
+    y_treino = np.asarray(y_treino, dtype=np.float64)
+    destino = os.path.join(diretorio, impressao)
+    marcador = _marcar(destino)
+    try:
+        _preparar_dados(destino, X_treino, y_treino, validacao)
+        _limpar_disco(diretorio, limite_disco)
+        n_linhas = len(np.load(os.path.join(destino, 'y_treino.npy'), mmap_mode='r'))
+
+        sobreviventes = sortear_configuracoes(n_configuracoes, espaco, semente)
+        plano = rodadas(len(sobreviventes), n_linhas, eta)
+        for rodada, (avaliadas, linhas) in enumerate(plano, start=1):
+            os.utime(marcador)
+            sobreviventes = sobreviventes[:avaliadas]
+            resultados = []
+            pendentes = []
+            for parametros in sobreviventes:
+                pontuacao = cache.obter(impressao, parametros, linhas)
+                if pontuacao is not None:
+                    tentativa = {'rodada': rodada, 'linhas': linhas, **parametros, **pontuacao, 'em_cache': True}
+                    resultados.append(tentativa)
+                    yield tentativa
+                else:
+                    pendentes.append(parametros)
+
+            if pendentes:
+                futuros = _submeter(destino, pendentes, linhas)
+                for futuro in as_completed(futuros):
+                    parametros = futuros[futuro]
+                    pontuacao = futuro.result()
+                    cache.guardar(impressao, parametros, linhas, pontuacao)
+                    tentativa = {'rodada': rodada, 'linhas': linhas, **parametros, **pontuacao, 'em_cache': False}
+                    resultados.append(tentativa)
+                    yield tentativa
+
+            # Os melhores seguem para a próxima rodada, com mais linhas
+            resultados.sort(key=lambda t: -t['r2'] if np.isfinite(t['r2']) else math.inf)
+            sobreviventes = [{nome: t[nome] for nome in espaco} for t in resultados]
+    finally:
+        cache.gravar(impressao)
+        try:
+            os.remove(marcador)
+        except OSError:
+            pass
@@ -0,0 +1,157 @@
+# alertas.py
+# Cliente de disparo de alertas para o API Gateway (página "Funcionamento do
+# Sensor").
+#
+# Os alertas entram numa fila e são enviados por uma thread em segundo
+# plano, de modo que a página retorna imediatamente. Alertas que chegam em
+# rajada dentro de `janela` segundos são agrupados em um único POST. A
+# sessão HTTP mantém as conexões abertas (pool) e cada envio tem timeout e
+# novas tentativas com backoff exponencial.
+#
+# Só se repete o POST quando o alerta certamente não foi processado: falha
+# de conexão ou resposta de STATUS_REPETIR. Um timeout de leitura não é
+# repetido, pois o gateway pode já ter disparado o alerta. Todas as
+# tentativas de um lote levam o mesmo cabeçalho Idempotency-Key.
+import queue
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from farmtech.configuracao import URL_ALERTAS
+
+# Respostas que justificam uma nova tentativa
+STATUS_REPETIR = {429, 500, 502, 503, 504}
+
+
+class ClienteAlertas:
+    """Envia alertas em segundo plano, em lotes, com pool de conexões e retry.
+
+    `enviar` retorna um Future cujo resultado é um dicionário
+    {"status": ..., "body": ...}, no mesmo formato usado pela página.
+    O payload de um alerta avulso é {"mensagem": texto}; um lote agrupado
+    leva as mensagens unidas por quebra de linha em "mensagem" e a lista
+    original em "mensagens".
+    """
+
+    def __init__(self, url=URL_ALERTAS, timeout=(3.05, 10), tentativas=4, backoff=0.5,
+                 backoff_maximo=8.0, janela=0.5, lote_maximo=50, tamanho_pool=4):
+        self.url = url
+        self.timeout = timeout
+        self.tentativas = tentativas
+        self.backoff = backoff
+        self.backoff_maximo = backoff_maximo
+        self.janela = janela
+        self.lote_maximo = lote_maximo
+
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=tamanho_pool)
+        self.sessao.mount('http://', adaptador)
+        self.sessao.mount('https://', adaptador)
+        self.sessao.headers['Content-Type'] = 'application/json'
+
+        self._fila = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.enviados = 0
+        self.lotes = 0
+        self.falhas = 0
+
+    # ---- fila ----
+    def enviar(self, mensagem):
+        """Enfileira um alerta e retorna imediatamente um Future com o resultado."""
+        futuro = Future()
+        self._iniciar()
+        self._fila.put((mensagem, futuro))
+        return futuro
+
+    def pendentes(self):
+        return self._fila.unfinished_tasks
+
+    def aguardar(self, timeout=30.0):
+        """Espera o envio dos alertas enfileirados (ex.: antes de encerrar um script)."""
+        limite = time.monotonic() + timeout
+        while self._fila.unfinished_tasks and time.monotonic() < limite:
+            time.sleep(0.05)
+        return self._fila.unfinished_tasks == 0
+
+    def _iniciar(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._trabalhar, name='farmtech-alertas', daemon=True)
+                self._thread.start()
+
+    def _trabalhar(self):
+        while True:
+            lote = [self._fila.get()]
+            # Agrupa os alertas que chegarem dentro da janela
+            limite = time.monotonic() + self.janela
+            while len(lote) < self.lote_maximo:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            mensagens = [mensagem for mensagem, _ in lote]
+            try:
+                resultado = self.postar(mensagens)
+            except Exception as erro:
+                resultado = {'status': 'erro', 'body': str(erro)}
+            self.lotes += 1
+            if resultado['status'] == 'erro' or resultado['status'] >= 400:
+                self.falhas += 1
+            else:
+                self.enviados += len(lote)
+            for _, futuro in lote:
+                futuro.set_result(resultado)
+                self._fila.task_done()
+
+    # ---- HTTP ----
+    def _espera(self, tentativa):
+        """Backoff exponencial com jitter ("full jitter")."""
+        return random.uniform(0, min(self.backoff_maximo, self.backoff * 2 ** tentativa))
+
+    def postar(self, mensagens):
+        """POST síncrono de uma ou mais mensagens, com novas tentativas."""
+        if len(mensagens) == 1:
+            payload = {'mensagem': mensagens[0]}
+        else:
+            payload = {'mensagem': '\n'.join(mensagens), 'mensagens': mensagens}
+
+        cabecalhos = {'Idempotency-Key': uuid.uuid4().hex}
+        resultado = None
+        for tentativa in range(self.tentativas):
+            try:
+                response = self.sessao.post(self.url, json=payload, headers=cabecalhos, timeout=self.timeout)
+                resultado = {'status': response.status_code, 'body': response.text}
+                if response.status_code not in STATUS_REPETIR:
+                    return resultado
+            except requests.exceptions.ConnectionError as e:
+                # Inclui ConnectTimeout: a requisição não chegou ao gateway
+                resultado = {'status': 'erro', 'body': str(e)}
+            except requests.exceptions.RequestException as e:
+                # ReadTimeout e afins: o alerta pode ter sido entregue
+                return {'status': 'erro', 'body': str(e)}
+            if tentativa < self.tentativas - 1:
+                time.sleep(self._espera(tentativa))
+        return resultado
+
+
+_cliente = None
+_lock_cliente = threading.Lock()
+
+
+def cliente_alertas():
+    """Cliente compartilhado entre as páginas (uma sessão e uma thread por processo)."""
+    global _cliente
+    with _lock_cliente:
+        if _cliente is None:
+            _cliente = ClienteAlertas()
+        return _cliente
@@ -0,0 +1,441 @@
+# armazenamento.py
+# Banco local (SQLite) com o esquema da página "Estrutura do Banco de Dados".
+#
+# As tabelas de sensores (Sensor PH, Sensor NPK e Sensor Umidade) são
+# particionadas por mês (ex.: sensor_ph_202506) e cada partição tem um índice
+# único em (cd_servidor, data, hora). Um catálogo registra as partições, de
+# modo que consultas por intervalo de tempo só tocam os meses envolvidos; na
+# tabela de umidade, que filtra as consultas, um índice em (data, hora)
+# limita a leitura às linhas do intervalo dentro do mês.
+#
+# Cada leitura recebe um código único, compartilhado pelas três tabelas de
+# sensores (cd_ph = cd_npk = cd_umidade), o que permite juntar as tabelas pela
+# chave primária e ler incrementalmente tudo o que chegou após um código.
+#
+# As tabelas rollup_hora e rollup_dia guardam contagem, soma, mínimo e máximo
+# por (início do bloco, cd_servidor), atualizadas na mesma transação de cada
+# lote inserido (ver rollups.py).
+#
+# Uso pela linha de comando (a partir da pasta Fase7):
+#     python -m farmtech.armazenamento importar data.csv
+#     python -m farmtech.armazenamento rollups     (recalcula os rollups)
+import argparse
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from farmtech.configuracao import CAMINHO_BANCO, COLUNA_TEMPO, COLUNAS_NUMERICAS
+from farmtech.rollups import RESOLUCOES, agregar, colunas_rollup
+
+ESQUEMA_BASE = """
+CREATE TABLE IF NOT EXISTS servidor (
+    cd_servidor INTEGER PRIMARY KEY,
+    descricao TEXT
+);
+CREATE TABLE IF NOT EXISTS interface (
+    cd_interface INTEGER PRIMARY KEY,
+    cd_servidor INTEGER NOT NULL REFERENCES servidor (cd_servidor),
+    resultados VARCHAR(100)
+);
+CREATE TABLE IF NOT EXISTS particoes (
+    periodo TEXT PRIMARY KEY,
+    codigo_max INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS metadados (
+    chave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+"""
+
+ESQUEMA_PARTICAO = """
+CREATE TABLE IF NOT EXISTS sensor_ph_{p} (
+    cd_ph INTEGER PRIMARY KEY,
+    cd_servidor INTEGER NOT NULL REFERENCES servidor (cd_servidor),
+    ph_solo REAL,
+    data_ph TEXT NOT NULL,
+    hora_ph TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_sensor_ph_{p} ON sensor_ph_{p} (cd_servidor, data_ph, hora_ph);
+CREATE TABLE IF NOT EXISTS sensor_npk_{p} (
+    cd_npk INTEGER PRIMARY KEY,
+    cd_servidor INTEGER NOT NULL REFERENCES servidor (cd_servidor),
+    fosforo REAL,
+    potassio REAL,
+    data_npk TEXT NOT NULL,
+    hora_npk TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_sensor_npk_{p} ON sensor_npk_{p} (cd_servidor, data_npk, hora_npk);
+CREATE TABLE IF NOT EXISTS sensor_umidade_{p} (
+    cd_umidade INTEGER PRIMARY KEY,
+    cd_servidor INTEGER NOT NULL REFERENCES servidor (cd_servidor),
+    umidade_solo REAL,
+    umidade_ar REAL,
+    temperatura REAL,
+    data_umidade TEXT NOT NULL,
+    hora_umidade TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_sensor_umidade_{p} ON sensor_umidade_{p} (cd_servidor, data_umidade, hora_umidade);
+CREATE INDEX IF NOT EXISTS ix_sensor_umidade_{p}_tempo ON sensor_umidade_{p} (data_umidade, hora_umidade);
+INSERT OR IGNORE INTO particoes (periodo) VALUES ('{p}');
+"""
+
+CONSULTA_PARTICAO = """
+SELECT u.cd_umidade, u.cd_servidor, u.data_umidade, u.hora_umidade,
+       u.temperatura, u.umidade_solo, p.ph_solo, n.fosforo, n.potassio
+FROM sensor_umidade_{p} u
+JOIN sensor_ph_{p} p ON p.cd_ph = u.cd_umidade
+JOIN sensor_npk_{p} n ON n.cd_npk = u.cd_umidade
+"""
+
+ESQUEMA_ROLLUP = """
+CREATE TABLE IF NOT EXISTS rollup_{r} (
+    inicio TEXT NOT NULL,
+    cd_servidor INTEGER NOT NULL,
+    {colunas},
+    PRIMARY KEY (inicio, cd_servidor)
+) WITHOUT ROWID;
+"""
+
+
+def _sql_rollup(resolucao):
+    colunas = colunas_rollup()
+    atualizacoes = []
+    for nome in colunas:
+        if nome.startswith(('n_', 'soma_')):
+            atualizacoes.append(f'{nome} = {nome} + excluded.{nome}')
+        else:
+            funcao = nome.split('_', 1)[0]
+            atualizacoes.append(
+                f'{nome} = {funcao}(coalesce({nome}, excluded.{nome}), coalesce(excluded.{nome}, {nome}))'
+            )
+    return (
+        f"INSERT INTO rollup_{resolucao} (inicio, cd_servidor, {', '.join(colunas)}) "
+        f"VALUES ({', '.join('?' * (len(colunas) + 2))}) "
+        f"ON CONFLICT (inicio, cd_servidor) DO UPDATE SET {', '.join(atualizacoes)}"
+    )
+
+
+COLUNAS_CONSULTA = [
+    'codigo', 'cd_servidor', 'data', 'hora',
+    'temperatura_c', 'umidade_percent', 'ph', 'fosforo_mg_kg', 'potassio_mg_kg',
+]
+
+
+def _executar_script(con, script):
+    # Ao contrário de executescript, não faz COMMIT da transação em andamento
+    for comando in script.split(';'):
+        if comando.strip():
+            con.execute(comando)
+
+
+def _periodo(momento):
+    return pd.Timestamp(momento).strftime('%Y%m')
+
+
+def _separar_data_hora(tempo):
+    """Converte datetime64 em arrays de texto 'AAAA-MM-DD' e 'HH:MM:SS[.ffffff]'.
+
+    A fração de segundo (microssegundos, sem zeros à direita) só aparece
+    quando não é zero, mantendo o texto ordenável junto das horas inteiras.
+    """
+    tempo = tempo.astype('datetime64[us]')
+    texto = np.datetime_as_string(tempo, unit='us').astype('U26')
+    data = texto.astype('U10')
+    caracteres = texto.view('U1').reshape(len(texto), 26)
+    hora = np.ascontiguousarray(caracteres[:, 11:]).view('U15').ravel()
+    inteiras = tempo == tempo.astype('datetime64[s]')
+    hora = np.where(inteiras, hora.astype('U8'), np.char.rstrip(hora, '0'))
+    return data, hora
+
+
+def _limite(momento):
+    """[data, hora] de um limite de consulta, no mesmo texto das leituras gravadas."""
+    data, hora = _separar_data_hora(np.array([np.datetime64(momento, 'ns')]))
+    return [str(data[0]), str(hora[0])]
+
+
+class BancoSensores:
+    def __init__(self, caminho=CAMINHO_BANCO):
+        self.caminho = caminho
+        self._local = threading.local()
+        self._lock_escrita = threading.Lock()
+        self.criar_esquema()
+
+    def _conexao(self):
+        # Uma conexão por thread; WAL permite leituras durante as escritas
+        con = getattr(self._local, 'conexao', None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=30)
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('PRAGMA synchronous=NORMAL')
+            con.execute('PRAGMA foreign_keys=ON')
+            self._local.conexao = con
+        return con
+
+    def criar_esquema(self):
+        con = self._conexao()
+        definicoes = ',\n    '.join(
+            f"{nome} {'INTEGER NOT NULL DEFAULT 0' if nome.startswith('n_') else 'REAL'}"
+            for nome in colunas_rollup()
+        )
+        with con:
+            con.executescript(ESQUEMA_BASE)
+            for resolucao in RESOLUCOES:
+                con.executescript(ESQUEMA_ROLLUP.format(r=resolucao, colunas=definicoes))
+            con.execute("INSERT OR IGNORE INTO metadados (chave, valor) VALUES ('ultimo_codigo', 0)")
+            # Partições criadas antes do índice de tempo
+            for (p,) in con.execute('SELECT periodo FROM particoes').fetchall():
+                _executar_script(con, ESQUEMA_PARTICAO.format(p=p))
+
+    def registrar_servidor(self, cd_servidor, descricao=None):
+        con = self._conexao()
+        with con:
+            con.execute(
+                'INSERT OR IGNORE INTO servidor (cd_servidor, descricao) VALUES (?, ?)',
+                (int(cd_servidor), descricao)
+            )
+
+    # ---- escrita ----
+    def inserir_leituras(self, tempo, valores, cd_servidor=1):
+        """Insere um lote de leituras em uma única transação.
+
+        `tempo` é um array datetime64, `valores` mapeia as colunas do dataset
+        (COLUNAS_NUMERICAS) para arrays e `cd_servidor` é um inteiro ou um
+        array por leitura. Leituras repetidas (mesmo servidor, data e hora,
+        com precisão de microssegundos) são ignoradas. Retorna o número de leituras inseridas.
+        """
+        tempo = np.asarray(tempo, dtype='datetime64[ns]')
+        n = len(tempo)
+        if n == 0:
+            return 0
+        servidores = np.broadcast_to(np.asarray(cd_servidor, dtype=np.int64), (n,))
+        data, hora = _separar_data_hora(tempo)
+        meses = tempo.astype('datetime64[M]')
+        colunas = {col: np.asarray(valores[col], dtype=np.float64) for col in COLUNAS_NUMERICAS}
+
+        with self._lock_escrita:
+            con = self._conexao()
+            with con:
+                for servidor in np.unique(servidores):
+                    con.execute('INSERT OR IGNORE INTO servidor (cd_servidor) VALUES (?)', (int(servidor),))
+                ultimo = con.execute("SELECT valor FROM metadados WHERE chave = 'ultimo_codigo'").fetchone()[0]
+                codigos = np.arange(ultimo + 1, ultimo + 1 + n)
+                inseridas = 0
+                aceitas_lote = []
+
+                for mes in np.unique(meses):
+                    p = str(mes).replace('-', '')
+                    _executar_script(con, ESQUEMA_PARTICAO.format(p=p))
+                    sel = np.flatnonzero(meses == mes)
+                    linhas = list(zip(
+                        codigos[sel].tolist(), servidores[sel].tolist(),
+                        *(colunas[col][sel].tolist() for col in COLUNAS_NUMERICAS),
+                        data[sel].tolist(), hora[sel].tolist()
+                    ))
+                    antes = con.total_changes
+                    con.executemany(
+                        f'INSERT OR IGNORE INTO sensor_umidade_{p} '
+                        '(cd_umidade, cd_servidor, umidade_solo, temperatura, data_umidade, hora_umidade) '
+                        'VALUES (?1, ?2, ?4, ?3, ?8, ?9)',
+                        linhas
+                    )
+                    aceitas = con.total_changes - antes
+                    inseridas += aceitas
+                    # Apenas as leituras aceitas na tabela de umidade seguem para as demais
+                    con.executemany(
+                        f'INSERT INTO sensor_ph_{p} (cd_ph, cd_servidor, ph_solo, data_ph, hora_ph) '
+                        f'SELECT ?1, ?2, ?5, ?8, ?9 WHERE EXISTS '
+                        f'(SELECT 1 FROM sensor_umidade_{p} WHERE cd_umidade = ?1)',
+                        linhas
+                    )
+                    con.executemany(
+                        f'INSERT INTO sensor_npk_{p} (cd_npk, cd_servidor, fosforo, potassio, data_npk, hora_npk) '
+                        f'SELECT ?1, ?2, ?6, ?7, ?8, ?9 WHERE EXISTS '
+                        f'(SELECT 1 FROM sensor_umidade_{p} WHERE cd_umidade = ?1)',
+                        linhas
+                    )
+                    if aceitas:
+                        con.execute(
+                            'UPDATE particoes SET codigo_max = MAX(codigo_max, ?) WHERE periodo = ?',
+                            (int(codigos[sel].max()), p)
+                        )
+                    if aceitas == len(sel):
+                        aceitas_lote.append(sel)
+                    elif aceitas:
+                        gravados = np.array(con.execute(
+                            f'SELECT cd_umidade FROM sensor_umidade_{p} WHERE cd_umidade BETWEEN ? AND ?',
+                            (int(codigos[sel].min()), int(codigos[sel].max()))
+                        ).fetchall(), dtype=np.int64).ravel()
+                        aceitas_lote.append(sel[np.isin(codigos[sel], gravados)])
+
+                # Rollups apenas das leituras aceitas, na mesma transação
+                if aceitas_lote:
+                    idx = np.concatenate(aceitas_lote)
+                    matriz = np.column_stack([colunas[col][idx] for col in COLUNAS_NUMERICAS])
+                    self._atualizar_rollups(con, tempo[idx], servidores[idx], matriz)
+
+                con.execute(
+                    "UPDATE metadados SET valor = ? WHERE chave = 'ultimo_codigo'",
+                    (int(codigos[-1]),)
+                )
+        return inseridas
+
+    def _atualizar_rollups(self, con, tempo, servidores, matriz):
+        for resolucao, largura in RESOLUCOES.items():
+            blocos = agregar(tempo, servidores, matriz, largura)
+            inicio = np.char.replace(
+                np.datetime_as_string(blocos['inicio'].to_numpy(), unit='s').astype('U19'), 'T', ' '
+            )
+            valores = blocos[colunas_rollup()].astype(object)
+            valores = valores.where(valores.notna(), None)
+            con.executemany(_sql_rollup(resolucao), [
+                (i, s, *linha) for i, s, linha in zip(
+                    inicio.tolist(), blocos['cd_servidor'].tolist(), valores.itertuples(index=False, name=None)
+                )
+            ])
+
+    def reconstruir_rollups(self):
+        """Recalcula os rollups a partir das leituras (ex.: bancos criados antes deles)."""
+        con = self._conexao()
+        with self._lock_escrita, con:
+            for resolucao in RESOLUCOES:
+                con.execute(f'DELETE FROM rollup_{resolucao}')
+            for p in self.particoes():
+                df = self._consultar([p], [], [])
+                self._atualizar_rollups(
+                    con, df[COLUNA_TEMPO].to_numpy(), df['cd_servidor'].to_numpy(),
+                    df[COLUNAS_NUMERICAS].to_numpy(np.float64)
+                )
+
+    def inserir_dataframe(self, df, cd_servidor=1):
+        if 'cd_servidor' in df.columns:
+            cd_servidor = df['cd_servidor'].to_numpy()
+        return self.inserir_leituras(df[COLUNA_TEMPO].to_numpy(), df, cd_servidor)
+
+    def importar_csv(self, caminho_csv, cd_servidor=1, tamanho_lote=100_000):
+        total = 0
+        for bloco in pd.read_csv(caminho_csv, chunksize=tamanho_lote):
+            bloco[COLUNA_TEMPO] = pd.to_datetime(bloco[COLUNA_TEMPO], format='ISO8601')
+            total += self.inserir_dataframe(bloco, cd_servidor)
+        return total
+
+    # ---- leitura ----
+    def particoes(self, inicio=None, fim=None, codigo_minimo=None):
+        """Partições (AAAAMM) que podem conter leituras no intervalo."""
+        consulta = 'SELECT periodo FROM particoes WHERE 1 = 1'
+        parametros = []
+        if inicio is not None:
+            consulta += ' AND periodo >= ?'
+            parametros.append(_periodo(inicio))
+        if fim is not None:
+            consulta += ' AND periodo <= ?'
+            parametros.append(_periodo(fim))
+        if codigo_minimo is not None:
+            consulta += ' AND codigo_max > ?'
+            parametros.append(int(codigo_minimo))
+        consulta += ' ORDER BY periodo'
+        return [linha[0] for linha in self._conexao().execute(consulta, parametros)]
+
+    def ultimo_codigo(self):
+        return self._conexao().execute(
+            "SELECT valor FROM metadados WHERE chave = 'ultimo_codigo'"
+        ).fetchone()[0]
+
+    def _consultar(self, particoes, condicoes, parametros):
+        con = self._conexao()
+        linhas = []
+        for p in particoes:
+            consulta = CONSULTA_PARTICAO.format(p=p)
+            if condicoes:
+                consulta += ' WHERE ' + ' AND '.join(condicoes)
+            linhas.extend(con.execute(consulta, parametros).fetchall())
+
+        bruto = pd.DataFrame.from_records(linhas, columns=COLUNAS_CONSULTA)
+        df = pd.DataFrame({
+            'codigo': bruto['codigo'].to_numpy(np.int64),
+            COLUNA_TEMPO: pd.to_datetime(bruto['data'] + ' ' + bruto['hora'], format='ISO8601').astype('datetime64[ns]'),
+            'cd_servidor': bruto['cd_servidor'].to_numpy(np.int64),
+        })
+        for col in COLUNAS_NUMERICAS:
+            df[col] = bruto[col].to_numpy(np.float32)
+        return df.sort_values([COLUNA_TEMPO, 'codigo'], kind='stable', ignore_index=True)
+
+    def consultar(self, inicio=None, fim=None, cd_servidor=None):
+        """Leituras entre `inicio` e `fim` (inclusivos), ordenadas por tempo.
+
+        Apenas as partições mensais do intervalo são consultadas.
+        """
+        condicoes, parametros = [], []
+        if inicio is not None:
+            inicio = pd.Timestamp(inicio)
+            condicoes.append('(u.data_umidade, u.hora_umidade) >= (?, ?)')
+            parametros += _limite(inicio)
+        if fim is not None:
+            fim = pd.Timestamp(fim)
+            condicoes.append('(u.data_umidade, u.hora_umidade) <= (?, ?)')
+            parametros += _limite(fim)
+        if cd_servidor is not None:
+            condicoes.append('u.cd_servidor = ?')
+            parametros.append(int(cd_servidor))
+        return self._consultar(self.particoes(inicio, fim), condicoes, parametros)
+
+    def consultar_desde(self, codigo, ate=None):
+        """Leituras com código maior que `codigo` (inseridas depois dele).
+
+        `ate` limita o maior código lido, evitando ler um lote que ainda
+        não foi contabilizado em `ultimo_codigo()`.
+        """
+        condicoes, parametros = ['u.cd_umidade > ?'], [int(codigo)]
+        if ate is not None:
+            condicoes.append('u.cd_umidade <= ?')
+            parametros.append(int(ate))
+        return self._consultar(self.particoes(codigo_minimo=codigo), condicoes, parametros)
+
+    def consultar_rollup(self, resolucao='hora', inicio=None, fim=None, cd_servidor=None):
+        """Blocos de uma resolução ('hora' ou 'dia') que tocam o intervalo, no formato de rollups.py."""
+        largura = RESOLUCOES[resolucao]
+        condicoes, parametros = [], []
+        if inicio is not None:
+            primeiro = np.datetime64(pd.Timestamp(inicio), 'ns') - largura
+            condicoes.append('inicio > ?')
+            parametros.append(pd.Timestamp(primeiro).strftime('%Y-%m-%d %H:%M:%S'))
+        if fim is not None:
+            condicoes.append('inicio <= ?')
+            parametros.append(pd.Timestamp(fim).strftime('%Y-%m-%d %H:%M:%S'))
+        if cd_servidor is not None:
+            condicoes.append('cd_servidor = ?')
+            parametros.append(int(cd_servidor))
+        consulta = f'SELECT * FROM rollup_{resolucao}'
+        if condicoes:
+            consulta += ' WHERE ' + ' AND '.join(condicoes)
+        df = pd.read_sql_query(consulta + ' ORDER BY inicio, cd_servidor', self._conexao(), params=parametros)
+        df['inicio'] = pd.to_datetime(df['inicio'], format='%Y-%m-%d %H:%M:%S').astype('datetime64[ns]')
+        for nome in colunas_rollup():
+            df[nome] = df[nome].astype(np.int64 if nome.startswith('n_') else np.float64)
+        return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Banco local de leituras dos sensores.')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    importar = subcomandos.add_parser('importar', help='importa um CSV no formato do data.csv')
+    importar.add_argument('csv')
+    importar.add_argument('--servidor', type=int, default=1, help='cd_servidor das leituras')
+    importar.add_argument('--banco', default=CAMINHO_BANCO)
+    rollups = subcomandos.add_parser('rollups', help='recalcula os rollups por hora e por dia')
+    rollups.add_argument('--banco', default=CAMINHO_BANCO)
+    args = parser.parse_args()
+
+    if args.comando == 'importar':
+        total = BancoSensores(args.banco).importar_csv(args.csv, args.servidor)
+        print(f'{total} leituras importadas em {os.path.abspath(args.banco)}')
+    elif args.comando == 'rollups':
+        BancoSensores(args.banco).reconstruir_rollups()
+        print(f'Rollups recalculados em {os.path.abspath(args.banco)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+# compilacao.py
+# Floresta aleatória "compilada" em arrays NumPy contíguos.
+#
+# Os nós de todas as árvores de um RandomForestRegressor treinado ficam em
+# arrays planos (feature, limiar, primeiro filho, lado dos valores ausentes
+# e valor), indexados globalmente. Os dois filhos de um nó são vizinhos, de
+# modo que o próximo nó é `filho[no] + (x > limiar)`, e as folhas apontam
+# para si mesmas com limiar infinito. A previsão em lote avança um bloco de
+# linhas em todas as árvores ao mesmo tempo, um nível por iteração; a de uma
+# linha percorre só os nós do caminho, sem a validação e o pool de threads
+# do scikit-learn.
+#
+# O formato em disco (.floresta) é um cabeçalho JSON seguido dos arrays
+# alinhados, lido com mmap: carregar um modelo não copia os nós para a
+# memória do processo e vários processos compartilham as mesmas páginas.
+#
+# Como no scikit-learn, as features são comparadas em float32; os limiares
+# são gravados em float32 arredondados para baixo, o que dá exatamente as
+# mesmas decisões que os limiares float64 originais.
+import json
+import mmap
+
+import numpy as np
+
+MAGICA = b'FTFLORES'
+VERSAO = 1
+ALINHAMENTO = 64
+
+# Linhas avaliadas juntas na previsão em lote (a matriz linhas x árvores
+# de cada nível cabe no cache)
+TAMANHO_BLOCO = 1024
+
+CAMPOS = {
+    'feature': np.int32,
+    'limiar': np.float32,
+    'filho': np.int32,
+    'ausente_direita': np.uint8,
+    'valor': np.float64,
+    'raizes': np.int32,
+}
+
+
+def _limiar_float32(limiar):
+    """Maior float32 <= limiar: x32 <= limiar32 equivale a x32 <= limiar64."""
+    convertido = limiar.astype(np.float32)
+    acima = convertido.astype(np.float64) > limiar
+    convertido[acima] = np.nextafter(convertido[acima], np.float32(-np.inf))
+    return convertido
+
+
+class FlorestaCompilada:
+    """Floresta de regressão em arrays planos; `predict` como no scikit-learn."""
+
+    def __init__(self, arrays, n_features, profundidade, buffer=None):
+        for nome, tipo in CAMPOS.items():
+            setattr(self, nome, np.asarray(arrays[nome], dtype=tipo))
+        self.n_features_in_ = int(n_features)
+        self.profundidade = int(profundidade)
+        self.n_arvores = len(self.raizes)
+        # Mantém o mmap aberto enquanto houver arrays apontando para ele
+        self._buffer = buffer
+
+    def __reduce__(self):
+        # Arrays abertos com mmap são copiados; o buffer não é serializável
+        arrays = {nome: np.array(getattr(self, nome)) for nome in CAMPOS}
+        return FlorestaCompilada, (arrays, self.n_features_in_, self.profundidade)
+
+    @property
+    def n_nos(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, nome).nbytes for nome in CAMPOS)
+
+    def _validar(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f'O modelo espera {self.n_features_in_} features, recebeu {X.shape[1]}.')
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def predict(self, X, tamanho_bloco=TAMANHO_BLOCO):
+        """Previsões de todas as linhas de X (média das árvores)."""
+        X = self._validar(X)
+        if len(X) == 1:
+            return np.array([self.prever_linha(X[0])])
+        saida = np.empty(len(X), dtype=np.float64)
+        for inicio in range(0, len(X), tamanho_bloco):
+            saida[inicio:inicio + tamanho_bloco] = self._prever_bloco(X[inicio:inicio + tamanho_bloco])
+        return saida
+
+    def _prever_bloco(self, X):
+        n = len(X)
+        planas = X.ravel()
+        deslocamentos = (np.arange(n, dtype=np.int32) * self.n_features_in_)[:, None]
+        nos = np.broadcast_to(self.raizes, (n, self.n_arvores)).copy()
+        ausentes = np.isnan(planas).any()
+        for _ in range(self.profundidade):
+            valores = np.take(planas, deslocamentos + np.take(self.feature, nos))
+            direita = valores > np.take(self.limiar, nos)
+            if ausentes:
+                direita = np.where(np.isnan(valores), np.take(self.ausente_direita, nos), direita)
+            nos = np.take(self.filho, nos) + direita
+        return np.take(self.valor, nos).mean(axis=1)
+
+    def prever_linha(self, x):
+        """Previsão de uma linha, percorrendo todas as árvores em paralelo."""
+        x = np.asarray(x, dtype=np.float32).ravel()
+        nos = self.raizes
+        ausentes = np.isnan(x).any()
+        for _ in range(self.profundidade):
+            valores = x[self.feature[nos]]
+            direita = valores > self.limiar[nos]
+            if ausentes:
+                direita = np.where(np.isnan(valores), self.ausente_direita[nos], direita)
+            nos = self.filho[nos] + direita
+        return float(self.valor[nos].mean())
+
+    # ---- disco ----
+    def salvar(self, destino):
+        """Grava no formato .floresta (cabeçalho JSON + arrays alinhados).
+
+        `destino` é um caminho ou um arquivo binário aberto (ex.: BytesIO).
+        """
+        if not hasattr(destino, 'write'):
+            with open(destino, 'wb') as f:
+                self.salvar(f)
+            return destino
+
+        cabecalho = {
+            'versao': VERSAO,
+            'n_features': self.n_features_in_,
+            'profundidade': self.profundidade,
+            'arrays': {},
+        }
+        deslocamento = 0
+        for nome in CAMPOS:
+            array = getattr(self, nome)
+            cabecalho['arrays'][nome] = [deslocamento, len(array)]
+            deslocamento += -(-array.nbytes // ALINHAMENTO) * ALINHAMENTO
+
+        texto = json.dumps(cabecalho).encode()
+        inicio_dados = -(-(len(MAGICA) + 4 + len(texto)) // ALINHAMENTO) * ALINHAMENTO
+        escritos = 0
+        for bloco in (MAGICA, np.uint32(len(texto)).tobytes(), texto):
+            destino.write(bloco)
+            escritos += len(bloco)
+        for nome in CAMPOS:
+            posicao = inicio_dados + cabecalho['arrays'][nome][0]
+            destino.write(b'\0' * (posicao - escritos))
+            dados = np.ascontiguousarray(getattr(self, nome)).tobytes()
+            destino.write(dados)
+            escritos = posicao + len(dados)
+        return destino
+
+
+def carregar_floresta(caminho):
+    """Abre um arquivo .floresta com mmap (somente leitura)."""
+    with open(caminho, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGICA)] != MAGICA:
+        buffer.close()
+        raise ValueError(f'{caminho} não é um arquivo .floresta.')
+    tamanho_texto = int(np.frombuffer(buffer, dtype=np.uint32, count=1, offset=len(MAGICA))[0])
+    cabecalho = json.loads(buffer[len(MAGICA) + 4:len(MAGICA) + 4 + tamanho_texto])
+    if cabecalho['versao'] != VERSAO:
+        buffer.close()
+        raise ValueError(f'Versão {cabecalho["versao"]} do formato .floresta não suportada.')
+    inicio_dados = -(-(len(MAGICA) + 4 + tamanho_texto) // ALINHAMENTO) * ALINHAMENTO
+    arrays = {
+        nome: np.frombuffer(buffer, dtype=tipo, count=cabecalho['arrays'][nome][1],
+                            offset=inicio_dados + cabecalho['arrays'][nome][0])
+        for nome, tipo in CAMPOS.items()
+    }
+    return FlorestaCompilada(arrays, cabecalho['n_features'], cabecalho['profundidade'], buffer=buffer)
+
+
+def _ordem_irmaos(esquerda, direita):
+    """Ordem dos nós (em largura) em que os filhos de cada nó ficam lado a lado."""
+    ordem, nivel = [np.array([0])], np.array([0])
+    while len(nivel):
+        internos = nivel[esquerda[nivel] != -1]
+        nivel = np.column_stack([esquerda[internos], direita[internos]]).ravel()
+        ordem.append(nivel)
+    return np.concatenate(ordem)
+
+
+def compilar(modelo):
+    """Converte um RandomForestRegressor (ou árvore de decisão) treinado em FlorestaCompilada."""
+    estimadores = getattr(modelo, 'estimators_', [modelo])
+    if not len(estimadores) or not all(hasattr(e, 'tree_') for e in estimadores):
+        raise ValueError('Apenas florestas e árvores de decisão do scikit-learn podem ser compiladas.')
+    arvores = [e.tree_ for e in estimadores]
+    if any(arvore.n_outputs != 1 for arvore in arvores):
+        raise ValueError('Apenas modelos com uma variável alvo podem ser compilados.')
+
+    partes = {nome: [] for nome in CAMPOS if nome != 'raizes'}
+    raizes, inicio = [], 0
+    for arvore in arvores:
+        esquerda, direita = arvore.children_left, arvore.children_right
+        ordem = _ordem_irmaos(esquerda, direita)
+        nova_posicao = np.empty(len(ordem), dtype=np.int64)
+        nova_posicao[ordem] = np.arange(len(ordem)) + inicio
+        folha = esquerda[ordem] == -1
+        ausente_esquerda = getattr(arvore, 'missing_go_to_left', np.ones(arvore.node_count, dtype=np.uint8))
+
+        partes['feature'].append(np.where(folha, 0, arvore.feature[ordem]))
+        partes['limiar'].append(np.where(folha, np.inf, arvore.threshold[ordem]))
+        # Folhas apontam para si mesmas: avançar além delas não muda nada
+        partes['filho'].append(np.where(folha, nova_posicao[ordem], nova_posicao[np.maximum(esquerda[ordem], 0)]))
+        partes['ausente_direita'].append(np.where(folha, 0, 1 - ausente_esquerda[ordem]))
+        partes['valor'].append(arvore.value[ordem, 0, 0])
+        raizes.append(inicio)
+        inicio += len(ordem)
+
+    arrays = {nome: np.concatenate(valores) for nome, valores in partes.items()}
+    arrays['limiar'] = _limiar_float32(arrays['limiar'])
+    arrays['raizes'] = np.array(raizes)
+    profundidade = max(arvore.max_depth for arvore in arvores)
+    return FlorestaCompilada(arrays, modelo.n_features_in_, profundidade)
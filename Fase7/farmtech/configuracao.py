@@ -0,0 +1,34 @@
+# configuracao.py
+# Caminhos e constantes compartilhados pelos módulos da aplicação.
+import os
+
+# Diretório raiz do aplicativo (onde ficam Início.py e data.csv)
+DIRETORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Arquivo de dados dos sensores
+CAMINHO_CSV = os.path.join(DIRETORIO_APP, 'data.csv')
+
+# Banco local de leituras (SQLite); quando existe, as páginas leem dele em vez do CSV
+CAMINHO_BANCO = os.environ.get('FARMTECH_BANCO', os.path.join(DIRETORIO_APP, 'farmtech.db'))
+
+# Diretório para caches em disco (ignorado pelo git); FARMTECH_CACHE permite
+# isolar o cache, por exemplo nos benchmarks
+DIRETORIO_CACHE = os.environ.get('FARMTECH_CACHE', os.path.join(DIRETORIO_APP, '.cache'))
+
+# Colunas de sensores presentes no dataset
+COLUNA_TEMPO = 'timestamp'
+COLUNAS_NUMERICAS = ['temperatura_c', 'umidade_percent', 'ph', 'fosforo_mg_kg', 'potassio_mg_kg']
+
+# Endpoint de disparo de alertas (API Gateway); FARMTECH_URL_ALERTAS permite
+# apontar para um servidor local nos testes
+URL_ALERTAS = os.environ.get(
+    'FARMTECH_URL_ALERTAS', 'https://nhcefqu3vh.execute-api.sa-east-1.amazonaws.com/disparos'
+)
+
+# Registros da Calculadora de Insumos (SQLite), compartilhados entre as sessões
+CAMINHO_INSUMOS = os.environ.get('FARMTECH_INSUMOS', os.path.join(DIRETORIO_APP, 'insumos.db'))
+
+# Modelos publicados pela página de Modelagem Preditiva para o serviço de
+# previsão (farmtech/servico.py); FARMTECH_MODELOS permite compartilhá-los
+# com um serviço em outra máquina ou contêiner
+DIRETORIO_PUBLICADOS = os.environ.get('FARMTECH_MODELOS', os.path.join(DIRETORIO_CACHE, 'publicados'))
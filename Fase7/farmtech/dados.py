@@ -0,0 +1,514 @@
+# dados.py
+# Carregamento compartilhado do dataset de sensores.
+#
+# O CSV é lido uma única vez e convertido em colunas tipadas (float32 para os
+# sensores e int64 com o epoch em nanossegundos para o timestamp). Em float32
+# um valor como 68.32 vira 68.31999969...: estatísticas e gráficos usam esse
+# valor, e as tabelas exibidas passam por valores_exibicao. As colunas
+# são gravadas em um cache colunar (.npy) chaveado pelo mtime e pelo hash do
+# arquivo, e todas as páginas recebem o mesmo DataFrame em memória.
+#
+# Como as leituras do ESP32 apenas acrescentam linhas ao arquivo, o conjunto
+# guarda o offset (em bytes) já consumido e, a cada chamada, lê somente o
+# trecho novo, mescla no frame já ordenado e atualiza os agregados derivados.
+#
+# Quando o banco local (armazenamento.py) existe, o ConjuntoBanco oferece a
+# mesma interface lendo do banco: a sincronização busca apenas as leituras
+# com código maior que o último já visto, e as janelas de tempo das páginas
+# consultam só as partições mensais do período. Os rollups por hora e por
+# dia vêm das tabelas mantidas pelo próprio banco.
+import hashlib
+import io
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from farmtech.armazenamento import BancoSensores
+from farmtech.configuracao import CAMINHO_BANCO, CAMINHO_CSV, COLUNA_TEMPO, DIRETORIO_CACHE
+from farmtech.graficos import janela_temporal
+from farmtech.rollups import Rollups
+
+VERSAO_CACHE = 2
+
+# Bytes usados para conferir que o início do arquivo não foi reescrito
+TAMANHO_SENTINELA = 64 * 1024
+
+# Regrava o cache em disco quando as linhas anexadas passam desta fração
+FRACAO_REGRAVAR_CACHE = 0.25
+
+_lock = threading.Lock()
+_conjuntos = {}
+
+
+# -----------------------------------------------------------
+# Assinatura do arquivo (mtime + tamanho + hash)
+# -----------------------------------------------------------
+def _hash_arquivo(caminho, limite=None, tamanho_bloco=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    restante = limite
+    with open(caminho, 'rb') as f:
+        while restante is None or restante > 0:
+            bloco = f.read(tamanho_bloco if restante is None else min(tamanho_bloco, restante))
+            if not bloco:
+                break
+            h.update(bloco)
+            if restante is not None:
+                restante -= len(bloco)
+    return h.hexdigest()
+
+
+def _sentinela(caminho, offset):
+    # Hash do trecho imediatamente anterior ao offset consumido
+    inicio = max(0, offset - TAMANHO_SENTINELA)
+    with open(caminho, 'rb') as f:
+        f.seek(inicio)
+        return hashlib.blake2b(f.read(offset - inicio), digest_size=16).hexdigest()
+
+
+def _estado_arquivo(caminho):
+    info = os.stat(caminho)
+    return info.st_mtime_ns, info.st_size
+
+
+# -----------------------------------------------------------
+# Conversão CSV -> colunas tipadas
+# -----------------------------------------------------------
+def _converter(df):
+    # Verificar e remover colunas duplicadas
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    colunas = {}
+    for col in df.columns:
+        if col == COLUNA_TEMPO:
+            tempo = pd.to_datetime(df[col], format='ISO8601')
+            colunas[col] = tempo.to_numpy('datetime64[ns]').view('int64')
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            colunas[col] = df[col].to_numpy(np.float32)
+        else:
+            colunas[col] = df[col].to_numpy(str)
+    return colunas
+
+
+def _ordenar(colunas):
+    if COLUNA_TEMPO not in colunas:
+        return colunas
+    tempo = colunas[COLUNA_TEMPO]
+    if len(tempo) > 1 and not np.all(tempo[1:] >= tempo[:-1]):
+        ordem = np.argsort(tempo, kind='stable')
+        colunas = {col: valores[ordem] for col, valores in colunas.items()}
+    return colunas
+
+
+def _ler_trecho(caminho, inicio, cabecalho=None):
+    """Lê as linhas a partir do byte `inicio` e retorna (colunas, nomes, fim).
+
+    `fim` é o offset logo após a última quebra de linha lida; uma linha final
+    sem quebra ainda é convertida, mas o offset não avança sobre ela.
+    """
+    with open(caminho, 'rb') as f:
+        f.seek(inicio)
+        bruto = f.read()
+
+    ultima_quebra = bruto.rfind(b'\n')
+    fim = inicio + ultima_quebra + 1 if ultima_quebra >= 0 else inicio
+    parcial = fim < inicio + len(bruto)
+
+    if cabecalho is None:
+        df = pd.read_csv(io.BytesIO(bruto))
+    elif not bruto.strip():
+        return None, cabecalho, fim, parcial
+    else:
+        df = pd.read_csv(io.BytesIO(bruto), header=None, names=cabecalho)
+
+    return _ordenar(_converter(df)), list(df.columns), fim, parcial
+
+
+# -----------------------------------------------------------
+# Agregados derivados
+# -----------------------------------------------------------
+class ResumoColunas:
+    """Contagem, mínimo e máximo de cada coluna, atualizados a cada lote."""
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.contagem = 0
+        self.minimos = {}
+        self.maximos = {}
+
+    def atualizar(self, novas):
+        if len(novas) == 0:
+            return
+        self.contagem += len(novas)
+        for col in novas.columns:
+            valores = novas[col]
+            if not (pd.api.types.is_numeric_dtype(valores) or col == COLUNA_TEMPO):
+                continue
+            minimo, maximo = valores.min(), valores.max()
+            self.minimos[col] = minimo if col not in self.minimos else min(self.minimos[col], minimo)
+            self.maximos[col] = maximo if col not in self.maximos else max(self.maximos[col], maximo)
+
+
+# -----------------------------------------------------------
+# Conjunto de dados com ingestão incremental
+# -----------------------------------------------------------
+class ConjuntoDados:
+    """Colunas de um CSV mantidas em buffers que crescem por anexação."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.resumo = ResumoColunas()
+        self._agregados = [self.resumo]
+        self._nomeados = {}
+        self._buffers = {}
+        self._cabecalho = None
+        self._n = 0
+        self._offset = 0
+        self._parcial = False
+        self._estado = None
+        self._frame = None
+        self._linhas_no_cache = 0
+        self._sentinela = None
+        self._hash = None
+
+    # ---- agregados ----
+    def registrar_agregado(self, agregado):
+        """Registra um objeto com `reiniciar()` e `atualizar(df_novas_linhas)`."""
+        agregado.reiniciar()
+        if self._n:
+            agregado.atualizar(self.df)
+        self._agregados.append(agregado)
+        return agregado
+
+    def obter_agregado(self, nome, fabrica):
+        """Agregado registrado com `nome`, criado por `fabrica()` na primeira vez."""
+        with _lock:
+            if nome not in self._nomeados:
+                self._nomeados[nome] = self.registrar_agregado(fabrica())
+            return self._nomeados[nome]
+
+    def _notificar(self, colunas, completo):
+        if completo:
+            for agregado in self._agregados:
+                agregado.reiniciar()
+        if colunas is None:
+            return
+        novas = _montar_frame(colunas)
+        for agregado in self._agregados:
+            agregado.atualizar(novas)
+
+    # ---- buffers ----
+    def _substituir(self, colunas):
+        self._buffers = {col: np.array(valores) for col, valores in colunas.items()}
+        self._n = len(next(iter(colunas.values()))) if colunas else 0
+        self._frame = None
+
+    def _anexar(self, colunas):
+        m = len(next(iter(colunas.values())))
+        if m == 0:
+            return
+        n = self._n
+        tempo = self._buffers.get(COLUNA_TEMPO)
+        fora_de_ordem = (
+            tempo is not None and n > 0 and colunas[COLUNA_TEMPO][0] < tempo[n - 1]
+        )
+
+        if fora_de_ordem:
+            # Reordena apenas o sufixo afetado, em buffers novos para não
+            # alterar frames já entregues às páginas
+            pos = int(np.searchsorted(tempo[:n], colunas[COLUNA_TEMPO][0], side='right'))
+            sufixo = {
+                col: np.concatenate([self._buffers[col][pos:n], colunas[col]])
+                for col in self._buffers
+            }
+            ordem = np.argsort(sufixo[COLUNA_TEMPO], kind='stable')
+            self._buffers = {
+                col: np.concatenate([self._buffers[col][:pos], sufixo[col][ordem]])
+                for col in self._buffers
+            }
+        else:
+            capacidade = len(next(iter(self._buffers.values())))
+            if n + m > capacidade:
+                nova_capacidade = max(n + m, int(capacidade * 1.5) + 1024)
+                for col, buffer in self._buffers.items():
+                    novo = np.empty(nova_capacidade, dtype=buffer.dtype)
+                    novo[:n] = buffer[:n]
+                    self._buffers[col] = novo
+            for col, buffer in self._buffers.items():
+                buffer[n:n + m] = colunas[col]
+
+        self._n = n + m
+        self._frame = None
+
+    @property
+    def df(self):
+        if self._frame is None:
+            self._frame = _montar_frame({col: buf[:self._n] for col, buf in self._buffers.items()})
+        return self._frame
+
+    # ---- consultas por período ----
+    def janela(self, inicio=None, fim=None):
+        """Leituras entre `inicio` e `fim` (inclusivos), ordenadas por tempo."""
+        return janela_temporal(self.df, inicio, fim)
+
+    def rollup(self, resolucao, inicio=None, fim=None):
+        """Blocos de `resolucao` ('hora' ou 'dia') que tocam o período (ver rollups.py)."""
+        return self.obter_agregado('rollups', Rollups).recorte(resolucao, inicio, fim)
+
+    # ---- sincronização com o arquivo ----
+    def sincronizar(self):
+        """Lê apenas o que foi anexado ao arquivo desde a última chamada."""
+        estado = _estado_arquivo(self.caminho)
+        if estado == self._estado:
+            return self.df
+
+        if self._estado is None:
+            self._carregar_inicial(estado)
+        elif self._pode_anexar(estado):
+            colunas, _, fim, parcial = _ler_trecho(self.caminho, self._offset, self._cabecalho)
+            if colunas is not None:
+                self._anexar(colunas)
+            self._offset, self._parcial = fim, parcial
+            self._notificar(colunas, completo=False)
+            self._talvez_gravar_cache(estado)
+        elif estado[1] == self._estado[1] and self._hash == _hash_arquivo(self.caminho):
+            # Apenas o mtime mudou
+            pass
+        else:
+            self._recarregar(estado)
+
+        self._estado = estado
+        return self.df
+
+    def _pode_anexar(self, estado):
+        return (
+            not self._parcial
+            and self._cabecalho is not None
+            and estado[1] > self._estado[1]
+            and _sentinela(self.caminho, self._offset) == self._sentinela
+        )
+
+    def _carregar_inicial(self, estado):
+        meta = _ler_meta(_diretorio_cache(self.caminho))
+        colunas = _carregar_cache(self.caminho, meta, estado)
+        if colunas is None:
+            self._recarregar(estado)
+            return
+
+        self._substituir(colunas)
+        self._cabecalho = meta['cabecalho']
+        self._offset, self._parcial = meta['offset'], meta['parcial']
+        self._sentinela, self._hash = meta['sentinela'], meta['hash']
+        self._linhas_no_cache = self._n
+        self._estado = (meta['mtime_ns'], meta['tamanho'])
+        self._notificar(colunas, completo=True)
+
+        # Cache válido para um prefixo do arquivo: lê só o trecho novo
+        if estado != self._estado:
+            self.sincronizar()
+
+    def _recarregar(self, estado):
+        colunas, cabecalho, fim, parcial = _ler_trecho(self.caminho, 0)
+        self._substituir(colunas)
+        self._cabecalho = cabecalho
+        self._offset, self._parcial = fim, parcial
+        self._notificar(colunas, completo=True)
+        self._gravar_cache(estado)
+
+    # ---- cache em disco ----
+    def _talvez_gravar_cache(self, estado):
+        novas = self._n - self._linhas_no_cache
+        if novas > FRACAO_REGRAVAR_CACHE * max(self._linhas_no_cache, 1):
+            self._gravar_cache(estado)
+        else:
+            self._sentinela = _sentinela(self.caminho, self._offset)
+
+    def _gravar_cache(self, estado):
+        self._sentinela = _sentinela(self.caminho, self._offset)
+        self._hash = _hash_arquivo(self.caminho, limite=estado[1])
+        meta = {
+            'versao': VERSAO_CACHE,
+            'mtime_ns': estado[0],
+            'tamanho': estado[1],
+            'hash': self._hash,
+            'offset': self._offset,
+            'parcial': self._parcial,
+            'sentinela': self._sentinela,
+            'cabecalho': self._cabecalho,
+        }
+        colunas = {col: buf[:self._n] for col, buf in self._buffers.items()}
+        try:
+            _gravar_cache(_diretorio_cache(self.caminho), colunas, meta)
+            self._linhas_no_cache = self._n
+        except OSError:
+            # Sem permissão de escrita: segue apenas com o cache em memória
+            pass
+
+
+class ConjuntoBanco(ConjuntoDados):
+    """ConjuntoDados alimentado pelo banco local de leituras."""
+
+    def __init__(self, banco):
+        super().__init__(banco.caminho)
+        self.banco = banco
+        self._codigo = None
+
+    @staticmethod
+    def _colunas(df):
+        colunas = {COLUNA_TEMPO: df[COLUNA_TEMPO].to_numpy('datetime64[ns]').view('int64')}
+        for col in df.columns:
+            if col not in (COLUNA_TEMPO, 'codigo'):
+                colunas[col] = df[col].to_numpy()
+        return colunas
+
+    def sincronizar(self):
+        ultimo = self.banco.ultimo_codigo()
+        if ultimo == self._codigo:
+            return self.df
+
+        if self._codigo is None:
+            colunas = self._colunas(self.banco.consultar_desde(0, ate=ultimo))
+            self._substituir(colunas)
+            self._notificar(colunas, completo=True)
+        else:
+            novas = self.banco.consultar_desde(self._codigo, ate=ultimo)
+            if len(novas):
+                colunas = self._colunas(novas)
+                self._anexar(colunas)
+                self._notificar(colunas, completo=False)
+
+        self._codigo = ultimo
+        return self.df
+
+    def janela(self, inicio=None, fim=None):
+        # Apenas as partições mensais do período são lidas
+        return self.banco.consultar(inicio, fim).drop(columns='codigo')
+
+    def rollup(self, resolucao, inicio=None, fim=None):
+        # Mantidos pelo banco a cada inserção, sem reagregar as leituras
+        return self.banco.consultar_rollup(resolucao, inicio, fim)
+
+
+def _montar_frame(colunas):
+    dados = {}
+    for col, valores in colunas.items():
+        if col == COLUNA_TEMPO:
+            dados[col] = valores.view('datetime64[ns]')
+        else:
+            dados[col] = valores
+    # copy=False mantém as colunas como views dos buffers, sem consolidação
+    return pd.DataFrame(dados, copy=False)
+
+
+# -----------------------------------------------------------
+# Cache colunar em disco
+# -----------------------------------------------------------
+def _diretorio_cache(caminho):
+    nome = hashlib.blake2b(os.path.abspath(caminho).encode(), digest_size=8).hexdigest()
+    return os.path.join(DIRETORIO_CACHE, 'dados', f'{os.path.basename(caminho)}-{nome}')
+
+
+def _ler_meta(diretorio):
+    try:
+        with open(os.path.join(diretorio, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('versao') == VERSAO_CACHE else None
+
+
+def _gravar_meta(diretorio, meta):
+    temporario = os.path.join(diretorio, 'meta.json.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(temporario, os.path.join(diretorio, 'meta.json'))
+
+
+def _cache_valido(meta, caminho, estado):
+    if meta is None:
+        return False
+    mtime_ns, tamanho = estado
+    if tamanho > meta['tamanho']:
+        # O arquivo cresceu: o cache vale se o trecho já consumido não mudou
+        return not meta['parcial'] and _sentinela(caminho, meta['offset']) == meta['sentinela']
+    if tamanho < meta['tamanho']:
+        return False
+    if meta['mtime_ns'] == mtime_ns:
+        return True
+    # O arquivo foi tocado mas pode ter o mesmo conteúdo: confere o hash
+    if meta['hash'] != _hash_arquivo(caminho):
+        return False
+    meta['mtime_ns'] = mtime_ns
+    _gravar_meta(_diretorio_cache(caminho), meta)
+    return True
+
+
+def _carregar_cache(caminho, meta, estado):
+    if not _cache_valido(meta, caminho, estado):
+        return None
+    diretorio = _diretorio_cache(caminho)
+    try:
+        return {
+            col: np.load(os.path.join(diretorio, f'{i}.npy'), allow_pickle=False)
+            for i, col in enumerate(meta['colunas'])
+        }
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_cache(diretorio, colunas, meta):
+    os.makedirs(diretorio, exist_ok=True)
+    for i, valores in enumerate(colunas.values()):
+        np.save(os.path.join(diretorio, f'{i}.npy'), valores, allow_pickle=False)
+    meta['colunas'] = list(colunas)
+    _gravar_meta(diretorio, meta)
+
+
+# -----------------------------------------------------------
+# API pública
+# -----------------------------------------------------------
+def conjunto_dados(caminho=None):
+    """Retorna o conjunto compartilhado, já sincronizado.
+
+    Sem `caminho`, usa o banco local se ele existir e, senão, o data.csv.
+    Caminhos terminados em .db são abertos como banco.
+    """
+    if caminho is None:
+        caminho = CAMINHO_BANCO if os.path.exists(CAMINHO_BANCO) else CAMINHO_CSV
+    caminho = os.path.abspath(caminho)
+    with _lock:
+        conjunto = _conjuntos.get(caminho)
+        if conjunto is None:
+            if caminho.endswith('.db'):
+                conjunto = ConjuntoBanco(BancoSensores(caminho))
+            else:
+                conjunto = ConjuntoDados(caminho)
+            _conjuntos[caminho] = conjunto
+        conjunto.sincronizar()
+        return conjunto
+
+
+def carregar_dados(caminho=None):
+    """Retorna o DataFrame de sensores ordenado por timestamp.
+
+    O mesmo objeto é compartilhado entre páginas e reruns enquanto os dados
+    não mudarem, portanto não deve ser modificado in-place.
+    """
+    return conjunto_dados(caminho).df
+
+
+def valores_exibicao(df):
+    """Cópia com as colunas float32 em float64, com os mesmos decimais do CSV.
+
+    Usa a menor representação decimal de cada float32 (68.32, e não
+    68.31999969...). Pensada para trechos pequenos, como df.head().
+    """
+    convertidas = {
+        col: df[col].astype(str).astype(np.float64)
+        for col in df.columns if df[col].dtype == np.float32
+    }
+    return df.assign(**convertidas)
@@ -0,0 +1,184 @@
+# estatisticas.py
+# Estatísticas incrementais das colunas de sensores.
+#
+# Médias, variâncias e co-momentos são mantidos pela fórmula de combinação
+# de Welford/Chan, lote a lote, de modo que a matriz de correlação sai de
+# uma matriz k x k já acumulada. Quantis vêm de um esboço por histograma
+# dinâmico (bins de largura fixa que dobram quando um valor sai da faixa),
+# que também acumula as somas das demais colunas por faixa de pH.
+import threading
+
+import numpy as np
+import pandas as pd
+
+from farmtech.configuracao import COLUNAS_NUMERICAS
+
+
+# -----------------------------------------------------------
+# Esboço de quantis por histograma dinâmico
+# -----------------------------------------------------------
+class EsbocoQuantis:
+    """Histograma de `n_bins` bins cuja faixa dobra para caber novos valores.
+
+    Opcionalmente acumula, por bin, a soma de outras colunas (`n_somas`).
+    O erro dos quantis é limitado pela largura de um bin.
+    """
+
+    def __init__(self, n_bins=4096, n_somas=0):
+        self.n_bins = n_bins
+        self.n_somas = n_somas
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.inicio = None
+        self.largura = None
+        # Coluna 0: contagem; demais: somas das colunas associadas
+        self.acumulados = np.zeros((self.n_bins, 1 + self.n_somas))
+
+    def _dobrar(self, para_esquerda):
+        pares = self.acumulados.reshape(self.n_bins // 2, 2, -1).sum(axis=1)
+        self.acumulados = np.zeros_like(self.acumulados)
+        if para_esquerda:
+            self.acumulados[self.n_bins // 2:] = pares
+            self.inicio -= self.n_bins * self.largura
+        else:
+            self.acumulados[:self.n_bins // 2] = pares
+        self.largura *= 2
+
+    def atualizar(self, valores, somas=None):
+        valores = np.asarray(valores, dtype=np.float64)
+        validos = np.isfinite(valores)
+        valores = valores[validos]
+        if len(valores) == 0:
+            return
+        minimo, maximo = valores.min(), valores.max()
+
+        if self.inicio is None:
+            amplitude = max(maximo - minimo, 1e-6 * abs(maximo), 1e-9)
+            self.inicio = minimo - 0.05 * amplitude
+            self.largura = 1.1 * amplitude / self.n_bins
+
+        while minimo < self.inicio:
+            self._dobrar(para_esquerda=True)
+        while maximo >= self.inicio + self.n_bins * self.largura:
+            self._dobrar(para_esquerda=False)
+
+        bins = ((valores - self.inicio) / self.largura).astype(np.int64)
+        np.clip(bins, 0, self.n_bins - 1, out=bins)
+        self.acumulados[:, 0] += np.bincount(bins, minlength=self.n_bins)
+        if self.n_somas:
+            somas = np.asarray(somas, dtype=np.float64)[validos]
+            for j in range(self.n_somas):
+                self.acumulados[:, 1 + j] += np.bincount(bins, weights=somas[:, j], minlength=self.n_bins)
+
+    @property
+    def contagem(self):
+        return self.acumulados[:, 0].sum()
+
+    def quantil(self, q):
+        """Quantil aproximado, interpolando linearmente dentro do bin."""
+        contagens = self.acumulados[:, 0]
+        total = contagens.sum()
+        if total == 0:
+            return np.nan
+        acumulado = np.cumsum(contagens)
+        alvo = q * total
+        b = int(np.searchsorted(acumulado, alvo, side='left'))
+        b = min(b, self.n_bins - 1)
+        antes = acumulado[b] - contagens[b]
+        fracao = (alvo - antes) / contagens[b] if contagens[b] else 0.0
+        return self.inicio + (b + fracao) * self.largura
+
+    def somas_ate(self, limite):
+        """Acumulados (contagem, somas) dos bins que começam antes de `limite` e dos demais.
+
+        O bin que contém `limite` fica inteiro no primeiro grupo.
+        """
+        abaixo = self.inicio + np.arange(self.n_bins) * self.largura < limite
+        return self.acumulados[abaixo].sum(axis=0), self.acumulados[~abaixo].sum(axis=0)
+
+
+# -----------------------------------------------------------
+# Momentos e co-momentos incrementais
+# -----------------------------------------------------------
+class EstatisticasIncrementais:
+    """Agregado do ConjuntoDados com médias, covariâncias e quantis.
+
+    Linhas com algum valor ausente nas colunas acompanhadas são ignoradas.
+    """
+
+    def __init__(self, colunas=COLUNAS_NUMERICAS, coluna_faixa='ph', n_bins=4096):
+        self.colunas = list(colunas)
+        self.coluna_faixa = coluna_faixa
+        self.n_bins = n_bins
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        k = len(self.colunas)
+        self.n = 0
+        self.media = np.zeros(k)
+        self.comomentos = np.zeros((k, k))
+        self.esbocos = {
+            col: EsbocoQuantis(self.n_bins, n_somas=k if col == self.coluna_faixa else 0)
+            for col in self.colunas
+        }
+
+    def atualizar(self, novas):
+        matriz = novas[self.colunas].to_numpy(np.float64)
+        matriz = matriz[np.isfinite(matriz).all(axis=1)]
+        nb = len(matriz)
+        if nb == 0:
+            return
+
+        media_lote = matriz.mean(axis=0)
+        centrada = matriz - media_lote
+        comomentos_lote = centrada.T @ centrada
+
+        with self._lock:
+            n = self.n
+            delta = media_lote - self.media
+            total = n + nb
+            self.comomentos += comomentos_lote + np.outer(delta, delta) * (n * nb / total)
+            self.media += delta * (nb / total)
+            self.n = total
+
+            for j, col in enumerate(self.colunas):
+                somas = matriz if col == self.coluna_faixa else None
+                self.esbocos[col].atualizar(matriz[:, j], somas)
+
+    # ---- consultas O(1) ----
+    def variancia(self):
+        return pd.Series(np.diag(self.comomentos) / max(self.n - 1, 1), index=self.colunas)
+
+    def correlacao(self):
+        desvios = np.sqrt(np.diag(self.comomentos))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = self.comomentos / np.outer(desvios, desvios)
+        return pd.DataFrame(corr, index=self.colunas, columns=self.colunas)
+
+    def correlacao_par(self, x, y):
+        i, j = self.colunas.index(x), self.colunas.index(y)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.comomentos[i, j] / np.sqrt(self.comomentos[i, i] * self.comomentos[j, j])
+
+    def quantil(self, coluna, q):
+        return self.esbocos[coluna].quantil(q)
+
+    def medias_por_faixa(self, colunas, rotulos=('Baixo', 'Alto'), nome=None):
+        """Médias das colunas abaixo/acima da mediana da coluna de faixa.
+
+        Equivale ao pd.cut com limites [mínimo, mediana, máximo] e
+        include_lowest=True na resolução de um bin do esboço: o bin da
+        mediana, com todas as leituras empatadas nela, fica na primeira
+        faixa; valores distintos a menos de um bin da mediana também.
+        """
+        esboco = self.esbocos[self.coluna_faixa]
+        abaixo, acima = esboco.somas_ate(esboco.quantil(0.5))
+        linhas = []
+        for acumulado in (abaixo, acima):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                medias = acumulado[1:] / acumulado[0]
+            linhas.append([medias[self.colunas.index(col)] for col in colunas])
+        indice = pd.Index(rotulos, name=nome or self.coluna_faixa)
+        return pd.DataFrame(linhas, index=indice, columns=colunas)
@@ -0,0 +1,127 @@
+# estimadores.py
+# Famílias de modelos da página de Modelagem Preditiva.
+#
+# Além da floresta aleatória, a página oferece gradient boosting por
+# histogramas (as features são discretizadas em até 255 faixas, o que
+# mantém o treino rápido e o modelo pequeno com milhões de linhas) e uma
+# regressão linear (Ridge) como referência barata. Todas são treinadas e
+# avaliadas pelo mesmo caminho, que também mede o tempo de treino, a
+# latência de previsão e o tamanho do modelo serializado.
+#
+# O scikit-learn é importado só dentro das funções de treino, para que a
+# página possa montar o seletor sem carregá-lo.
+import pickle
+import time
+
+import numpy as np
+
+# tipo -> nome exibido e parâmetros fixos
+ESTIMADORES = {
+    'floresta': {'nome': 'Floresta aleatória (RandomForest)', 'fixos': {'random_state': 42}},
+    'gradiente': {'nome': 'Gradient boosting por histogramas', 'fixos': {'random_state': 42}},
+    'linear': {'nome': 'Regressão linear (Ridge)', 'fixos': {}},
+}
+
+
+def _treinar_gradiente(X_train, y_train, parametros, progresso=None):
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    if np.ndim(y_train) == 2:
+        # Alvo com várias colunas (previsão de várias leituras à frente):
+        # um modelo por coluna
+        from sklearn.multioutput import MultiOutputRegressor
+        modelo = MultiOutputRegressor(HistGradientBoostingRegressor(**parametros)).fit(X_train, y_train)
+        if progresso is not None:
+            progresso(1, 1)
+        return modelo
+
+    # Um único fit: com warm_start em lotes, cada lote refaz a discretização
+    # das features e o treino fica várias vezes mais lento
+    modelo = HistGradientBoostingRegressor(**parametros).fit(X_train, y_train)
+    if progresso is not None:
+        progresso(modelo.n_iter_, modelo.n_iter_)
+    return modelo
+
+
+def _treinar_linear(X_train, y_train, parametros, progresso=None):
+    from sklearn.linear_model import Ridge
+
+    modelo = Ridge(**parametros).fit(X_train, y_train)
+    if progresso is not None:
+        progresso(1, 1)
+    return modelo
+
+
+def treinar_estimador(tipo, X_train, y_train, parametros, modelo_base=None, progresso=None):
+    """Treina um modelo da família `tipo` com `parametros` (já com os fixos).
+
+    `modelo_base` só é usado pela floresta (veja treinamento.py).
+    `progresso(feitas, total)` é chamado ao longo do treino.
+    """
+    if tipo == 'floresta':
+        from farmtech.treinamento import treinar_floresta
+        return treinar_floresta(X_train, y_train, parametros, modelo_base=modelo_base, progresso=progresso)
+    if tipo == 'gradiente':
+        return _treinar_gradiente(X_train, y_train, parametros, progresso)
+    if tipo == 'linear':
+        return _treinar_linear(X_train, y_train, parametros, progresso)
+    raise ValueError(f'Família de modelo desconhecida: {tipo}')
+
+
+# -----------------------------------------------------------
+# Custos do modelo
+# -----------------------------------------------------------
+class _ContadorBytes:
+    """Arquivo que só conta os bytes escritos (mede o pickle sem guardá-lo)."""
+
+    def __init__(self):
+        self.total = 0
+
+    def write(self, dados):
+        # Com o protocolo 5, arrays grandes chegam como PickleBuffer
+        tamanho = memoryview(dados).nbytes
+        self.total += tamanho
+        return tamanho
+
+
+def tamanho_modelo(modelo):
+    """Tamanho em bytes do modelo serializado com pickle."""
+    contador = _ContadorBytes()
+    pickle.dump(modelo, contador, protocol=pickle.HIGHEST_PROTOCOL)
+    return contador.total
+
+
+def latencia_previsao(modelo, X, repeticoes=20):
+    """Mediana (s) da previsão de uma linha e tempo (s) por linha em lote."""
+    linha = np.ascontiguousarray(X[:1])
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        modelo.predict(linha)
+        tempos.append(time.perf_counter() - inicio)
+    inicio = time.perf_counter()
+    modelo.predict(X)
+    por_linha_lote = (time.perf_counter() - inicio) / max(len(X), 1)
+    return float(np.median(tempos)), por_linha_lote
+
+
+def importancias(modelo, X, y, max_linhas=2000, semente=42):
+    """Importância relativa de cada feature (soma 1).
+
+    Usa `feature_importances_` quando o modelo tem (floresta), os
+    coeficientes em desvios-padrão no modelo linear (média entre as
+    saídas, se houver várias) e, nos demais, a
+    importância por permutação numa amostra de até `max_linhas` linhas.
+    """
+    if hasattr(modelo, 'feature_importances_'):
+        valores = np.asarray(modelo.feature_importances_, dtype=np.float64)
+    elif hasattr(modelo, 'coef_'):
+        valores = np.abs(np.atleast_2d(modelo.coef_)).mean(axis=0) * np.std(X, axis=0)
+    else:
+        from sklearn.inspection import permutation_importance
+        rng = np.random.default_rng(semente)
+        amostra = rng.choice(len(X), size=min(len(X), max_linhas), replace=False)
+        resultado = permutation_importance(modelo, X[amostra], y[amostra], n_repeats=3, random_state=semente)
+        valores = np.clip(resultado.importances_mean, 0, None)
+    total = valores.sum()
+    return valores / total if total > 0 else valores
@@ -0,0 +1,194 @@
+# figuras.py
+# Construtores das figuras Plotly da página de Exploração de Dados.
+#
+# Todos enviam ao navegador apenas dados agregados ou reduzidos (veja
+# graficos.py), independentemente do tamanho do histórico.
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from farmtech.graficos import (
+    LIMITE_PONTOS_DISPERSAO, MAX_PONTOS_GRAFICO, centros, densidade_2d,
+    histograma_agregado, reduzir_serie, resumo_boxplot
+)
+
+
+def criar_histograma(df, coluna, titulo, nbins=30):
+    # Bins e quantis calculados no servidor: o navegador recebe só os agregados
+    valores = df[coluna].to_numpy()
+    contagens, bordas = histograma_agregado(valores, nbins)
+    cor = '#1f77b4' if coluna == 'ph' else px.colors.qualitative.Plotly[0]
+
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+    fig.add_trace(go.Box(
+        y=[coluna],
+        orientation='h',
+        marker_color=cor,
+        name=coluna,
+        **{chave: [valor] for chave, valor in resumo_boxplot(valores).items()}
+    ), row=1, col=1)
+    fig.add_trace(go.Bar(
+        x=centros(bordas),
+        y=contagens,
+        width=np.diff(bordas),
+        marker_color=cor,
+        name=coluna
+    ), row=2, col=1)
+
+    fig.update_layout(title=titulo, bargap=0, showlegend=False)
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_xaxes(title_text=coluna, row=2, col=1)
+    fig.update_yaxes(title_text='count', row=2, col=1)
+    return fig
+
+
+def criar_grafico_temporal(df, coluna, titulo, max_pontos=MAX_PONTOS_GRAFICO):
+    fig = go.Figure()
+    line_color = '#1f77b4'  # Azul para todas as variáveis
+
+    # Redução LTTB no servidor: o payload não cresce com o histórico
+    tempo = df['timestamp'].to_numpy()
+    valores = df[coluna].to_numpy()
+    pontos = reduzir_serie(tempo.view('int64'), valores, max_pontos)
+    
+    fig.add_trace(go.Scatter(
+        x=tempo[pontos],
+        y=valores[pontos],
+        mode='lines',
+        name=coluna,
+        line=dict(color=line_color, width=2)
+    ))
+
+    return _layout_temporal(fig, coluna, titulo)
+
+
+def criar_grafico_rollup(serie, coluna, titulo):
+    """Média por bloco (rollups.serie) com a faixa entre mínimo e máximo."""
+    fig = go.Figure()
+    line_color = '#1f77b4'
+    tempo = serie['timestamp'].to_numpy()
+
+    fig.add_trace(go.Scatter(
+        x=tempo, y=serie['maximo'].to_numpy(), mode='lines', name='máximo',
+        line=dict(width=0), showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=tempo, y=serie['minimo'].to_numpy(), mode='lines', name='mínimo',
+        line=dict(width=0), fill='tonexty', fillcolor='rgba(31, 119, 180, 0.2)', showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=tempo,
+        y=serie['media'].to_numpy(),
+        mode='lines',
+        name=coluna,
+        customdata=serie['contagem'].to_numpy(),
+        hovertemplate='%{y:.2f} (%{customdata} leituras)',
+        line=dict(color=line_color, width=2)
+    ))
+    return _layout_temporal(fig, coluna, titulo)
+
+
+def _layout_temporal(fig, coluna, titulo):
+    fig.update_layout(
+        title=titulo,
+        xaxis_title='Data e Hora',
+        yaxis_title=coluna,
+        template='plotly_white',
+        hovermode='x unified'
+    )
+
+    fig.update_xaxes(
+        rangeslider_visible=True,
+        rangeselector=dict(
+            buttons=list([
+                dict(count=1, label="1d", step="day", stepmode="backward"),
+                dict(count=7, label="1w", step="day", stepmode="backward"),
+                dict(step="all")
+            ])
+        )
+    )
+    return fig
+
+
+def criar_dispersao(df, x_var, y_var, titulo, labels, **kwargs):
+    # Poucas linhas: dispersão ponto a ponto. Muitas linhas: mapa de densidade
+    # com a média do pH por célula, calculado no servidor
+    if len(df) <= LIMITE_PONTOS_DISPERSAO:
+        return px.scatter(
+            df,
+            x=x_var,
+            y=y_var,
+            color='ph',
+            color_continuous_scale='Blues',
+            title=titulo,
+            labels=labels,
+            hover_data=['timestamp'],
+            **kwargs
+        )
+
+    contagens, media_ph, bordas_x, bordas_y = densidade_2d(df[x_var], df[y_var], cor=df['ph'])
+    fig = go.Figure(go.Heatmap(
+        x=centros(bordas_x),
+        y=centros(bordas_y),
+        z=media_ph,
+        customdata=contagens,
+        coloraxis='coloraxis',
+        hovertemplate='x: %{x:.2f}<br>y: %{y:.2f}<br>pH médio: %{z:.2f}<br>Leituras: %{customdata}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f'{titulo} - densidade de {len(df)} leituras',
+        xaxis_title=labels.get(x_var, x_var),
+        yaxis_title=labels.get(y_var, y_var),
+        coloraxis=dict(colorscale='Blues')
+    )
+    return fig
+
+
+def criar_matriz_dispersao(df, dimensoes, titulo):
+    if len(df) <= LIMITE_PONTOS_DISPERSAO:
+        return px.scatter_matrix(
+            df,
+            dimensions=dimensoes,
+            color='ph',
+            color_continuous_scale='Blues',
+            title=titulo,
+            hover_data=['timestamp']
+        )
+
+    # Grade de mapas de densidade (histogramas na diagonal)
+    n = len(dimensoes)
+    fig = make_subplots(rows=n, cols=n, horizontal_spacing=0.02, vertical_spacing=0.02)
+    for i, y_dim in enumerate(dimensoes):
+        for j, x_dim in enumerate(dimensoes):
+            if i == j:
+                contagens, bordas = histograma_agregado(df[x_dim].to_numpy(), 30)
+                fig.add_trace(go.Bar(x=centros(bordas), y=contagens, marker_color='#1f77b4'), row=i + 1, col=j + 1)
+            else:
+                _, media_ph, bordas_x, bordas_y = densidade_2d(df[x_dim], df[y_dim], nbins=40, cor=df['ph'])
+                fig.add_trace(go.Heatmap(
+                    x=centros(bordas_x), y=centros(bordas_y), z=media_ph, coloraxis='coloraxis'
+                ), row=i + 1, col=j + 1)
+            if i == n - 1:
+                fig.update_xaxes(title_text=x_dim, row=i + 1, col=j + 1)
+            if j == 0:
+                fig.update_yaxes(title_text=y_dim, row=i + 1, col=j + 1)
+    fig.update_layout(title=titulo, showlegend=False, bargap=0, coloraxis=dict(colorscale='Blues'))
+    return fig
+
+
+def criar_mapa_correlacao(corr, titulo):
+    """Mapa de calor anotado da matriz de correlação (substitui o seaborn)."""
+    fig = go.Figure(go.Heatmap(
+        x=list(corr.columns),
+        y=list(corr.index),
+        z=corr.to_numpy(),
+        zmid=0,
+        colorscale='Blues',
+        texttemplate='<b>%{z:.2f}</b>',
+        textfont=dict(size=12),
+        hovertemplate='%{y} x %{x}: %{z:.2f}<extra></extra>'
+    ))
+    fig.update_layout(title=titulo, height=600, template='plotly_white')
+    fig.update_yaxes(autorange='reversed')
+    return fig
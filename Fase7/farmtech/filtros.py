@@ -0,0 +1,144 @@
+# filtros.py
+# Motor de filtros por intervalo para a barra lateral da Modelagem Preditiva.
+#
+# Cada coluna numérica ganha um índice ordenado (argsort) construído uma vez
+# por versão do dataset. Como o DataFrame já vem ordenado por timestamp, o
+# corte de datas é uma busca binária. O predicado mais seletivo gera as
+# linhas candidatas e os demais são avaliados apenas sobre elas, em uma única
+# máscara, sem cópias intermediárias do DataFrame.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from farmtech.configuracao import COLUNA_TEMPO
+
+
+class MotorFiltros:
+    def __init__(self, df, colunas, coluna_tempo=COLUNA_TEMPO, tamanho_cache=32):
+        self.df = df
+        self.tamanho_cache = tamanho_cache
+        self._valores = {col: df[col].to_numpy() for col in colunas}
+        self._ordens = {}
+        self._ordenados = {}
+        for col, valores in self._valores.items():
+            ordem = np.argsort(valores, kind='stable')
+            self._ordens[col] = ordem
+            self._ordenados[col] = valores[ordem]
+        self._tempo = df[coluna_tempo].to_numpy() if coluna_tempo in df else None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---- busca binária ----
+    def _faixa_indice(self, col, minimo, maximo):
+        ordenados = self._ordenados[col]
+        minimo = np.asarray(minimo, dtype=ordenados.dtype)
+        maximo = np.asarray(maximo, dtype=ordenados.dtype)
+        inicio = int(np.searchsorted(ordenados, minimo, side='left'))
+        fim = int(np.searchsorted(ordenados, maximo, side='right'))
+        return inicio, max(inicio, fim)
+
+    def _faixa_tempo(self, periodo):
+        n = len(self.df)
+        if periodo is None or self._tempo is None:
+            return 0, n
+        # Um lado None deixa o período aberto
+        inicio, fim = periodo
+        return (
+            0 if inicio is None else int(np.searchsorted(self._tempo, np.datetime64(inicio, 'ns'), side='left')),
+            n if fim is None else int(np.searchsorted(self._tempo, np.datetime64(fim, 'ns'), side='right')),
+        )
+
+    # ---- filtro ----
+    def posicoes(self, intervalos, periodo=None):
+        """Posições (ordenadas) das linhas dentro de todos os intervalos.
+
+        `intervalos` mapeia coluna -> (mínimo, máximo), ambos inclusivos;
+        `periodo` é um par (início, fim) de datas, também inclusivo (None
+        em um dos lados deixa o período aberto).
+        Retorna None quando nenhum predicado restringe o dataset.
+        """
+        chave = (tuple(sorted((col, tuple(map(float, faixa))) for col, faixa in intervalos.items())),
+                 None if periodo is None else tuple(str(p) for p in periodo))
+        with self._lock:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                return self._cache[chave]
+
+        resultado = self._calcular(intervalos, periodo)
+
+        with self._lock:
+            self._cache[chave] = resultado
+            while len(self._cache) > self.tamanho_cache:
+                self._cache.popitem(last=False)
+        return resultado
+
+    def _calcular(self, intervalos, periodo):
+        n = len(self.df)
+        t_inicio, t_fim = self._faixa_tempo(periodo)
+
+        # Seletividade de cada predicado pelo índice; os que cobrem todo o
+        # dataset (sliders na posição padrão) são descartados
+        faixas = []
+        for col, (minimo, maximo) in intervalos.items():
+            inicio, fim = self._faixa_indice(col, minimo, maximo)
+            if fim - inicio < n:
+                faixas.append((fim - inicio, col, minimo, maximo, inicio, fim))
+        faixas.sort(key=lambda f: f[0])
+
+        if not faixas and (t_inicio, t_fim) == (0, n):
+            return None
+
+        # Candidatas: o predicado mais seletivo ou o corte de datas
+        if faixas and faixas[0][0] < t_fim - t_inicio:
+            _, col, _, _, inicio, fim = faixas.pop(0)
+            candidatas = np.sort(self._ordens[col][inicio:fim])
+            if (t_inicio, t_fim) != (0, n):
+                # Posições ordenadas: o corte de datas também é uma busca binária
+                candidatas = candidatas[
+                    np.searchsorted(candidatas, t_inicio):np.searchsorted(candidatas, t_fim)
+                ]
+        else:
+            candidatas = np.arange(t_inicio, t_fim)
+
+        if not faixas or len(candidatas) == 0:
+            return candidatas
+
+        # Demais predicados combinados em uma única máscara sobre as candidatas
+        mascara = np.ones(len(candidatas), dtype=bool)
+        for _, col, minimo, maximo, _, _ in faixas:
+            valores = self._valores[col][candidatas]
+            mascara &= valores >= np.asarray(minimo, dtype=valores.dtype)
+            mascara &= valores <= np.asarray(maximo, dtype=valores.dtype)
+        return candidatas[mascara]
+
+    def aplicar(self, intervalos, periodo=None):
+        """Retorna o DataFrame filtrado (o próprio df se nada for filtrado)."""
+        posicoes = self.posicoes(intervalos, periodo)
+        if posicoes is None:
+            return self.df
+        return self.df.iloc[posicoes]
+
+
+# -----------------------------------------------------------
+# Motor compartilhado por versão do dataset
+# -----------------------------------------------------------
+_lock_motores = threading.Lock()
+_motores = OrderedDict()
+
+
+def motor_filtros(df, colunas, maximo_motores=2):
+    """Retorna o motor de filtros do DataFrame, construindo os índices uma vez."""
+    chave = (id(df), tuple(colunas))
+    with _lock_motores:
+        motor = _motores.get(chave)
+        if motor is not None and motor.df is df:
+            _motores.move_to_end(chave)
+            return motor
+
+    motor = MotorFiltros(df, colunas)
+    with _lock_motores:
+        _motores[chave] = motor
+        while len(_motores) > maximo_motores:
+            _motores.popitem(last=False)
+    return motor
@@ -0,0 +1,300 @@
+# gateway.py
+# Gateway asyncio que recebe as leituras de várias placas ESP32 por TCP.
+#
+# Protocolo (uma conexão por placa, linhas terminadas em '\n'):
+#     servidor,12                          <- opcional, identifica a placa
+#     log,68.32,92.14,5.89,23.55,35.7      <- mesmo formato do monitor serial
+#     2025-06-19T10:00:00,68.32,...        <- ou com a data e hora da leitura
+#
+# Placas sem a linha "servidor," recebem códigos negativos (-1, -2...), que
+# não colidem com placas reais. Um código declarado nunca é trocado: se a
+# placa reconecta enquanto a conexão anterior ainda grava a fila, a nova
+# espera; se a anterior continua aberta, a nova é recusada.
+#
+# Cada placa tem uma fila limitada. Quando o gravador atrasa e a fila
+# enche, a leitura da conexão é suspensa e o controle de fluxo do TCP
+# segura a placa (backpressure). Um único gravador junta os lotes de todas
+# as filas e grava em uma transação por ciclo, fora do loop de eventos.
+#
+# Métricas (JSON) em http://<host>:<porta_metricas>/metricas.
+#
+# Uso (a partir da pasta Fase7):
+#     python -m farmtech.gateway --porta 9000 --porta-metricas 9001
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+
+import numpy as np
+
+from farmtech.alertas import cliente_alertas
+from farmtech.armazenamento import BancoSensores
+from farmtech.configuracao import CAMINHO_BANCO
+from farmtech.ingestao import CAMPOS_LOG, IngestorLog
+from farmtech.metricas import MedidorTaxa
+from farmtech.regras import REGRAS_PADRAO, MotorRegras, carregar_regras
+
+TAMANHO_BLOCO = 1 << 14
+
+
+class Dispositivo:
+    """Estado de uma placa conectada: fila limitada e parser próprio."""
+
+    def __init__(self, cd_servidor, profundidade, descartar_repetidas):
+        self.cd_servidor = cd_servidor
+        self.fila = asyncio.Queue(maxsize=profundidade)
+        self.lotes = []
+        self.ingestor = IngestorLog(
+            cd_servidor=cd_servidor,
+            tamanho_lote=float('inf'),
+            descartar_repetidas=descartar_repetidas,
+            ouvintes=[lambda tempo, matriz, _: self.lotes.append((tempo, matriz))]
+        )
+        self.conectado_em = time.time()
+        self.recebidas = 0
+        self.esperas = 0
+        # A conexão terminou de ler e a fila está sendo gravada
+        self.fechando = False
+        self.encerrado = asyncio.Event()
+
+
+# -----------------------------------------------------------
+# Gateway
+# -----------------------------------------------------------
+class GatewaySensores:
+    """Servidor TCP das placas, com filas por placa e gravação em micro-lotes.
+
+    `profundidade` é o número de blocos recebidos que cada fila comporta;
+    `lote_maximo` limita as leituras por transação e `intervalo` o tempo
+    máximo que uma leitura espera pelo gravador. Com `banco=None` as
+    leituras são apenas contadas (útil para medir a vazão da rede).
+    """
+
+    def __init__(self, banco=None, profundidade=64, lote_maximo=50_000, intervalo=0.2,
+                 descartar_repetidas=True, ouvintes=None):
+        self.banco = banco
+        self.profundidade = profundidade
+        self.lote_maximo = lote_maximo
+        self.intervalo = intervalo
+        self.descartar_repetidas = descartar_repetidas
+        self.ouvintes = list(ouvintes or [])
+        self.dispositivos = {}
+        # Placas anônimas: faixa negativa, reservada
+        self._codigos = itertools.count(-1, -1)
+        self._prontos = None
+        self.recebidas = MedidorTaxa()
+        self.gravadas = MedidorTaxa()
+        self.duracao_ultima_gravacao = 0.0
+        self.falhas = 0
+        self.falhas_ouvintes = 0
+        self.ignoradas = 0
+        self.recusadas = 0
+        self.inicio = time.time()
+
+    # ---- conexões ----
+    def _novo_codigo(self):
+        codigo = next(self._codigos)
+        while codigo in self.dispositivos:
+            codigo = next(self._codigos)
+        return codigo
+
+    async def _atender(self, leitor, escritor):
+        primeira = await leitor.readline()
+        cd_servidor = None
+        if primeira.startswith(b'servidor,'):
+            try:
+                cd_servidor = int(primeira.split(b',', 1)[1])
+            except ValueError:
+                pass
+            primeira = b''
+        if cd_servidor is None:
+            cd_servidor = self._novo_codigo()
+        while cd_servidor in self.dispositivos:
+            anterior = self.dispositivos[cd_servidor]
+            if not anterior.fechando:
+                # Duas conexões ao mesmo tempo com o mesmo código
+                self.recusadas += 1
+                escritor.write(f'erro,servidor {cd_servidor} já conectado\n'.encode())
+                escritor.close()
+                return
+            # Reconexão: a fila da conexão anterior é gravada antes
+            await anterior.encerrado.wait()
+
+        dispositivo = Dispositivo(cd_servidor, self.profundidade, self.descartar_repetidas)
+        self.dispositivos[cd_servidor] = dispositivo
+        try:
+            bloco = primeira
+            while True:
+                if bloco:
+                    await self._enfileirar(dispositivo, bloco, fim=False)
+                bloco = await leitor.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+            await self._enfileirar(dispositivo, b'', fim=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            dispositivo.fechando = True
+            escritor.close()
+            # Aguarda o gravador esvaziar a fila antes de liberar o código
+            try:
+                await dispositivo.fila.join()
+            finally:
+                del self.dispositivos[cd_servidor]
+                dispositivo.encerrado.set()
+
+    async def _enfileirar(self, dispositivo, bloco, fim):
+        ingestor = dispositivo.ingestor
+        ingestor.processar_texto(bloco)
+        ingestor.descarregar(incluir_resto=fim)
+        lotes, dispositivo.lotes = dispositivo.lotes, []
+        for lote in lotes:
+            if dispositivo.fila.full():
+                # Backpressure: a conexão deixa de ser lida até haver espaço
+                dispositivo.esperas += 1
+            await dispositivo.fila.put(lote)
+            dispositivo.recebidas += len(lote[1])
+            self.recebidas.registrar(len(lote[1]))
+            self._prontos.set()
+
+    # ---- gravação ----
+    def _coletar(self):
+        tempos, matrizes, servidores, filas = [], [], [], []
+        total = 0
+        for dispositivo in list(self.dispositivos.values()):
+            while total < self.lote_maximo and not dispositivo.fila.empty():
+                tempo, matriz = dispositivo.fila.get_nowait()
+                tempos.append(tempo)
+                matrizes.append(matriz)
+                servidores.append(np.full(len(tempo), dispositivo.cd_servidor, dtype=np.int64))
+                filas.append(dispositivo.fila)
+                total += len(tempo)
+        return tempos, matrizes, servidores, filas
+
+    def _gravar(self, tempo, matriz, servidores):
+        aceitas = len(tempo)
+        if self.banco is not None:
+            aceitas = self.banco.inserir_leituras(
+                tempo, {col: matriz[:, j] for j, col in enumerate(CAMPOS_LOG)}, servidores
+            )
+        # O lote já foi gravado: falhas dos ouvintes (regras, alertas) não
+        # contam como falha de gravação
+        for ouvinte in self.ouvintes:
+            try:
+                ouvinte(tempo, matriz, servidores)
+            except Exception as erro:
+                self.falhas_ouvintes += 1
+                print(f'Falha no ouvinte {type(ouvinte).__name__}: {erro}', file=sys.stderr)
+        return aceitas
+
+    async def _gravador(self):
+        while True:
+            await self._prontos.wait()
+            self._prontos.clear()
+            # Micro-lote: espera `intervalo` para juntar blocos de várias placas
+            await asyncio.sleep(self.intervalo)
+            while True:
+                tempos, matrizes, servidores, filas = self._coletar()
+                if not tempos:
+                    break
+                tempo, matriz = np.concatenate(tempos), np.concatenate(matrizes)
+                inicio = time.perf_counter()
+                try:
+                    aceitas = await asyncio.to_thread(self._gravar, tempo, matriz, np.concatenate(servidores))
+                    self.gravadas.registrar(aceitas)
+                    # Mesma placa e mesmo carimbo de uma leitura já gravada (reenvio)
+                    self.ignoradas += len(tempo) - aceitas
+                except Exception as erro:
+                    # O lote é perdido, mas o gateway continua atendendo as placas
+                    self.falhas += 1
+                    print(f'Falha ao gravar {len(tempo)} leituras: {erro}', file=sys.stderr)
+                self.duracao_ultima_gravacao = time.perf_counter() - inicio
+                for fila in filas:
+                    fila.task_done()
+
+    def metricas(self):
+        return {
+            'dispositivos': len(self.dispositivos),
+            'leituras_recebidas': self.recebidas.total,
+            'leituras_gravadas': self.gravadas.total,
+            'leituras_ignoradas': self.ignoradas,
+            'taxa_recebimento': self.recebidas.taxa(),
+            'taxa_gravacao': self.gravadas.taxa(),
+            'duracao_ultima_gravacao': self.duracao_ultima_gravacao,
+            'falhas_gravacao': self.falhas,
+            'falhas_ouvintes': self.falhas_ouvintes,
+            'conexoes_recusadas': self.recusadas,
+            'profundidade_total': sum(d.fila.qsize() for d in self.dispositivos.values()),
+            'profundidade_maxima': self.profundidade,
+            'filas': {
+                str(d.cd_servidor): {'profundidade': d.fila.qsize(), 'recebidas': d.recebidas, 'esperas': d.esperas}
+                for d in self.dispositivos.values()
+            },
+            'tempo_ativo': time.time() - self.inicio,
+        }
+
+    async def _atender_metricas(self, leitor, escritor):
+        requisicao = await leitor.readline()
+        while (await leitor.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        if requisicao.split(b' ')[1:2] == [b'/metricas']:
+            corpo, status = json.dumps(self.metricas()).encode(), b'200 OK'
+        else:
+            corpo, status = b'{}', b'404 Not Found'
+        escritor.write(
+            b'HTTP/1.1 ' + status + b'\r\nContent-Type: application/json\r\n'
+            b'Content-Length: ' + str(len(corpo)).encode() + b'\r\nConnection: close\r\n\r\n' + corpo
+        )
+        await escritor.drain()
+        escritor.close()
+
+    async def servir(self, host='0.0.0.0', porta=9000, porta_metricas=None, pronto=None):
+        """Executa o gateway até ser cancelado."""
+        self._prontos = asyncio.Event()
+        gravador = asyncio.create_task(self._gravador())
+        servidores = [await asyncio.start_server(self._atender, host, porta)]
+        if porta_metricas is not None:
+            servidores.append(await asyncio.start_server(self._atender_metricas, host, porta_metricas))
+        if pronto is not None:
+            pronto.set()
+        try:
+            await asyncio.gather(*(s.serve_forever() for s in servidores))
+        finally:
+            gravador.cancel()
+            for s in servidores:
+                s.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gateway TCP das placas de sensores.')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--porta', type=int, default=9000)
+    parser.add_argument('--porta-metricas', type=int, default=9001)
+    parser.add_argument('--banco', default=CAMINHO_BANCO)
+    parser.add_argument('--profundidade', type=int, default=64, help='blocos por fila de placa')
+    parser.add_argument('--lote-maximo', type=int, default=50_000, help='leituras por transação')
+    parser.add_argument('--intervalo', type=float, default=0.2, help='espera do micro-lote, em segundos')
+    parser.add_argument('--sem-banco', action='store_true', help='apenas conta as leituras')
+    parser.add_argument('--alertas', action='store_true', help='avalia as regras de alerta e dispara pela API')
+    parser.add_argument('--regras', help='arquivo JSON com as regras (padrão: regras da página do sensor)')
+    args = parser.parse_args()
+
+    gateway = GatewaySensores(
+        None if args.sem_banco else BancoSensores(args.banco),
+        profundidade=args.profundidade,
+        lote_maximo=args.lote_maximo,
+        intervalo=args.intervalo
+    )
+    if args.alertas:
+        regras = carregar_regras(args.regras) if args.regras else REGRAS_PADRAO
+        gateway.ouvintes.append(MotorRegras(regras, despachar=cliente_alertas().enviar))
+    try:
+        asyncio.run(gateway.servir(args.host, args.porta, args.porta_metricas))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
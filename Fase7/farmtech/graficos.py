@@ -0,0 +1,143 @@
+# graficos.py
+# Redução de pontos para os gráficos temporais.
+#
+# Em vez de enviar cada leitura ao navegador, cada série é reduzida no
+# servidor para um número limitado de pontos: primeiro por min/max em
+# baldes (totalmente vetorizado) e depois pelo LTTB (Largest-Triangle-
+# Three-Buckets), que preserva a forma visual da curva.
+import numpy as np
+
+from farmtech.configuracao import COLUNA_TEMPO
+
+# Pontos por gráfico enviados ao navegador
+MAX_PONTOS_GRAFICO = 2000
+
+# Acima deste número de linhas, dispersões viram mapas de densidade
+LIMITE_PONTOS_DISPERSAO = 5000
+
+
+def reduzir_minmax(x, y, n_baldes):
+    """Mantém o mínimo e o máximo de cada balde, além das extremidades."""
+    n = len(y)
+    if n <= 2 * n_baldes:
+        return np.arange(n)
+
+    # Baldes de tamanho fixo: a série vira uma matriz (baldes x tamanho)
+    tamanho = -(-n // n_baldes)
+    n_baldes = -(-n // tamanho)
+    sobra = n_baldes * tamanho - n
+    matriz = np.empty(n_baldes * tamanho, dtype=np.float64)
+    matriz[:n] = y
+    matriz[n:] = np.inf
+    matriz = matriz.reshape(n_baldes, tamanho)
+
+    base = np.arange(n_baldes) * tamanho
+    idx_min = base + matriz.argmin(axis=1)
+    if sobra:
+        matriz[-1, tamanho - sobra:] = -np.inf
+    idx_max = base + matriz.argmax(axis=1)
+    return np.unique(np.concatenate([[0, n - 1], idx_min, idx_max]))
+
+
+def reduzir_lttb(x, y, n_pontos):
+    """Índices escolhidos pelo LTTB, incluindo o primeiro e o último ponto."""
+    n = len(y)
+    if n <= n_pontos or n_pontos < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    limites = np.linspace(1, n - 1, n_pontos - 1).astype(np.int64)
+
+    escolhidos = np.empty(n_pontos, dtype=np.int64)
+    escolhidos[0], escolhidos[-1] = 0, n - 1
+    anterior = 0
+    for i in range(n_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        # Média do próximo balde (ou o último ponto)
+        prox_inicio, prox_fim = fim, limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[prox_inicio:prox_fim].mean()
+        media_y = y[prox_inicio:prox_fim].mean()
+
+        # Ponto do balde atual que forma o maior triângulo
+        area = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(area))
+        escolhidos[i + 1] = anterior
+    return escolhidos
+
+
+def reduzir_serie(x, y, max_pontos=MAX_PONTOS_GRAFICO):
+    """Índices de no máximo `max_pontos` pontos representativos da série."""
+    n = len(y)
+    if n <= max_pontos:
+        return np.arange(n)
+    # Pré-filtro min/max limita o custo do LTTB a O(max_pontos)
+    pre = reduzir_minmax(x, y, 2 * max_pontos)
+    return pre[reduzir_lttb(x[pre], y[pre], max_pontos)]
+
+
+def janela_temporal(df, inicio=None, fim=None, coluna_tempo=COLUNA_TEMPO):
+    """Recorte (inclusivo) de um DataFrame ordenado pelo tempo, via busca binária."""
+    tempo = df[coluna_tempo].to_numpy()
+    a = 0 if inicio is None else int(np.searchsorted(tempo, np.datetime64(inicio, 'ns'), side='left'))
+    b = len(df) if fim is None else int(np.searchsorted(tempo, np.datetime64(fim, 'ns'), side='right'))
+    return df.iloc[a:b]
+
+
+# -----------------------------------------------------------
+# Agregados para histogramas, box-plots e densidade 2D
+# -----------------------------------------------------------
+def histograma_agregado(valores, nbins=30):
+    """Contagens e bordas dos bins, ignorando valores ausentes."""
+    valores = np.asarray(valores, dtype=np.float64)
+    valores = valores[np.isfinite(valores)]
+    return np.histogram(valores, bins=nbins)
+
+
+def resumo_boxplot(valores):
+    """Quantis e cercas (1,5 x IQR) no formato aceito pelo go.Box."""
+    valores = np.asarray(valores, dtype=np.float64)
+    valores = valores[np.isfinite(valores)]
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    iqr = q3 - q1
+    dentro = valores[(valores >= q1 - 1.5 * iqr) & (valores <= q3 + 1.5 * iqr)]
+    return {
+        'q1': q1,
+        'median': mediana,
+        'q3': q3,
+        'lowerfence': dentro.min(),
+        'upperfence': dentro.max(),
+    }
+
+
+def densidade_2d(x, y, nbins=60, cor=None):
+    """Grade de contagens (e média de `cor` por célula) para mapas de densidade.
+
+    Retorna (contagens, media_cor, bordas_x, bordas_y); as matrizes têm o eixo
+    y nas linhas, como o go.Heatmap espera. Células vazias ficam como NaN.
+    Linhas com x, y ou `cor` ausentes (ou infinitos) são ignoradas.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finitos = np.isfinite(x) & np.isfinite(y)
+    if cor is not None:
+        cor = np.asarray(cor, dtype=np.float64)
+        finitos &= np.isfinite(cor)
+        cor = cor[finitos]
+    x, y = x[finitos], y[finitos]
+    contagens, bordas_x, bordas_y = np.histogram2d(x, y, bins=nbins)
+    media_cor = None
+    if cor is not None:
+        soma, _, _ = np.histogram2d(x, y, bins=[bordas_x, bordas_y], weights=cor)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media_cor = (soma / contagens).T
+    contagens = contagens.T
+    contagens[contagens == 0] = np.nan
+    return contagens, media_cor, bordas_x, bordas_y
+
+
+def centros(bordas):
+    return (bordas[:-1] + bordas[1:]) / 2
@@ -0,0 +1,294 @@
+# ingestao.py
+# Ingestão das linhas "log," emitidas pelo ESP32 no monitor serial.
+#
+# Formato (página "Funcionamento do Sensor"):
+#     log,68.32,92.14,5.89,23.55,35.7
+#     (fósforo, potássio, pH, temperatura, umidade)
+#
+# No lugar de "log" a placa pode enviar a data e hora da leitura
+# (ex.: 2025-06-19T10:00:00,68.32,...); as demais linhas são carimbadas
+# na chegada, um microssegundo após a anterior, para que leituras do mesmo
+# lote não colidam no índice único (servidor, data, hora) do banco.
+#
+# As linhas são lidas em blocos de texto, filtradas pelo prefixo e
+# convertidas de uma só vez com o parser em C do NumPy. Cada lote recebe
+# carimbo de tempo, perde as leituras repetidas (iguais à anterior do mesmo
+# dispositivo, como o próprio firmware faz) e é gravado em massa no banco.
+#
+# Uso pela linha de comando (a partir da pasta Fase7):
+#     python -m farmtech.ingestao monitor.log --intervalo 43min
+#     python -m farmtech.ingestao --serial /dev/ttyUSB0 --servidor 2
+#     cat monitor.log | python -m farmtech.ingestao -
+import argparse
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from farmtech.armazenamento import BancoSensores
+from farmtech.configuracao import CAMINHO_BANCO
+
+PREFIXO = 'log,'
+
+# Ordem dos campos na linha e colunas correspondentes do dataset
+CAMPOS_LOG = ['fosforo_mg_kg', 'potassio_mg_kg', 'ph', 'temperatura_c', 'umidade_percent']
+
+TAMANHO_BLOCO = 1 << 16
+
+
+# -----------------------------------------------------------
+# Conversão de linhas
+# -----------------------------------------------------------
+def _converter_linha(linha):
+    try:
+        valores = [float(campo) for campo in linha.split(',')]
+    except ValueError:
+        return None
+    return valores if len(valores) == len(CAMPOS_LOG) else None
+
+
+def _converter_tempos(prefixos):
+    """Carimbos do primeiro campo: NaT para "log", data/hora enviada pela placa nos demais.
+
+    Retorna (tempo, validas); prefixos que não são "log" nem data são inválidos.
+    """
+    tempo = np.full(len(prefixos), np.datetime64('NaT'), dtype='datetime64[ns]')
+    validas = np.ones(len(prefixos), dtype=bool)
+    datados = [i for i, prefixo in enumerate(prefixos) if prefixo != 'log']
+    if not datados:
+        return tempo, validas
+    try:
+        tempo[datados] = np.array([prefixos[i] for i in datados], dtype='datetime64[us]')
+    except ValueError:
+        for i in datados:
+            try:
+                tempo[i] = np.datetime64(prefixos[i], 'us')
+            except ValueError:
+                validas[i] = False
+    return tempo, validas
+
+
+def converter_linhas(linhas):
+    """Converte linhas do monitor serial em (tempo, matriz (n, 5) de float64).
+
+    O primeiro campo é "log" (tempo NaT, carimbado na chegada) ou a data e
+    hora da leitura (ex.: 2025-06-19T10:00:00), como no projeto real. Outras
+    linhas (cabeçalhos, textos do monitor) e linhas malformadas são ignoradas.
+    """
+    separadores = len(CAMPOS_LOG)
+    candidatas = [linha.strip() for linha in linhas if linha.count(',') == separadores]
+    if all(linha.startswith(PREFIXO) for linha in candidatas):
+        tempo = np.full(len(candidatas), np.datetime64('NaT'), dtype='datetime64[ns]')
+        campos = [linha[len(PREFIXO):] for linha in candidatas]
+    else:
+        prefixos = [linha[:linha.find(',')] for linha in candidatas]
+        tempo, validas = _converter_tempos(prefixos)
+        campos = [linha[len(p) + 1:] for linha, p, ok in zip(candidatas, prefixos, validas) if ok]
+        tempo = tempo[validas]
+    if not campos:
+        return tempo[:0], np.empty((0, len(CAMPOS_LOG)))
+
+    # Caminho rápido: todas as linhas têm 5 campos, então basta um parse
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        try:
+            valores = np.fromstring(','.join(campos), sep=',')
+            if valores.size == len(campos) * len(CAMPOS_LOG):
+                return tempo, valores.reshape(-1, len(CAMPOS_LOG))
+        except (ValueError, DeprecationWarning):
+            pass
+
+    # Algum campo não numérico: converte linha a linha, descartando as inválidas
+    convertidas = [_converter_linha(c) for c in campos]
+    ok = np.array([v is not None for v in convertidas], dtype=bool)
+    matriz = np.array([v for v in convertidas if v is not None], dtype=np.float64)
+    return tempo[ok], matriz.reshape(-1, len(CAMPOS_LOG))
+
+
+def remover_repetidas(matriz, anterior=None):
+    """Máscara das leituras diferentes da leitura imediatamente anterior."""
+    if len(matriz) == 0:
+        return np.zeros(0, dtype=bool)
+    mudou = np.empty(len(matriz), dtype=bool)
+    mudou[0] = anterior is None or bool(np.any(matriz[0] != anterior))
+    np.any(matriz[1:] != matriz[:-1], axis=1, out=mudou[1:])
+    return mudou
+
+
+# -----------------------------------------------------------
+# Ingestor
+# -----------------------------------------------------------
+class IngestorLog:
+    """Converte texto do monitor serial em lotes gravados no banco.
+
+    Leituras sem data (linhas "log,") são carimbadas com o horário de chegada
+    do lote, avançando um microssegundo por leitura: os carimbos do ingestor
+    são sempre crescentes. Para reprocessar um log gravado, `intervalo`
+    (ex.: '43min') e `inicio` geram carimbos espaçados a partir de `inicio`.
+    `ouvintes` recebem (tempo, matriz, cd_servidor) após cada gravação.
+    """
+
+    def __init__(self, banco=None, cd_servidor=1, intervalo=None, inicio=None,
+                 tamanho_lote=10_000, descartar_repetidas=True, ouvintes=None, relogio=time.time):
+        self.banco = banco
+        self.cd_servidor = cd_servidor
+        self.intervalo = None if intervalo is None else np.timedelta64(pd.Timedelta(intervalo).value, 'ns')
+        self._proximo = None if inicio is None else np.datetime64(pd.Timestamp(inicio), 'ns')
+        self._ultimo = None
+        self.tamanho_lote = tamanho_lote
+        self.descartar_repetidas = descartar_repetidas
+        self.ouvintes = list(ouvintes or [])
+        self.relogio = relogio
+        self._resto = ''
+        self._pendentes = []
+        self._anterior = None
+        self._descarregado_em = time.monotonic()
+        self.lidas = 0
+        self.gravadas = 0
+
+    def _carimbar(self, tempo):
+        """Preenche os carimbos NaT (linhas "log,") com o horário de chegada ou a cadência."""
+        faltantes = np.isnat(tempo)
+        n = int(faltantes.sum())
+        if n == 0:
+            return tempo
+        if self.intervalo is None:
+            chegada = np.datetime64(int(self.relogio() * 1e6), 'us')
+            if self._ultimo is not None:
+                chegada = max(chegada, self._ultimo + np.timedelta64(1, 'us'))
+            tempo[faltantes] = chegada + np.arange(n).astype('timedelta64[us]')
+            self._ultimo = tempo[faltantes][-1]
+            return tempo
+        if self._proximo is None:
+            self._proximo = np.datetime64(int(self.relogio()), 's').astype('datetime64[ns]')
+        tempo[faltantes] = self._proximo + np.arange(n) * self.intervalo
+        self._proximo = tempo[faltantes][-1] + self.intervalo
+        return tempo
+
+    def processar_texto(self, texto):
+        """Acrescenta um bloco de texto; linhas incompletas aguardam o próximo bloco."""
+        if isinstance(texto, bytes):
+            texto = texto.decode('utf-8', errors='replace')
+        linhas = (self._resto + texto).split('\n')
+        self._resto = linhas.pop()
+        self._pendentes.extend(linhas)
+        if len(self._pendentes) >= self.tamanho_lote:
+            self.descarregar()
+
+    def descarregar(self, incluir_resto=False):
+        """Converte e grava as linhas pendentes. Retorna o número gravado."""
+        if incluir_resto and self._resto:
+            self._pendentes.append(self._resto)
+            self._resto = ''
+        linhas, self._pendentes = self._pendentes, []
+        self._descarregado_em = time.monotonic()
+        tempo, matriz = converter_linhas(linhas)
+        self.lidas += len(matriz)
+        if len(matriz) == 0:
+            return 0
+
+        if self.descartar_repetidas:
+            mudou = remover_repetidas(matriz, self._anterior)
+            self._anterior = matriz[-1]
+            tempo, matriz = tempo[mudou], matriz[mudou]
+            if len(matriz) == 0:
+                return 0
+
+        tempo = self._carimbar(tempo)
+        aceitas = len(matriz)
+        if self.banco is not None:
+            # O banco ignora leituras do mesmo servidor com o mesmo carimbo
+            aceitas = self.banco.inserir_leituras(
+                tempo, {col: matriz[:, j] for j, col in enumerate(CAMPOS_LOG)}, self.cd_servidor
+            )
+        self.gravadas += aceitas
+        for ouvinte in self.ouvintes:
+            ouvinte(tempo, matriz, self.cd_servidor)
+        return aceitas
+
+    def consumir(self, fonte, tamanho_bloco=TAMANHO_BLOCO, seguir=False, espera=0.5):
+        """Lê `fonte` (arquivo, pipe ou porta serial) até o fim.
+
+        Com `seguir=True`, continua aguardando novos dados (como `tail -f`),
+        descarregando o lote pendente a cada pausa da fonte ou, se ela nunca
+        pausa, a cada `espera` segundos.
+        """
+        while True:
+            bloco = fonte.read(tamanho_bloco)
+            if bloco:
+                self.processar_texto(bloco)
+                if seguir and self._pendentes and time.monotonic() - self._descarregado_em >= espera:
+                    self.descarregar()
+                continue
+            self.descarregar(incluir_resto=not seguir)
+            if not seguir:
+                return self.gravadas
+            time.sleep(espera)
+
+
+# -----------------------------------------------------------
+# Fontes
+# -----------------------------------------------------------
+def abrir_serial(porta, baud=115200):
+    """Abre a porta serial do ESP32 (requer o pacote pyserial)."""
+    try:
+        import serial
+    except ImportError as erro:
+        raise RuntimeError('Leitura de porta serial requer o pacote pyserial (pip install pyserial).') from erro
+    return serial.Serial(porta, baudrate=baud, timeout=0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingestão das linhas "log," do ESP32.')
+    parser.add_argument('arquivo', nargs='?', help="arquivo de log ou '-' para a entrada padrão")
+    parser.add_argument('--serial', help='porta serial (ex.: /dev/ttyUSB0)')
+    parser.add_argument('--baud', type=int, default=115200)
+    parser.add_argument('--servidor', type=int, default=1, help='cd_servidor das leituras')
+    parser.add_argument('--banco', default=CAMINHO_BANCO)
+    parser.add_argument('--intervalo', help="espaçamento dos carimbos de um log gravado (ex.: '43min')")
+    parser.add_argument('--inicio', help='carimbo da primeira leitura quando --intervalo é usado')
+    parser.add_argument('--seguir', action='store_true', help='continua lendo o arquivo como tail -f')
+    parser.add_argument('--manter-repetidas', action='store_true')
+    parser.add_argument('--alertas', action='store_true', help='avalia as regras de alerta e dispara pela API')
+    parser.add_argument('--regras', help='arquivo JSON com as regras (padrão: regras da página do sensor)')
+    args = parser.parse_args()
+
+    if not args.arquivo and not args.serial:
+        parser.error('informe um arquivo, "-" ou --serial')
+
+    ingestor = IngestorLog(
+        BancoSensores(args.banco),
+        cd_servidor=args.servidor,
+        intervalo=args.intervalo,
+        inicio=args.inicio,
+        descartar_repetidas=not args.manter_repetidas
+    )
+    if args.alertas:
+        # Importados aqui: o motor de regras depende deste módulo
+        from farmtech.alertas import cliente_alertas
+        from farmtech.regras import REGRAS_PADRAO, MotorRegras, carregar_regras
+        regras = carregar_regras(args.regras) if args.regras else REGRAS_PADRAO
+        ingestor.ouvintes.append(MotorRegras(regras, despachar=cliente_alertas().enviar))
+
+    inicio = time.perf_counter()
+    try:
+        if args.serial:
+            ingestor.consumir(abrir_serial(args.serial, args.baud), seguir=True)
+        elif args.arquivo == '-':
+            ingestor.consumir(sys.stdin.buffer, seguir=False)
+        else:
+            with open(args.arquivo, 'rb') as fonte:
+                ingestor.consumir(fonte, seguir=args.seguir)
+    except KeyboardInterrupt:
+        ingestor.descarregar(incluir_resto=True)
+
+    segundos = time.perf_counter() - inicio
+    print(f'{ingestor.lidas} leituras lidas, {ingestor.gravadas} gravadas em {segundos:.2f}s')
+    if args.alertas:
+        cliente_alertas().aguardar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+# insumos.py
+# Cálculo de insumos da página "Calculadora de Insumos".
+#
+# A quantidade por aplicação é sqrt(área) x taxa da cultura / 1000 e o total
+# é a quantidade por aplicação vezes o número de aplicações. As taxas ficam
+# numa tabela por cultura (Batata e Morango por padrão), que pode ser
+# estendida com registrar_cultura ou lida de um CSV.
+#
+# Os registros da página ficam num banco SQLite (BancoInsumos) com IDs
+# estáveis; as quantidades são calculadas na exibição, só para a página
+# visível, a partir da área e da cultura de cada registro.
+import math
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from farmtech.configuracao import CAMINHO_INSUMOS
+
+# cultura -> (litros por metro, número de aplicações)
+TAXAS_PADRAO = {
+    'Batata': (5.0, 5),
+    'Morango': (2.5, 5),
+}
+
+taxas_culturas = dict(TAXAS_PADRAO)
+
+
+def registrar_cultura(nome, taxa, aplicacoes=5, taxas=None):
+    """Acrescenta (ou substitui) a taxa de uma cultura."""
+    (taxas_culturas if taxas is None else taxas)[nome] = (float(taxa), int(aplicacoes))
+
+
+def carregar_taxas(arquivo):
+    """Lê uma tabela de taxas (colunas cultura, taxa e, opcional, aplicacoes)."""
+    tabela = pd.read_csv(arquivo)
+    faltantes = [col for col in ('cultura', 'taxa') if col not in tabela.columns]
+    if faltantes:
+        raise ValueError(f"Colunas ausentes na tabela de taxas: {', '.join(faltantes)}")
+    if 'aplicacoes' not in tabela.columns:
+        tabela['aplicacoes'] = 5
+    return {
+        str(cultura): (float(taxa), int(aplicacoes))
+        for cultura, taxa, aplicacoes in tabela[['cultura', 'taxa', 'aplicacoes']].itertuples(index=False)
+    }
+
+
+def _sufixo(cultura):
+    return str(cultura).strip().lower().replace(' ', '_')
+
+
+def calcular_insumos(area, cultura, taxas=None):
+    """Registro de uma plantação com as quantidades de todas as culturas.
+
+    `cultura` é o código da página (1 = primeira cultura da tabela, 2 = segunda...).
+    """
+    taxas = taxas_culturas if taxas is None else taxas
+    registro = {"area": area, "cultura": cultura}
+    for nome, (taxa, aplicacoes) in taxas.items():
+        aplicacao = (math.sqrt(area) * taxa) / 1000
+        registro[f"quant_insumo_{_sufixo(nome)}"] = aplicacao * aplicacoes
+        registro[f"quant_aplicacao_{_sufixo(nome)}"] = aplicacao
+    return registro
+
+
+def calcular_insumos_lote(plantacoes, taxas=None):
+    """Calcula os insumos de todas as plantações de uma vez.
+
+    `plantacoes` tem a coluna `area` (m²) e, opcionalmente, `cultura` (nome
+    ou código). Retorna as colunas de aplicação e total de cada cultura da
+    tabela e, quando a cultura é informada, `quant_aplicacao` e
+    `quant_insumo` da cultura planejada em cada plantação.
+    """
+    taxas = taxas_culturas if taxas is None else taxas
+    if 'area' not in plantacoes.columns:
+        raise ValueError('A tabela precisa da coluna "area" (m²).')
+    nomes = list(taxas)
+    litros = np.array([taxas[n][0] for n in nomes])
+    aplicacoes = np.array([taxas[n][1] for n in nomes])
+
+    area = pd.to_numeric(plantacoes['area'], errors='coerce').to_numpy(np.float64)
+    area = np.where(area < 0, np.nan, area)
+    # Matriz plantações x culturas, em uma única operação
+    por_aplicacao = np.sqrt(area)[:, None] * litros[None, :] / 1000
+    total = por_aplicacao * aplicacoes[None, :]
+
+    resultado = {'area': area}
+    for j, nome in enumerate(nomes):
+        resultado[f'quant_insumo_{_sufixo(nome)}'] = total[:, j]
+        resultado[f'quant_aplicacao_{_sufixo(nome)}'] = por_aplicacao[:, j]
+    resultado = pd.DataFrame(resultado, index=plantacoes.index)
+
+    if 'cultura' in plantacoes.columns:
+        indice = indices_culturas(plantacoes['cultura'], nomes)
+        valida = indice >= 0
+        linhas = np.arange(len(area))
+        resultado.insert(1, 'cultura', pd.Categorical.from_codes(indice, nomes))
+        resultado['quant_aplicacao'] = np.where(valida, por_aplicacao[linhas, np.maximum(indice, 0)], np.nan)
+        resultado['quant_insumo'] = np.where(valida, total[linhas, np.maximum(indice, 0)], np.nan)
+    return resultado
+
+
+def indices_culturas(culturas, nomes):
+    """Posição de cada cultura (nome, sem diferenciar maiúsculas, ou código 1, 2...) na tabela; -1 se desconhecida."""
+    # Resolve apenas os valores distintos e depois expande para todas as linhas
+    codigos, distintos = pd.factorize(pd.Series(culturas), use_na_sentinel=True)
+    por_nome = pd.Index([_sufixo(n) for n in nomes]).get_indexer([_sufixo(c) for c in distintos])
+    numericos = pd.to_numeric(pd.Series(distintos, dtype=object), errors='coerce').to_numpy(np.float64)
+    # Só códigos inteiros: 1.5 não é a cultura 1
+    validos = (numericos >= 1) & (numericos <= len(nomes)) & (numericos == np.floor(numericos))
+    por_codigo = np.where(validos, np.nan_to_num(numericos) - 1, -1)
+    posicoes = np.where(np.isnan(numericos), por_nome, por_codigo).astype(np.intp)
+    return np.where(codigos >= 0, np.append(posicoes, -1)[codigos], -1)
+
+
+def resumo_por_cultura(resultado):
+    """Número de plantações, área e insumos totais por cultura planejada."""
+    return resultado.groupby('cultura', observed=False).agg(
+        plantacoes=('area', 'size'),
+        area_total=('area', 'sum'),
+        quant_aplicacao=('quant_aplicacao', 'sum'),
+        quant_insumo=('quant_insumo', 'sum'),
+    )
+
+
+# -----------------------------------------------------------
+# Registros persistentes
+# -----------------------------------------------------------
+ESQUEMA_INSUMOS = """
+CREATE TABLE IF NOT EXISTS insumos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    area REAL NOT NULL,
+    cultura TEXT NOT NULL,
+    criado_em TEXT NOT NULL DEFAULT (datetime('now')),
+    atualizado_em TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_insumos_cultura ON insumos (cultura);
+"""
+
+
+class BancoInsumos:
+    """Registros (área, cultura) com ID estável, compartilhados por todas as sessões.
+
+    Busca, atualização e remoção usam a chave primária; a listagem é
+    paginada pela chave (ID), não por deslocamento.
+    """
+
+    def __init__(self, caminho=CAMINHO_INSUMOS):
+        self.caminho = caminho
+        self._local = threading.local()
+        con = self._conexao()
+        with con:
+            con.executescript(ESQUEMA_INSUMOS)
+
+    def _conexao(self):
+        # Uma conexão por thread; WAL permite leituras durante as escritas
+        con = getattr(self._local, 'conexao', None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=30)
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexao = con
+        return con
+
+    def inserir(self, area, cultura):
+        con = self._conexao()
+        with con:
+            cursor = con.execute('INSERT INTO insumos (area, cultura) VALUES (?, ?)', (float(area), str(cultura)))
+        return cursor.lastrowid
+
+    def inserir_lote(self, plantacoes):
+        """Insere as linhas (area, cultura) de um DataFrame em uma transação."""
+        linhas = list(zip(
+            plantacoes['area'].astype(float).tolist(), plantacoes['cultura'].astype(str).tolist()
+        ))
+        con = self._conexao()
+        with con:
+            con.executemany('INSERT INTO insumos (area, cultura) VALUES (?, ?)', linhas)
+        return len(linhas)
+
+    def obter(self, id_registro):
+        linha = self._conexao().execute(
+            'SELECT id, area, cultura FROM insumos WHERE id = ?', (int(id_registro),)
+        ).fetchone()
+        return None if linha is None else {'id': linha[0], 'area': linha[1], 'cultura': linha[2]}
+
+    def atualizar(self, id_registro, area, cultura):
+        """Atualiza um registro pelo ID; retorna False se ele não existe."""
+        con = self._conexao()
+        with con:
+            cursor = con.execute(
+                "UPDATE insumos SET area = ?, cultura = ?, atualizado_em = datetime('now') WHERE id = ?",
+                (float(area), str(cultura), int(id_registro))
+            )
+        return cursor.rowcount > 0
+
+    def remover(self, id_registro):
+        """Remove um registro pelo ID; retorna False se ele não existe."""
+        con = self._conexao()
+        with con:
+            cursor = con.execute('DELETE FROM insumos WHERE id = ?', (int(id_registro),))
+        return cursor.rowcount > 0
+
+    def contar(self, cultura=None):
+        if cultura is None:
+            return self._conexao().execute('SELECT COUNT(*) FROM insumos').fetchone()[0]
+        return self._conexao().execute(
+            'SELECT COUNT(*) FROM insumos WHERE cultura = ?', (str(cultura),)
+        ).fetchone()[0]
+
+    def pagina(self, depois_de=0, tamanho=50, cultura=None):
+        """Até `tamanho` registros com ID maior que `depois_de`, em ordem de ID.
+
+        Paginação por chave: a página seguinte começa depois do último ID da
+        atual, pela chave primária, sem percorrer as páginas anteriores como
+        faria um OFFSET.
+        """
+        condicoes, parametros = ['id > ?'], [int(depois_de)]
+        if cultura is not None:
+            condicoes.append('cultura = ?')
+            parametros.append(str(cultura))
+        return pd.read_sql_query(
+            f"SELECT id, area, cultura FROM insumos WHERE {' AND '.join(condicoes)} ORDER BY id LIMIT ?",
+            self._conexao(), params=parametros + [int(tamanho)]
+        )
+
+
+_banco_insumos = None
+_lock_banco = threading.Lock()
+
+
+def banco_insumos():
+    """Banco de registros compartilhado entre as sessões do Streamlit."""
+    global _banco_insumos
+    with _lock_banco:
+        if _banco_insumos is None:
+            _banco_insumos = BancoInsumos()
+        return _banco_insumos
@@ -0,0 +1,28 @@
+# metricas.py
+# Medidores compartilhados pelos serviços (gateway de sensores e serviço de
+# previsão), sem dependências além da biblioteca padrão.
+import time
+from collections import deque
+
+
+class MedidorTaxa:
+    """Taxa (eventos por segundo) numa janela deslizante de `janela` segundos."""
+
+    def __init__(self, janela=10.0):
+        self.janela = janela
+        self.eventos = deque()
+        self.total = 0
+
+    def registrar(self, quantidade, agora=None):
+        agora = time.monotonic() if agora is None else agora
+        self.eventos.append((agora, quantidade))
+        self.total += quantidade
+        self._descartar(agora)
+
+    def _descartar(self, agora):
+        while self.eventos and self.eventos[0][0] < agora - self.janela:
+            self.eventos.popleft()
+
+    def taxa(self):
+        self._descartar(time.monotonic())
+        return sum(q for _, q in self.eventos) / self.janela
@@ -0,0 +1,238 @@
+# modelos.py
+# Registro de modelos treinados na página de Modelagem Preditiva.
+#
+# Cada modelo é identificado por uma impressão digital das linhas filtradas,
+# da variável alvo, das features e dos hiperparâmetros. Os modelos ficam em
+# um cache LRU em memória e, ao serem descartados dele, são gravados em disco
+# com joblib para serem reaproveitados depois.
+#
+# Entradas podem declarar uma `familia` (mesmos dados e hiperparâmetros,
+# exceto o tamanho do ensemble) e um `tamanho`, permitindo que um modelo em
+# memória sirva de base para treinar outro da mesma família.
+#
+# Modelos também podem ser publicados com um nome em DIRETORIO_PUBLICADOS,
+# de onde o serviço de previsão (servico.py) os carrega.
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+import pandas as pd
+
+from farmtech.configuracao import DIRETORIO_CACHE, DIRETORIO_PUBLICADOS
+
+DIRETORIO_MODELOS = os.path.join(DIRETORIO_CACHE, 'modelos')
+
+
+# -----------------------------------------------------------
+# Impressão digital do treino
+# -----------------------------------------------------------
+def impressao_recorte(X, y):
+    """Hash estável das linhas usadas no treino (a parte cara da impressão)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(X, index=True).to_numpy().tobytes())
+    h.update(pd.util.hash_pandas_object(y, index=True).to_numpy().tobytes())
+    h.update(json.dumps(list(X.columns)).encode())
+    h.update(str(y.name).encode())
+    return h.hexdigest()
+
+
+def impressao_parametros(recorte, **parametros):
+    """Impressão de um recorte (impressao_recorte) com os parâmetros do modelo."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(recorte.encode())
+    h.update(json.dumps(parametros, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def impressao_digital(X, y, **parametros):
+    """Hash estável das linhas usadas no treino e dos parâmetros do modelo."""
+    return impressao_parametros(impressao_recorte(X, y), **parametros)
+
+
+def tamanhos_divisao(n_amostras, test_size):
+    """Tamanhos de treino e teste que o train_test_split irá gerar."""
+    n_teste = math.ceil(test_size * n_amostras)
+    return n_amostras - n_teste, n_teste
+
+
+# -----------------------------------------------------------
+# Registro LRU com descarte para disco
+# -----------------------------------------------------------
+class RegistroModelos:
+    def __init__(self, capacidade=8, diretorio=DIRETORIO_MODELOS, limite_disco=64):
+        self.capacidade = capacidade
+        self.diretorio = diretorio
+        self.limite_disco = limite_disco
+        self._memoria = OrderedDict()
+        self._familias = {}
+        self._lock = threading.Lock()
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f'{chave}.joblib')
+
+    def obter(self, chave):
+        """Retorna o modelo registrado para a chave ou None."""
+        with self._lock:
+            entrada = self._memoria.get(chave)
+            if entrada is not None:
+                self._memoria.move_to_end(chave)
+                return entrada
+
+        caminho = self._caminho(chave)
+        if not os.path.exists(caminho):
+            return None
+        try:
+            entrada = joblib.load(caminho)
+        except Exception:
+            return None
+        self.guardar(chave, entrada)
+        return entrada
+
+    def obter_base(self, familia, tamanho):
+        """Entrada em memória da mesma família mais barata de adaptar.
+
+        Prefere o menor modelo com pelo menos `tamanho` elementos (basta
+        recortá-lo); senão, o maior modelo menor (basta completá-lo).
+        """
+        with self._lock:
+            candidatas = [self._memoria[chave] for chave in self._familias.get(familia, ())]
+        maiores = [e for e in candidatas if e['tamanho'] >= tamanho]
+        if maiores:
+            return min(maiores, key=lambda e: e['tamanho'])
+        return max(candidatas, key=lambda e: e['tamanho'], default=None)
+
+    def guardar(self, chave, entrada):
+        with self._lock:
+            self._memoria[chave] = entrada
+            self._memoria.move_to_end(chave)
+            if isinstance(entrada, dict) and entrada.get('familia') is not None:
+                self._familias.setdefault(entrada['familia'], set()).add(chave)
+            descartados = []
+            while len(self._memoria) > self.capacidade:
+                descartados.append(self._memoria.popitem(last=False))
+            for chave_antiga, entrada_antiga in descartados:
+                if isinstance(entrada_antiga, dict) and entrada_antiga.get('familia') is not None:
+                    chaves = self._familias.get(entrada_antiga['familia'], set())
+                    chaves.discard(chave_antiga)
+                    if not chaves:
+                        self._familias.pop(entrada_antiga['familia'], None)
+
+        for chave_antiga, entrada_antiga in descartados:
+            self._gravar_em_disco(chave_antiga, entrada_antiga)
+
+    def _gravar_em_disco(self, chave, entrada):
+        caminho = self._caminho(chave)
+        if os.path.exists(caminho):
+            return
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            temporario = caminho + '.tmp'
+            joblib.dump(entrada, temporario)
+            os.replace(temporario, caminho)
+            self._limpar_disco()
+        except OSError:
+            pass
+
+    def _limpar_disco(self):
+        arquivos = [
+            os.path.join(self.diretorio, nome)
+            for nome in os.listdir(self.diretorio)
+            if nome.endswith('.joblib')
+        ]
+        if len(arquivos) <= self.limite_disco:
+            return
+        arquivos.sort(key=os.path.getmtime)
+        for caminho in arquivos[:len(arquivos) - self.limite_disco]:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+
+
+# Registro compartilhado entre sessões e reruns do Streamlit
+registro_modelos = RegistroModelos()
+
+
+# -----------------------------------------------------------
+# Modelos publicados para o serviço de previsão
+# -----------------------------------------------------------
+NOME_PUBLICADO = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+
+def publicar_modelo(nome, modelo, features, alvo, tipo, metricas=None, diretorio=DIRETORIO_PUBLICADOS):
+    """Grava o modelo e seus metadados com `nome`, substituindo o anterior.
+
+    Florestas compiladas vão no formato .floresta (abertas com mmap pelo
+    serviço); os demais modelos, com joblib. O JSON de metadados é gravado
+    por último, de modo que o serviço nunca vê um modelo pela metade.
+    """
+    if not NOME_PUBLICADO.fullmatch(nome):
+        raise ValueError('Use apenas letras, números, "_" e "-" no nome do modelo (até 64 caracteres).')
+    os.makedirs(diretorio, exist_ok=True)
+    extensao = 'floresta' if hasattr(modelo, 'salvar') else 'joblib'
+    arquivo = f'{nome}.{extensao}'
+    temporario = os.path.join(diretorio, arquivo + '.tmp')
+    if extensao == 'floresta':
+        modelo.salvar(temporario)
+    else:
+        joblib.dump(modelo, temporario)
+    # Substituir o arquivo não afeta quem ainda tem a versão anterior aberta
+    os.replace(temporario, os.path.join(diretorio, arquivo))
+
+    metadados = {
+        'nome': nome,
+        'tipo': tipo,
+        'alvo': alvo,
+        'features': list(features),
+        'metricas': {chave: float(valor) for chave, valor in (metricas or {}).items()},
+        'arquivo': arquivo,
+        'publicado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    caminho = os.path.join(diretorio, f'{nome}.json')
+    with open(caminho + '.tmp', 'w') as f:
+        json.dump(metadados, f, indent=2)
+    os.replace(caminho + '.tmp', caminho)
+    for outra in ('floresta', 'joblib'):
+        if outra != extensao and os.path.exists(os.path.join(diretorio, f'{nome}.{outra}')):
+            os.remove(os.path.join(diretorio, f'{nome}.{outra}'))
+    return metadados
+
+
+def modelos_publicados(diretorio=DIRETORIO_PUBLICADOS):
+    """Metadados de todos os modelos publicados, por nome."""
+    publicados = {}
+    if not os.path.isdir(diretorio):
+        return publicados
+    for arquivo in sorted(os.listdir(diretorio)):
+        if arquivo.endswith('.json'):
+            try:
+                with open(os.path.join(diretorio, arquivo)) as f:
+                    metadados = json.load(f)
+            except (OSError, ValueError):
+                continue
+            publicados[metadados['nome']] = metadados
+    return publicados
+
+
+def carregar_publicado(nome, diretorio=DIRETORIO_PUBLICADOS):
+    """(modelo, metadados) de um modelo publicado; KeyError se não existir."""
+    if not NOME_PUBLICADO.fullmatch(nome):
+        raise KeyError(nome)
+    try:
+        with open(os.path.join(diretorio, f'{nome}.json')) as f:
+            metadados = json.load(f)
+    except FileNotFoundError:
+        raise KeyError(nome) from None
+    caminho = os.path.join(diretorio, metadados['arquivo'])
+    if caminho.endswith('.floresta'):
+        from farmtech.compilacao import carregar_floresta
+        modelo = carregar_floresta(caminho)
+    else:
+        modelo = joblib.load(caminho)
+    return modelo, metadados
@@ -0,0 +1,68 @@
+# previsao.py
+# Previsão em lote com o modelo treinado na página de Modelagem Preditiva.
+#
+# As linhas são pontuadas em blocos vetorizados de até TAMANHO_LOTE_PREVISAO
+# linhas, seja a partir de um DataFrame, de um CSV (lido em chunks, sem
+# carregar o arquivo inteiro) ou de um fluxo de leituras de sensores.
+import numpy as np
+import pandas as pd
+
+TAMANHO_LOTE_PREVISAO = 100_000
+
+
+def _matriz_features(df, features):
+    faltantes = [col for col in features if col not in df.columns]
+    if faltantes:
+        raise ValueError(f"Colunas ausentes para a previsão: {', '.join(faltantes)}")
+    return df[features].to_numpy(np.float64)
+
+
+def prever_dataframe(modelo, df, features, tamanho_lote=TAMANHO_LOTE_PREVISAO):
+    """Previsões para todas as linhas de `df`, em blocos de `tamanho_lote`."""
+    X = _matriz_features(df, features)
+    previsoes = np.empty(len(X), dtype=np.float64)
+    for inicio in range(0, len(X), tamanho_lote):
+        previsoes[inicio:inicio + tamanho_lote] = modelo.predict(X[inicio:inicio + tamanho_lote])
+    return previsoes
+
+
+def prever_fluxo(modelo, fluxo, features, coluna_saida='previsao', tamanho_lote=TAMANHO_LOTE_PREVISAO):
+    """Pontua um fluxo de leituras, gerando DataFrames com a coluna de previsão.
+
+    `fluxo` pode conter DataFrames (ex.: chunks de um CSV) ou dicionários com
+    uma leitura cada; leituras avulsas são acumuladas até formar um lote.
+    """
+    pendentes = []
+
+    def _pontuar(bloco):
+        bloco = bloco.copy()
+        bloco[coluna_saida] = prever_dataframe(modelo, bloco, features, tamanho_lote)
+        return bloco
+
+    for item in fluxo:
+        if isinstance(item, pd.DataFrame):
+            if pendentes:
+                yield _pontuar(pd.DataFrame(pendentes))
+                pendentes = []
+            yield _pontuar(item)
+        else:
+            pendentes.append(item)
+            if len(pendentes) >= tamanho_lote:
+                yield _pontuar(pd.DataFrame(pendentes))
+                pendentes = []
+
+    if pendentes:
+        yield _pontuar(pd.DataFrame(pendentes))
+
+
+def pontuar_csv(modelo, entrada, saida, features, coluna_saida='previsao',
+                tamanho_lote=TAMANHO_LOTE_PREVISAO, progresso=None):
+    """Lê `entrada` em chunks, grava o CSV pontuado em `saida` e retorna o total de linhas."""
+    total = 0
+    chunks = pd.read_csv(entrada, chunksize=tamanho_lote)
+    for i, bloco in enumerate(prever_fluxo(modelo, chunks, features, coluna_saida, tamanho_lote)):
+        bloco.to_csv(saida, header=(i == 0), index=False)
+        total += len(bloco)
+        if progresso is not None:
+            progresso(total)
+    return total
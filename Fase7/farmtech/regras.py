@@ -0,0 +1,251 @@
+# regras.py
+# Motor de regras de alerta avaliado sobre cada lote de leituras ingerido.
+#
+# As regras são compiladas em arrays (coluna, tipo, operador, limite...) e
+# avaliadas juntas: cada lote vira uma matriz (linhas x regras) de
+# condições, sem laços por linha em Python. Um alerta dispara apenas na
+# transição falso -> verdadeiro da condição, por placa e regra, e respeita
+# o intervalo mínimo (`cooldown`) desde o último disparo.
+#
+# Tipos de regra (campo "tipo"):
+#     limite    valor da leitura comparado com "valor"
+#     desvio    |leitura - "alvo"| comparado com "valor" (tolerância, como o fabs() do pH)
+#     variacao  |leitura - leitura anterior da placa| comparado com "valor"
+#     media     média das últimas "janela" leituras da placa comparada com "valor"
+import json
+
+import numpy as np
+
+from farmtech.ingestao import CAMPOS_LOG
+
+OPERADORES = {'<': (-1, True), '<=': (-1, False), '>': (1, True), '>=': (1, False)}
+TIPOS = ['limite', 'desvio', 'variacao', 'media']
+
+# Regras da lógica documentada na página "Funcionamento do Sensor"
+REGRAS_PADRAO = [
+    {'nome': 'umidade_baixa', 'coluna': 'umidade_percent', 'tipo': 'limite', 'operador': '<', 'valor': 40,
+     'mensagem': 'Placa {cd_servidor}: umidade em {valor:.1f}% (abaixo de 40%), bomba de irrigação ligada.'},
+    {'nome': 'ph_fora_da_faixa', 'coluna': 'ph', 'tipo': 'desvio', 'alvo': 6.5, 'operador': '>', 'valor': 1.0,
+     'mensagem': 'Placa {cd_servidor}: pH {leitura:.2f} fora da faixa 5,5 a 7,5.'},
+    {'nome': 'temperatura_salto', 'coluna': 'temperatura_c', 'tipo': 'variacao', 'operador': '>', 'valor': 5,
+     'mensagem': 'Placa {cd_servidor}: temperatura variou {valor:.1f} °C entre duas leituras.'},
+    {'nome': 'umidade_media_baixa', 'coluna': 'umidade_percent', 'tipo': 'media', 'janela': 10,
+     'operador': '<', 'valor': 35, 'cooldown': 3600,
+     'mensagem': 'Placa {cd_servidor}: umidade média das últimas 10 leituras em {valor:.1f}%.'},
+]
+
+COOLDOWN_PADRAO = 300
+MENSAGEM_PADRAO = 'Placa {cd_servidor}: regra {regra} disparada ({coluna} = {leitura:.2f}).'
+
+# Limite de células (linhas x regras) avaliadas de uma vez
+MAX_CELULAS = 4_000_000
+
+
+def carregar_regras(caminho):
+    """Lê uma lista de regras de um arquivo JSON."""
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compilar_regras(regras, colunas=CAMPOS_LOG):
+    """Converte a lista de regras em arrays para a avaliação vetorizada."""
+    colunas = list(colunas)
+    for regra in regras:
+        if regra['coluna'] not in colunas:
+            raise ValueError(f"Regra {regra.get('nome')}: coluna desconhecida {regra['coluna']}")
+        if regra.get('tipo', 'limite') not in TIPOS:
+            raise ValueError(f"Regra {regra.get('nome')}: tipo desconhecido {regra['tipo']}")
+        if regra['operador'] not in OPERADORES:
+            raise ValueError(f"Regra {regra.get('nome')}: operador desconhecido {regra['operador']}")
+    return {
+        'nome': [regra.get('nome', f'regra_{i}') for i, regra in enumerate(regras)],
+        'mensagem': [regra.get('mensagem') for regra in regras],
+        'coluna': np.array([colunas.index(regra['coluna']) for regra in regras], dtype=np.intp),
+        'tipo': np.array([TIPOS.index(regra.get('tipo', 'limite')) for regra in regras], dtype=np.intp),
+        'sinal': np.array([OPERADORES[regra['operador']][0] for regra in regras], dtype=np.float64),
+        'estrito': np.array([OPERADORES[regra['operador']][1] for regra in regras], dtype=bool),
+        'valor': np.array([regra['valor'] for regra in regras], dtype=np.float64),
+        'alvo': np.array([regra.get('alvo', 0.0) for regra in regras], dtype=np.float64),
+        'janela': np.array([regra.get('janela', 1) for regra in regras], dtype=np.intp),
+        'cooldown': np.array(
+            [int(regra.get('cooldown', COOLDOWN_PADRAO) * 1e9) for regra in regras], dtype=np.int64
+        ),
+    }
+
+
+class MotorRegras:
+    """Avalia as regras por lote e entrega os alertas a `despachar`.
+
+    Pode ser usado diretamente como ouvinte do IngestorLog ou do
+    GatewaySensores: recebe (tempo, matriz, cd_servidor), com as colunas da
+    matriz na ordem de `colunas`. `despachar` recebe o texto de cada alerta
+    (ex.: `cliente_alertas().enviar`).
+    """
+
+    def __init__(self, regras=REGRAS_PADRAO, despachar=None, colunas=CAMPOS_LOG):
+        self.colunas = list(colunas)
+        self.regras = compilar_regras(regras, self.colunas)
+        self.despachar = despachar
+        self.janela_maxima = max(int(self.regras['janela'].max(initial=1)), 1)
+        self.disparos = 0
+
+        # Estado por placa, em arrays indexados pelo slot da placa
+        k, r = len(self.colunas), len(self.regras['nome'])
+        self._slots = {}
+        self._anterior = np.full((0, k), np.nan)
+        self._cauda = np.full((0, self.janela_maxima - 1, k), np.nan)
+        self._ativo = np.zeros((0, r), dtype=bool)
+        self._ultimo = np.zeros((0, r), dtype=np.int64)
+
+    def __call__(self, tempo, matriz, cd_servidor):
+        return self.avaliar(tempo, matriz, cd_servidor)
+
+    def _obter_slots(self, placas):
+        novos = [p for p in placas.tolist() if p not in self._slots]
+        if novos:
+            for placa in novos:
+                self._slots[placa] = len(self._slots)
+            extra = len(novos)
+            k, r = self._anterior.shape[1], self._ativo.shape[1]
+            self._anterior = np.vstack([self._anterior, np.full((extra, k), np.nan)])
+            self._cauda = np.concatenate([self._cauda, np.full((extra,) + self._cauda.shape[1:], np.nan)])
+            self._ativo = np.vstack([self._ativo, np.zeros((extra, r), dtype=bool)])
+            self._ultimo = np.vstack([self._ultimo, np.full((extra, r), np.iinfo(np.int64).min // 2)])
+        return np.array([self._slots[p] for p in placas.tolist()], dtype=np.intp)
+
+    def avaliar(self, tempo, matriz, cd_servidor):
+        """Avalia um lote e retorna a lista de alertas disparados."""
+        tempo = np.asarray(tempo, dtype='datetime64[ns]').astype(np.int64)
+        matriz = np.asarray(matriz, dtype=np.float64)
+        servidores = np.broadcast_to(np.asarray(cd_servidor, dtype=np.int64), (len(tempo),))
+        if len(tempo) == 0 or len(self.regras['nome']) == 0:
+            return []
+
+        # Lotes grandes são avaliados em partes para limitar a memória
+        passo = max(MAX_CELULAS // len(self.regras['nome']), 1)
+        alertas = []
+        for inicio in range(0, len(tempo), passo):
+            parte = slice(inicio, inicio + passo)
+            alertas.extend(self._avaliar_parte(tempo[parte], matriz[parte], servidores[parte]))
+
+        self.disparos += len(alertas)
+        if self.despachar is not None:
+            for alerta in alertas:
+                self.despachar(alerta['mensagem'])
+        return alertas
+
+    def _avaliar_parte(self, tempo, matriz, servidores):
+        regras = self.regras
+        w = self.janela_maxima - 1
+
+        # Agrupa as linhas por placa, mantendo a ordem de chegada dentro de cada uma
+        ordem = np.argsort(servidores, kind='stable')
+        tempo, X, servidores = tempo[ordem], matriz[ordem], servidores[ordem]
+        placas, inicios, tamanhos = np.unique(servidores, return_index=True, return_counts=True)
+        fins = inicios + tamanhos
+        slots = self._obter_slots(placas)
+        n, g = len(X), len(placas)
+        slot_linha = np.repeat(slots, tamanhos)
+
+        # Leitura anterior de cada linha (a primeira de cada placa vem do estado)
+        anterior = np.empty_like(X)
+        anterior[1:] = X[:-1]
+        anterior[inicios] = self._anterior[slots]
+        self._anterior[slots] = X[fins - 1]
+
+        # Médias móveis: cada placa é precedida pelas suas w últimas leituras
+        deslocamento = np.repeat(np.arange(1, g + 1) * w, tamanhos)
+        estendida = np.empty((n + g * w, X.shape[1]))
+        estendida[np.arange(n) + deslocamento] = X
+        posicoes_cauda = (inicios + np.arange(g) * w)[:, None] + np.arange(w)
+        estendida[posicoes_cauda.ravel()] = self._cauda[slots].reshape(-1, X.shape[1])
+        fins_estendida = fins + np.arange(1, g + 1) * w
+        self._cauda[slots] = estendida[(fins_estendida[:, None] - w + np.arange(w)).ravel()].reshape(g, w, X.shape[1])
+
+        finitos = np.isfinite(estendida)
+        somas = np.zeros((len(estendida) + 1, X.shape[1]))
+        contagens = np.zeros((len(estendida) + 1, X.shape[1]))
+        np.cumsum(np.where(finitos, estendida, 0.0), axis=0, out=somas[1:])
+        np.cumsum(finitos, axis=0, out=contagens[1:])
+
+        # Quantidade comparada por regra: matriz (linhas x regras)
+        col, tipo = regras['coluna'], regras['tipo']
+        Q = X[:, col]
+        desvio = tipo == TIPOS.index('desvio')
+        if desvio.any():
+            Q[:, desvio] = np.abs(Q[:, desvio] - regras['alvo'][desvio])
+        variacao = tipo == TIPOS.index('variacao')
+        if variacao.any():
+            Q[:, variacao] = np.abs(X[:, col[variacao]] - anterior[:, col[variacao]])
+        media = tipo == TIPOS.index('media')
+        if media.any():
+            fim = (np.arange(n) + deslocamento + 1)[:, None]
+            janela = regras['janela'][media]
+            colunas_media = col[media]
+            soma = somas[fim, colunas_media] - somas[fim - janela, colunas_media]
+            contagem = contagens[fim, colunas_media] - contagens[fim - janela, colunas_media]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                Q[:, media] = np.where(contagem == janela, soma / contagem, np.nan)
+
+        d = regras['sinal'] * (Q - regras['valor'])
+        ativo = np.where(regras['estrito'], d > 0, d >= 0)
+
+        # Disparo apenas na transição falso -> verdadeiro, por placa e regra
+        ativo_anterior = np.empty_like(ativo)
+        ativo_anterior[1:] = ativo[:-1]
+        ativo_anterior[inicios] = self._ativo[slots]
+        self._ativo[slots] = ativo[fins - 1]
+        linhas, indices = np.nonzero(ativo & ~ativo_anterior)
+        if len(linhas) == 0:
+            return []
+
+        # Cooldown por par (placa, regra), com as transições ordenadas no tempo
+        r_total = len(regras['nome'])
+        pares = slot_linha[linhas] * r_total + indices
+        ordem = np.lexsort((linhas, pares))
+        linhas, indices, pares = linhas[ordem], indices[ordem], pares[ordem]
+        instantes = tempo[linhas]
+        cooldown = regras['cooldown'][indices]
+        primeira = np.ones(len(pares), dtype=bool)
+        primeira[1:] = pares[1:] != pares[:-1]
+        referencia = np.empty_like(instantes)
+        referencia[1:] = instantes[:-1]
+        referencia[primeira] = self._ultimo.ravel()[pares[primeira]]
+        aceitas = instantes - referencia >= cooldown
+
+        # Só os pares com duas transições dentro do cooldown exigem o cálculo
+        # sequencial (a referência passa a ser o último disparo aceito)
+        conflitos = np.unique(pares[~aceitas & ~primeira])
+        inicios_par = np.searchsorted(pares, conflitos, side='left')
+        fins_par = np.searchsorted(pares, conflitos, side='right')
+        for par, a, b in zip(conflitos.tolist(), inicios_par.tolist(), fins_par.tolist()):
+            ultimo = self._ultimo.ravel()[par]
+            for j in range(a, b):
+                aceitas[j] = instantes[j] - ultimo >= cooldown[j]
+                if aceitas[j]:
+                    ultimo = instantes[j]
+
+        linhas, indices, pares = linhas[aceitas], indices[aceitas], pares[aceitas]
+        ultimos = np.ones(len(pares), dtype=bool)
+        ultimos[:-1] = pares[1:] != pares[:-1]
+        self._ultimo.ravel()[pares[ultimos]] = tempo[linhas[ultimos]]
+
+        ordem = np.argsort(linhas, kind='stable')
+        linhas, indices = linhas[ordem], indices[ordem]
+        valores = Q[linhas, indices].tolist()
+        leituras = X[linhas, col[indices]].tolist()
+        instantes = tempo[linhas].astype('datetime64[ns]')
+        alertas = []
+        for j, (i, r) in enumerate(zip(linhas.tolist(), indices.tolist())):
+            alerta = {
+                'regra': regras['nome'][r],
+                'cd_servidor': int(servidores[i]),
+                'tempo': instantes[j],
+                'coluna': self.colunas[col[r]],
+                'valor': valores[j],
+                'leitura': leituras[j],
+            }
+            modelo = regras['mensagem'][r] or MENSAGEM_PADRAO
+            alerta['mensagem'] = modelo.format(**alerta)
+            alertas.append(alerta)
+        return alertas
@@ -0,0 +1,174 @@
+# rollups.py
+# Agregados por hora e por dia (e por cd_servidor) das colunas de sensores.
+#
+# Cada bloco (resolução, cd_servidor, início) guarda contagem, soma, mínimo e
+# máximo de cada coluna, o que permite combinar blocos (novas leituras,
+# várias placas ou blocos mais largos) sem voltar às leituras brutas. Os
+# gráficos escolhem a resolução mais fina cujo número de blocos no período
+# cabe em MAX_PONTOS_GRAFICO; um mês de leituras vira algumas centenas de
+# linhas por hora em vez de milhões de leituras.
+import threading
+
+import numpy as np
+import pandas as pd
+
+from farmtech.configuracao import COLUNA_TEMPO, COLUNAS_NUMERICAS
+from farmtech.graficos import MAX_PONTOS_GRAFICO
+
+# Da mais fina para a mais grossa
+RESOLUCOES = {
+    'hora': np.timedelta64(1, 'h').astype('timedelta64[ns]'),
+    'dia': np.timedelta64(1, 'D').astype('timedelta64[ns]'),
+}
+
+ESTATISTICAS = ('n', 'soma', 'min', 'max')
+
+
+def colunas_rollup(colunas=COLUNAS_NUMERICAS):
+    return [f'{estatistica}_{col}' for col in colunas for estatistica in ESTATISTICAS]
+
+
+def _vazio(colunas):
+    df = pd.DataFrame({'inicio': pd.Series(dtype='datetime64[ns]'), 'cd_servidor': pd.Series(dtype=np.int64)})
+    for nome in colunas_rollup(colunas):
+        df[nome] = pd.Series(dtype=np.int64 if nome.startswith('n_') else np.float64)
+    return df
+
+
+def agregar(tempo, servidores, matriz, largura, colunas=COLUNAS_NUMERICAS):
+    """Agrega leituras em blocos de `largura` por (início do bloco, cd_servidor)."""
+    tempo = np.asarray(tempo, dtype='datetime64[ns]').view(np.int64)
+    if len(tempo) == 0:
+        return _vazio(colunas)
+    passo = np.asarray(largura, dtype='timedelta64[ns]').view(np.int64)
+    servidores = np.broadcast_to(np.asarray(servidores, dtype=np.int64), tempo.shape)
+    matriz = np.asarray(matriz, dtype=np.float64)
+
+    bloco = np.floor_divide(tempo, passo) * passo
+    ordem = np.lexsort((servidores, bloco))
+    bloco, servidores, matriz = bloco[ordem], servidores[ordem], matriz[ordem]
+    mudou = np.ones(len(bloco), dtype=bool)
+    mudou[1:] = (bloco[1:] != bloco[:-1]) | (servidores[1:] != servidores[:-1])
+    inicios = np.flatnonzero(mudou)
+
+    finitos = np.isfinite(matriz)
+    resultado = {'inicio': bloco[inicios].view('datetime64[ns]'), 'cd_servidor': servidores[inicios]}
+    contagem = np.add.reduceat(finitos, inicios, axis=0)
+    soma = np.add.reduceat(np.where(finitos, matriz, 0.0), inicios, axis=0)
+    with np.errstate(invalid='ignore'):
+        minimo = np.fmin.reduceat(matriz, inicios, axis=0)
+        maximo = np.fmax.reduceat(matriz, inicios, axis=0)
+    for j, col in enumerate(colunas):
+        resultado[f'n_{col}'] = contagem[:, j].astype(np.int64)
+        resultado[f'soma_{col}'] = soma[:, j]
+        resultado[f'min_{col}'] = minimo[:, j]
+        resultado[f'max_{col}'] = maximo[:, j]
+    return pd.DataFrame(resultado)
+
+
+def combinar(*tabelas, chaves=('inicio', 'cd_servidor')):
+    """Soma contagens e somas e combina mínimos e máximos de blocos com a mesma chave."""
+    nao_vazias = [t for t in tabelas if len(t)]
+    if not nao_vazias:
+        return tabelas[0].iloc[:0].reset_index(drop=True)
+    juntas = pd.concat(nao_vazias, ignore_index=True) if len(nao_vazias) > 1 else nao_vazias[0]
+    operacoes = {
+        nome: ('sum' if nome.startswith(('n_', 'soma_')) else nome.split('_', 1)[0])
+        for nome in juntas.columns if nome not in chaves
+    }
+    return juntas.groupby(list(chaves), sort=True).agg(operacoes).reset_index()
+
+
+def serie(tabela, coluna, largura, fator=1, cd_servidor=None):
+    """Série (timestamp, media, minimo, maximo, contagem) de uma coluna.
+
+    Blocos de placas diferentes são combinados, a menos que `cd_servidor`
+    seja informado; `fator` > 1 junta `fator` blocos consecutivos.
+    """
+    if cd_servidor is not None:
+        tabela = tabela[tabela['cd_servidor'] == cd_servidor]
+    tabela = tabela[['inicio', f'n_{coluna}', f'soma_{coluna}', f'min_{coluna}', f'max_{coluna}']]
+    if fator > 1:
+        passo = (np.asarray(largura, dtype='timedelta64[ns]') * fator).view(np.int64)
+        inicio = tabela['inicio'].to_numpy().view(np.int64)
+        tabela = tabela.assign(inicio=(np.floor_divide(inicio, passo) * passo).view('datetime64[ns]'))
+    if fator > 1 or cd_servidor is None:
+        tabela = combinar(tabela, chaves=('inicio',))
+
+    contagem = tabela[f'n_{coluna}'].to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = tabela[f'soma_{coluna}'].to_numpy() / contagem
+    return pd.DataFrame({
+        COLUNA_TEMPO: tabela['inicio'].to_numpy(),
+        'media': np.where(contagem > 0, media, np.nan),
+        'minimo': tabela[f'min_{coluna}'].to_numpy(),
+        'maximo': tabela[f'max_{coluna}'].to_numpy(),
+        'contagem': contagem,
+    })
+
+
+def escolher_resolucao(inicio, fim, n_leituras, max_pontos=MAX_PONTOS_GRAFICO):
+    """Resolução para um período: None (leituras brutas) ou (nome, fator).
+
+    Usa as leituras brutas quando cabem em `max_pontos`; senão, a resolução
+    mais fina cujo número de blocos no período cabe; se nem a diária cabe,
+    junta `fator` dias por bloco.
+    """
+    if n_leituras <= max_pontos:
+        return None
+    duracao = np.datetime64(pd.Timestamp(fim), 'ns') - np.datetime64(pd.Timestamp(inicio), 'ns')
+    for nome, largura in RESOLUCOES.items():
+        blocos = int(duracao // largura) + 1
+        if blocos <= max_pontos:
+            return nome, 1
+    return nome, -(-blocos // max_pontos)
+
+
+# -----------------------------------------------------------
+# Agregado do ConjuntoDados
+# -----------------------------------------------------------
+class Rollups:
+    """Rollups por hora e por dia mantidos a cada lote sincronizado.
+
+    Leituras sem coluna cd_servidor (CSV) são atribuídas ao servidor 1.
+    """
+
+    def __init__(self, colunas=COLUNAS_NUMERICAS, resolucoes=RESOLUCOES):
+        self.colunas = list(colunas)
+        self.resolucoes = dict(resolucoes)
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.tabelas = {nome: _vazio(self.colunas) for nome in self.resolucoes}
+
+    def atualizar(self, novas):
+        if len(novas) == 0:
+            return
+        tempo = novas[COLUNA_TEMPO].to_numpy(dtype='datetime64[ns]')
+        servidores = novas['cd_servidor'].to_numpy() if 'cd_servidor' in novas.columns else 1
+        matriz = novas[self.colunas].to_numpy(np.float64)
+        with self._lock:
+            for nome, largura in self.resolucoes.items():
+                novo = agregar(tempo, servidores, matriz, largura, self.colunas)
+                tabela = self.tabelas[nome]
+                # Só os blocos a partir do primeiro bloco novo precisam ser recombinados
+                corte = int(np.searchsorted(tabela['inicio'].to_numpy(), novo['inicio'].to_numpy()[0]))
+                self.tabelas[nome] = pd.concat(
+                    [tabela.iloc[:corte], combinar(tabela.iloc[corte:], novo)], ignore_index=True
+                ) if corte < len(tabela) else pd.concat([tabela, novo], ignore_index=True)
+
+    def recorte(self, nome, inicio=None, fim=None):
+        """Blocos de `nome` que começam entre `inicio` e `fim` (busca binária)."""
+        tabela = self.tabelas[nome]
+        inicios = tabela['inicio'].to_numpy()
+        largura = self.resolucoes[nome]
+        a = 0 if inicio is None else int(np.searchsorted(
+            inicios, np.datetime64(pd.Timestamp(inicio), 'ns') - largura, side='right'))
+        b = len(tabela) if fim is None else int(np.searchsorted(
+            inicios, np.datetime64(pd.Timestamp(fim), 'ns'), side='right'))
+        return tabela.iloc[a:b]
+
+    def serie(self, coluna, inicio, fim, resolucao, cd_servidor=None):
+        nome, fator = resolucao
+        return serie(self.recorte(nome, inicio, fim), coluna, self.resolucoes[nome], fator, cd_servidor)
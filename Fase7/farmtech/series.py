@@ -0,0 +1,183 @@
+# series.py
+# Features de defasagem e janelas móveis para a previsão das próximas
+# leituras (página de Modelagem Preditiva).
+#
+# Cada linha de features descreve uma placa no instante t usando apenas
+# leituras até t: para cada coluna de sensor, os valores das últimas
+# `defasagens` leituras e a média e o desvio-padrão nas `janelas` móveis.
+# A matriz é montada para todo o histórico de uma vez, em blocos de linhas:
+# as defasagens vêm de uma sliding_window_view do bloco (sem cópia) e as
+# janelas de somas acumuladas dos valores centrados no bloco, o que custa o
+# mesmo para qualquer tamanho de janela e mantém o erro numérico pequeno.
+# Nenhuma janela atravessa a fronteira entre duas placas.
+#
+# O alvo de um horizonte N são as N leituras seguintes da variável
+# escolhida, uma coluna por passo, previstas diretamente por um modelo de
+# várias saídas. As matrizes de features ficam em cache pela impressão dos
+# dados e das defasagens/janelas: mudar o horizonte ou o modelo apenas
+# recorta os alvos.
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from farmtech.configuracao import COLUNA_TEMPO, COLUNAS_NUMERICAS
+
+# Linhas de features calculadas por bloco (limita os temporários e o
+# alcance das somas acumuladas)
+TAMANHO_BLOCO = 1 << 16
+
+
+def nomes_features(colunas, defasagens, janelas):
+    """Nomes das colunas da matriz de construir_features, na mesma ordem."""
+    nomes = []
+    for col in colunas:
+        nomes.append(col)
+        nomes += [f'{col}_lag{k}' for k in range(1, defasagens)]
+        for janela in janelas:
+            nomes += [f'{col}_media{janela}', f'{col}_desvio{janela}']
+    return nomes
+
+
+def preparar_serie(df, colunas=COLUNAS_NUMERICAS):
+    """Valores (float64), placas e tempos das leituras, ordenados por placa e tempo.
+
+    Sem a coluna cd_servidor (CSV), todas as leituras formam uma única série.
+    Leituras com algum valor ausente são descartadas.
+    """
+    valores = df[colunas].to_numpy(np.float64)
+    tempo = df[COLUNA_TEMPO].to_numpy('datetime64[ns]')
+    grupos = df['cd_servidor'].to_numpy(np.int64) if 'cd_servidor' in df else np.zeros(len(df), dtype=np.int64)
+    # O frame já vem ordenado por tempo: a ordenação estável por placa o preserva
+    ordem = np.argsort(grupos, kind='stable')
+    if (ordem != np.arange(len(ordem))).any():
+        valores, tempo, grupos = valores[ordem], tempo[ordem], grupos[ordem]
+    completas = ~np.isnan(valores).any(axis=1)
+    if not completas.all():
+        valores, tempo, grupos = valores[completas], tempo[completas], grupos[completas]
+    return valores, grupos, tempo
+
+
+def construir_features(valores, grupos, defasagens=3, janelas=(6, 24), tamanho_bloco=TAMANHO_BLOCO):
+    """Matriz de features (float32) e a posição de cada linha em `valores`.
+
+    Só entram as posições com histórico completo (a maior janela) dentro
+    da mesma placa.
+    """
+    n, n_colunas = valores.shape
+    alcance = max([defasagens, *janelas])
+    if n < alcance:
+        return np.empty((0, n_colunas * (defasagens + 2 * len(janelas))), dtype=np.float32), np.empty(0, np.int64)
+
+    # Grupos contíguos: a janela está numa só placa se as pontas estão
+    posicoes = np.arange(alcance - 1, n)
+    posicoes = posicoes[grupos[posicoes - alcance + 1] == grupos[posicoes]]
+
+    por_coluna = defasagens + 2 * len(janelas)
+    X = np.empty((n - alcance + 1, n_colunas, por_coluna), dtype=np.float32)
+    for inicio in range(0, len(X), tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, len(X))
+        # Linha i do bloco = posição inicio + i + alcance - 1
+        entrada = valores[inicio:fim + alcance - 1]
+        defasadas = sliding_window_view(entrada[alcance - defasagens:], defasagens, axis=0)
+        X[inicio:fim, :, :defasagens] = defasadas[..., ::-1]
+
+        centro = entrada.mean(axis=0)
+        centrados = entrada - centro
+        somas = np.zeros((len(entrada) + 1, n_colunas))
+        quadrados = np.zeros((len(entrada) + 1, n_colunas))
+        np.cumsum(centrados, axis=0, out=somas[1:])
+        np.cumsum(centrados * centrados, axis=0, out=quadrados[1:])
+        linhas = fim - inicio
+        for i, janela in enumerate(janelas):
+            media = (somas[alcance:alcance + linhas] - somas[alcance - janela:alcance - janela + linhas]) / janela
+            variancia = (quadrados[alcance:alcance + linhas]
+                         - quadrados[alcance - janela:alcance - janela + linhas]) / janela - media * media
+            X[inicio:fim, :, defasagens + 2 * i] = media + centro
+            X[inicio:fim, :, defasagens + 2 * i + 1] = np.sqrt(np.maximum(variancia, 0))
+
+    X = X.reshape(len(X), -1)
+    if len(posicoes) < len(X):
+        X = X[posicoes - alcance + 1]
+    return X, posicoes
+
+
+def montar_alvos(alvo, grupos, posicoes, horizonte):
+    """Próximas `horizonte` leituras de `alvo` a partir de cada posição.
+
+    Retorna a matriz (linhas x horizonte) e a máscara das posições que têm
+    todas essas leituras na mesma placa.
+    """
+    n = len(alvo)
+    com_futuro = posicoes + horizonte < n
+    com_futuro[com_futuro] = grupos[posicoes[com_futuro] + horizonte] == grupos[posicoes[com_futuro]]
+    if n <= horizonte:
+        return np.empty((0, horizonte)), com_futuro
+    Y = sliding_window_view(alvo[1:], horizonte)[posicoes[com_futuro]]
+    return Y, com_futuro
+
+
+def divisao_temporal(tempo, posicoes, horizonte, fracao_teste):
+    """Máscaras de treino e teste (sobre `posicoes` com alvo) por um corte no tempo.
+
+    O teste são as linhas mais recentes; o treino só usa linhas cujas
+    leituras previstas terminam antes do corte, sem vazar o teste.
+    """
+    tempos = tempo[posicoes]
+    corte = np.quantile(tempos.view(np.int64), 1 - fracao_teste).astype(np.int64).view(tempos.dtype)
+    teste = tempos >= corte
+    treino = tempo[posicoes + horizonte] < corte
+    return treino, teste
+
+
+# -----------------------------------------------------------
+# Cache de matrizes de features
+# -----------------------------------------------------------
+def impressao_serie(valores, grupos, **parametros):
+    """Hash dos valores, das placas e dos parâmetros das features."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(valores).data)
+    h.update(np.ascontiguousarray(grupos).data)
+    h.update(json.dumps(parametros, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def chave_previsao(chave_features, **parametros):
+    """Chave do modelo de previsão no registro de modelos."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(chave_features.encode())
+    h.update(json.dumps(parametros, sort_keys=True, default=str).encode())
+    return 'serie-' + h.hexdigest()
+
+
+class CacheFeatures:
+    """Matrizes de features recentes (LRU em memória)."""
+
+    def __init__(self, capacidade=2):
+        self.capacidade = capacidade
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, valores, grupos, defasagens=3, janelas=(6, 24)):
+        """(impressão, X, posições) para a série, calculando só se preciso."""
+        janelas = tuple(sorted(set(janelas)))
+        chave = impressao_serie(valores, grupos, defasagens=defasagens, janelas=janelas)
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                return (chave, *self._memoria[chave])
+
+        X, posicoes = construir_features(valores, grupos, defasagens, janelas)
+        with self._lock:
+            self._memoria[chave] = (X, posicoes)
+            while len(self._memoria) > self.capacidade:
+                self._memoria.popitem(last=False)
+        return chave, X, posicoes
+
+
+# Cache compartilhado entre sessões e reruns do Streamlit
+cache_features = CacheFeatures()
+
@@ -0,0 +1,400 @@
+# servico.py
+# Serviço HTTP local de previsão com os modelos publicados pela página de
+# Modelagem Preditiva.
+#
+# Endpoints (JSON):
+#     GET  /modelos          <- modelos publicados (alvo, features, métricas)
+#     POST /prever/<nome>    <- {"leituras": [{"temperatura_c": 25.1, ...}, ...]}
+#                               ou {"linhas": [[25.1, ...], ...]}, na ordem das features
+#                               -> {"modelo": ..., "alvo": ..., "previsoes": [...]}
+#     GET  /metricas         <- latência p50/p99, vazão e tamanho dos micro-lotes
+#
+# Requisições concorrentes para o mesmo modelo são juntadas em micro-lotes,
+# previstos numa única chamada de predict fora do loop de eventos. Com o
+# modelo ocioso, a requisição segue direto; enquanto um lote executa, as
+# que chegam esperam o fim dele, no máximo `janela` milissegundos (ou até
+# juntar `lote_maximo` linhas). As conexões são mantidas abertas
+# (keep-alive) entre requisições.
+#
+# Um modelo publicado de novo com o mesmo nome é recarregado na próxima
+# requisição.
+#
+# Uso (a partir da pasta Fase7):
+#     python -m farmtech.servico servir --porta 8500 --janela-ms 2
+#     python -m farmtech.servico carga ph_floresta --requisicoes 20000 --conexoes 64
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+
+from farmtech.configuracao import CAMINHO_CSV, DIRETORIO_PUBLICADOS
+from farmtech.metricas import MedidorTaxa
+from farmtech.modelos import carregar_publicado, modelos_publicados
+
+STATUS = {200: b'200 OK', 400: b'400 Bad Request', 404: b'404 Not Found',
+          405: b'405 Method Not Allowed', 500: b'500 Internal Server Error'}
+
+
+class ErroRequisicao(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def matriz_requisicao(corpo, features):
+    """Converte o corpo JSON de /prever em matriz (linhas x features)."""
+    try:
+        dados = json.loads(corpo or b'{}')
+    except ValueError:
+        raise ErroRequisicao(400, 'Corpo da requisição não é JSON válido.') from None
+    if not isinstance(dados, dict):
+        raise ErroRequisicao(400, 'Envie um objeto com "leituras" ou "linhas".')
+    try:
+        if 'leituras' in dados:
+            matriz = np.array([[leitura[f] for f in features] for leitura in dados['leituras']], dtype=np.float64)
+        elif 'linhas' in dados:
+            matriz = np.array(dados['linhas'], dtype=np.float64)
+        else:
+            raise ErroRequisicao(400, 'Envie um objeto com "leituras" ou "linhas".')
+    except KeyError as erro:
+        raise ErroRequisicao(400, f'Leitura sem a feature {erro}.') from None
+    except (TypeError, ValueError):
+        raise ErroRequisicao(400, 'Valores das leituras devem ser numéricos.') from None
+    if matriz.ndim == 1 and len(matriz) == 0:
+        matriz = matriz.reshape(0, len(features))
+    if matriz.ndim != 2 or matriz.shape[1] != len(features):
+        raise ErroRequisicao(400, f'Cada linha deve ter {len(features)} valores: {", ".join(features)}.')
+    return matriz
+
+
+# -----------------------------------------------------------
+# Micro-lotes
+# -----------------------------------------------------------
+class ModeloServido:
+    """Modelo carregado e a fila do micro-lote em formação."""
+
+    def __init__(self, modelo, metadados, versao):
+        self.modelo = modelo
+        self.metadados = metadados
+        self.versao = versao
+        self.pendentes = []
+        self.linhas_pendentes = 0
+        self.temporizador = None
+        self.em_execucao = 0
+        self.requisicoes = 0
+
+
+class ServicoPrevisao:
+    """Servidor HTTP de previsão com micro-lotes por modelo.
+
+    `janela` é a espera máxima (s) de uma requisição que chega com um
+    lote do mesmo modelo em execução e `lote_maximo` o número de linhas
+    que fecha o lote antes disso. Os percentis de latência usam as
+    últimas `amostras` requisições.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PUBLICADOS, janela=0.002, lote_maximo=4096, amostras=10_000):
+        self.diretorio = diretorio
+        self.janela = janela
+        self.lote_maximo = lote_maximo
+        self.modelos = {}
+        self.latencias = deque(maxlen=amostras)
+        self.tamanhos_lote = deque(maxlen=amostras)
+        self.requisicoes = MedidorTaxa()
+        self.previsoes = MedidorTaxa()
+        self.lotes = 0
+        self.erros = 0
+        self.inicio = time.time()
+        self._tarefas = set()
+        self._carregando = {}
+
+    # ---- modelos ----
+    async def _servido(self, nome):
+        """Modelo `nome`, recarregado se foi publicado de novo.
+
+        A leitura do arquivo roda numa thread, fora do loop de eventos, e
+        requisições simultâneas aguardam a mesma carga.
+        """
+        try:
+            versao = os.stat(os.path.join(self.diretorio, f'{nome}.json')).st_mtime_ns
+        except (OSError, ValueError):
+            self.modelos.pop(nome, None)
+            raise KeyError(nome) from None
+        servido = self.modelos.get(nome)
+        if servido is not None and servido.versao == versao:
+            return servido
+
+        chave = (nome, versao)
+        carga = self._carregando.get(chave)
+        if carga is None:
+            carga = asyncio.ensure_future(asyncio.to_thread(carregar_publicado, nome, self.diretorio))
+            self._carregando[chave] = carga
+            carga.add_done_callback(lambda _: self._carregando.pop(chave, None))
+        modelo, metadados = await carga
+        servido = self.modelos.get(nome)
+        if servido is None or servido.versao != versao:
+            servido = ModeloServido(modelo, metadados, versao)
+            self.modelos[nome] = servido
+        return servido
+
+    async def prever(self, nome, matriz):
+        """Previsões de `matriz` com o modelo `nome`, via micro-lote."""
+        servido = await self._servido(nome)
+        servido.requisicoes += 1
+        if not len(matriz):
+            return np.empty(0)
+        futuro = asyncio.get_running_loop().create_future()
+        servido.pendentes.append((matriz, futuro))
+        servido.linhas_pendentes += len(matriz)
+        # Sem lote em execução, não há o que esperar: a requisição segue direto
+        if servido.linhas_pendentes >= self.lote_maximo or not servido.em_execucao:
+            self._disparar(servido)
+        elif servido.temporizador is None:
+            servido.temporizador = asyncio.get_running_loop().call_later(self.janela, self._disparar, servido)
+        return await futuro
+
+    def _disparar(self, servido):
+        if servido.temporizador is not None:
+            servido.temporizador.cancel()
+            servido.temporizador = None
+        pendentes = servido.pendentes
+        servido.pendentes, servido.linhas_pendentes = [], 0
+        servido.em_execucao += 1
+        tarefa = asyncio.create_task(self._executar(servido, pendentes))
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _executar(self, servido, pendentes):
+        matrizes = [matriz for matriz, _ in pendentes]
+        self.lotes += 1
+        self.tamanhos_lote.append(len(pendentes))
+        try:
+            X = matrizes[0] if len(matrizes) == 1 else np.concatenate(matrizes)
+            previsto = np.asarray(await asyncio.to_thread(servido.modelo.predict, X))
+        except Exception as erro:
+            for _, futuro in pendentes:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+        else:
+            self.previsoes.registrar(len(previsto))
+            limites = np.cumsum([len(m) for m in matrizes])[:-1]
+            for (_, futuro), parte in zip(pendentes, np.split(previsto, limites)):
+                if not futuro.done():
+                    futuro.set_result(parte)
+        finally:
+            servido.em_execucao -= 1
+            # O que chegou durante a execução já esperou o bastante
+            if servido.pendentes and not servido.em_execucao:
+                self._disparar(servido)
+
+    # ---- HTTP ----
+    async def _responder(self, metodo, caminho, corpo):
+        partes = [unquote(p) for p in urlsplit(caminho).path.strip('/').split('/')]
+        if partes == ['metricas'] and metodo == 'GET':
+            return 200, self.metricas()
+        if partes == ['modelos'] and metodo == 'GET':
+            return 200, {'modelos': list(modelos_publicados(self.diretorio).values())}
+        if len(partes) == 2 and partes[0] == 'prever':
+            if metodo != 'POST':
+                raise ErroRequisicao(405, 'Use POST em /prever/<modelo>.')
+            try:
+                servido = await self._servido(partes[1])
+            except KeyError:
+                raise ErroRequisicao(404, f'Modelo não publicado: {partes[1]}') from None
+            metadados = servido.metadados
+            matriz = matriz_requisicao(corpo, metadados['features'])
+            try:
+                previsto = await self.prever(partes[1], matriz)
+            except ValueError as erro:
+                raise ErroRequisicao(400, str(erro)) from None
+            return 200, {'modelo': metadados['nome'], 'alvo': metadados['alvo'], 'previsoes': previsto.tolist()}
+        raise ErroRequisicao(404, 'Rota desconhecida.')
+
+    async def _atender(self, leitor, escritor):
+        try:
+            while True:
+                requisicao = await leitor.readline()
+                if not requisicao:
+                    break
+                inicio = time.perf_counter()
+                cabecalhos = {}
+                while (linha := await leitor.readline()) not in (b'\r\n', b'\n', b''):
+                    chave, _, valor = linha.partition(b':')
+                    cabecalhos[chave.strip().lower()] = valor.strip()
+                tamanho = int(cabecalhos.get(b'content-length', 0))
+                corpo = await leitor.readexactly(tamanho) if tamanho else b''
+
+                partes = requisicao.decode('latin-1').split()
+                metodo, caminho = (partes + ['', '/'])[:2]
+                try:
+                    status, resposta = await self._responder(metodo, caminho, corpo)
+                except ErroRequisicao as erro:
+                    status, resposta = erro.status, {'erro': str(erro)}
+                except Exception as erro:
+                    status, resposta = 500, {'erro': str(erro)}
+                if status != 200:
+                    self.erros += 1
+
+                fechar = (cabecalhos.get(b'connection', b'').lower() == b'close'
+                          or requisicao.rstrip().endswith(b'HTTP/1.0'))
+                dados = json.dumps(resposta).encode()
+                escritor.write(
+                    b'HTTP/1.1 ' + STATUS[status] + b'\r\nContent-Type: application/json\r\n'
+                    b'Content-Length: ' + str(len(dados)).encode() + b'\r\n'
+                    + (b'Connection: close\r\n' if fechar else b'') + b'\r\n' + dados
+                )
+                await escritor.drain()
+                if caminho.startswith('/prever/'):
+                    self.requisicoes.registrar(1)
+                    self.latencias.append(time.perf_counter() - inicio)
+                if fechar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+    def metricas(self):
+        latencias = np.array(self.latencias) * 1e3
+        p50, p99 = np.percentile(latencias, [50, 99]) if len(latencias) else (0.0, 0.0)
+        return {
+            'requisicoes': self.requisicoes.total,
+            'previsoes': self.previsoes.total,
+            'vazao_requisicoes': self.requisicoes.taxa(),
+            'vazao_previsoes': self.previsoes.taxa(),
+            'latencia_p50_ms': float(p50),
+            'latencia_p99_ms': float(p99),
+            'lotes': self.lotes,
+            'requisicoes_por_lote': float(np.mean(self.tamanhos_lote)) if self.tamanhos_lote else 0.0,
+            'erros': self.erros,
+            'janela_ms': self.janela * 1e3,
+            'modelos': {nome: s.requisicoes for nome, s in self.modelos.items()},
+            'tempo_ativo': time.time() - self.inicio,
+        }
+
+    async def servir(self, host='127.0.0.1', porta=8500, pronto=None):
+        """Executa o serviço até ser cancelado."""
+        # Carrega os modelos já publicados antes da primeira requisição
+        for nome in modelos_publicados(self.diretorio):
+            try:
+                await self._servido(nome)
+            except Exception as erro:
+                print(f'Falha ao carregar o modelo {nome}: {erro}', file=sys.stderr)
+        servidor = await asyncio.start_server(self._atender, host, porta)
+        if pronto is not None:
+            pronto.set()
+        async with servidor:
+            await servidor.serve_forever()
+
+
+# -----------------------------------------------------------
+# Teste de carga
+# -----------------------------------------------------------
+async def _requisitar(leitor, escritor, metodo, caminho, corpo=b''):
+    escritor.write(
+        f'{metodo} {caminho} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(corpo)}\r\n\r\n'.encode() + corpo
+    )
+    status = int((await leitor.readline()).split()[1])
+    tamanho = 0
+    while (linha := await leitor.readline()) not in (b'\r\n', b'\n', b''):
+        chave, _, valor = linha.partition(b':')
+        if chave.strip().lower() == b'content-length':
+            tamanho = int(valor)
+    return status, json.loads(await leitor.readexactly(tamanho))
+
+
+async def carga(host, porta, nome, requisicoes=10_000, conexoes=32, linhas=1, caminho_csv=CAMINHO_CSV):
+    """Dispara requisições concorrentes de `linhas` leituras do CSV e mede a latência."""
+    import pandas as pd
+
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    _, publicados = await _requisitar(leitor, escritor, 'GET', '/modelos')
+    metadados = {m['nome']: m for m in publicados['modelos']}.get(nome)
+    if metadados is None:
+        escritor.close()
+        raise SystemExit(f'Modelo não publicado: {nome}')
+    leituras = pd.read_csv(caminho_csv, usecols=metadados['features'])[metadados['features']].to_numpy()
+    corpos = [
+        json.dumps({'linhas': leituras[i:i + linhas].tolist()}).encode()
+        for i in range(0, max(len(leituras) - linhas, 1), linhas)
+    ]
+
+    latencias, falhas = [], 0
+    restantes = iter(range(requisicoes))
+
+    async def conexao():
+        nonlocal falhas
+        leitor, escritor = await asyncio.open_connection(host, porta)
+        try:
+            for i in restantes:
+                inicio = time.perf_counter()
+                status, _ = await _requisitar(leitor, escritor, 'POST', f'/prever/{nome}', corpos[i % len(corpos)])
+                latencias.append(time.perf_counter() - inicio)
+                falhas += status != 200
+        finally:
+            escritor.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(conexao() for _ in range(conexoes)))
+    segundos = time.perf_counter() - inicio
+    _, metricas = await _requisitar(leitor, escritor, 'GET', '/metricas')
+    escritor.close()
+
+    latencias = np.array(latencias) * 1e3
+    return {
+        'requisicoes': len(latencias),
+        'falhas': falhas,
+        'segundos': segundos,
+        'requisicoes_por_segundo': len(latencias) / segundos,
+        'latencia_p50_ms': float(np.percentile(latencias, 50)),
+        'latencia_p99_ms': float(np.percentile(latencias, 99)),
+        'servidor': metricas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serviço local de previsão com os modelos publicados.')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_servir = sub.add_parser('servir', help='inicia o serviço HTTP')
+    p_servir.add_argument('--host', default='127.0.0.1')
+    p_servir.add_argument('--porta', type=int, default=8500)
+    p_servir.add_argument('--modelos', default=DIRETORIO_PUBLICADOS, help='diretório dos modelos publicados')
+    p_servir.add_argument('--janela-ms', type=float, default=2.0, help='espera máxima do micro-lote')
+    p_servir.add_argument('--lote-maximo', type=int, default=4096, help='linhas que fecham o micro-lote')
+
+    p_carga = sub.add_parser('carga', help='mede latência e vazão de um serviço em execução')
+    p_carga.add_argument('modelo')
+    p_carga.add_argument('--host', default='127.0.0.1')
+    p_carga.add_argument('--porta', type=int, default=8500)
+    p_carga.add_argument('--requisicoes', type=int, default=10_000)
+    p_carga.add_argument('--conexoes', type=int, default=32, help='clientes simultâneos')
+    p_carga.add_argument('--linhas', type=int, default=1, help='leituras por requisição')
+    args = parser.parse_args()
+
+    if args.comando == 'servir':
+        servico = ServicoPrevisao(args.modelos, janela=args.janela_ms / 1e3, lote_maximo=args.lote_maximo)
+        print(f'Servindo {len(modelos_publicados(args.modelos))} modelos em http://{args.host}:{args.porta}',
+              file=sys.stderr)
+        try:
+            asyncio.run(servico.servir(args.host, args.porta))
+        except KeyboardInterrupt:
+            pass
+    else:
+        resultado = asyncio.run(carga(args.host, args.porta, args.modelo, args.requisicoes,
+                                      args.conexoes, args.linhas))
+        servidor = resultado.pop('servidor')
+        for chave, valor in resultado.items():
+            print(f'{chave:28s} {valor:.6g}')
+        print(f'{"requisicoes_por_lote":28s} {servidor["requisicoes_por_lote"]:.6g}  (no servidor)')
+
+
+if __name__ == '__main__':
+    main()
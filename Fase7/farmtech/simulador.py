@@ -0,0 +1,240 @@
+# simulador.py
+# Gerador de carga que emula várias placas ESP32 enviando linhas "log,".
+#
+# Cada coluna de cada placa segue um processo AR(1) em torno da média e do
+# desvio do data.csv (como o circuito do Wokwi, mas sem botões). A bomba de
+# irrigação segue a regra da página "Funcionamento do Sensor": com umidade
+# abaixo de 40% ela liga e a umidade passa a subir; acima, a umidade cai.
+#
+# Uso (a partir da pasta Fase7):
+#     python -m farmtech.simulador --placas 200 --taxa 2 --duracao 60 --tcp localhost:9000
+#     python -m farmtech.simulador --placas 1 --leituras 100000 --saida monitor.log
+#     python -m farmtech.simulador --taxa 0 --leituras 1000000 | python -m farmtech.ingestao -
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from farmtech.configuracao import CAMINHO_CSV
+from farmtech.ingestao import CAMPOS_LOG
+
+LIMITE_BOMBA = 40.0
+
+# Intervalo entre envios quando a taxa é limitada
+PASSO = 0.1
+
+
+# -----------------------------------------------------------
+# Modelo das placas
+# -----------------------------------------------------------
+class ModeloPlacas:
+    """Estado de `n_placas` placas, avançado em conjunto (vetorizado).
+
+    `phi` controla a autocorrelação das leituras e `ganho_bomba` quantos
+    desvios por leitura a umidade sobe (bomba ligada) ou desce (desligada).
+    """
+
+    def __init__(self, n_placas, caminho_csv=CAMINHO_CSV, phi=0.98, ganho_bomba=0.05, semente=None):
+        original = pd.read_csv(caminho_csv)
+        self.media = original[CAMPOS_LOG].mean().to_numpy()
+        self.desvio = original[CAMPOS_LOG].std().to_numpy()
+        self.phi = phi
+        self.ganho_bomba = ganho_bomba
+        self.rng = np.random.default_rng(semente)
+        self.estado = self.rng.normal(self.media, self.desvio, (n_placas, len(CAMPOS_LOG)))
+        self._umidade = CAMPOS_LOG.index('umidade_percent')
+        self._ph = CAMPOS_LOG.index('ph')
+
+    @property
+    def n_placas(self):
+        return len(self.estado)
+
+    @property
+    def bombas(self):
+        """Placas com a bomba ligada (umidade abaixo de LIMITE_BOMBA)."""
+        return self.estado[:, self._umidade] < LIMITE_BOMBA
+
+    def avancar(self, passos):
+        """Gera `passos` leituras por placa: array (passos, n_placas, 5)."""
+        escala = self.desvio * np.sqrt(1 - self.phi ** 2)
+        ruido = self.rng.normal(0, 1, (passos,) + self.estado.shape) * escala
+        leituras = np.empty_like(ruido)
+        estado = self.estado
+        for t in range(passos):
+            bomba = estado[:, self._umidade] < LIMITE_BOMBA
+            estado = self.media + self.phi * (estado - self.media) + ruido[t]
+            estado[:, self._umidade] += np.where(bomba, 1, -1) * self.ganho_bomba * self.desvio[self._umidade]
+            leituras[t] = estado
+        np.clip(leituras, 0, None, out=leituras)
+        np.clip(leituras[..., self._umidade], None, 100, out=leituras[..., self._umidade])
+        np.clip(leituras[..., self._ph], None, 14, out=leituras[..., self._ph])
+        self.estado = leituras[-1].copy()
+        return leituras
+
+
+def formatar_linhas(valores, tempos=None):
+    """Texto das linhas de uma placa: `valores` (n, 5) e, opcionalmente, carimbos (n,)."""
+    n = len(valores)
+    if tempos is None:
+        return ('log' + ',%.2f' * len(CAMPOS_LOG) + '\n') * n % tuple(valores.ravel().tolist())
+    campos = np.empty((n, 1 + len(CAMPOS_LOG)), dtype=object)
+    inteiros = (tempos == tempos.astype('datetime64[s]')).all()
+    campos[:, 0] = np.datetime_as_string(tempos, unit='s' if inteiros else 'us')
+    campos[:, 1:] = valores
+    return ('%s' + ',%.2f' * len(CAMPOS_LOG) + '\n') * n % tuple(campos.ravel().tolist())
+
+
+# -----------------------------------------------------------
+# Ritmo de envio
+# -----------------------------------------------------------
+class Ritmo:
+    """Quantas leituras por placa enviar a cada passo para manter `taxa` por segundo.
+
+    Com `taxa=0` não há limite: cada passo envia `lote` leituras.
+    """
+
+    def __init__(self, taxa, lote=1000, total=None, duracao=None):
+        self.taxa = taxa
+        self.lote = lote
+        self.restantes = total
+        self.fim = None if duracao is None else time.monotonic() + duracao
+        self._credito = 0.0
+        self._anterior = time.monotonic()
+
+    def proximo(self):
+        """Leituras por placa do próximo passo (pode ser 0); None encerra a simulação."""
+        if self.restantes == 0 or (self.fim is not None and time.monotonic() >= self.fim):
+            return None
+        if self.taxa:
+            agora = time.monotonic()
+            self._credito += (agora - self._anterior) * self.taxa
+            self._anterior = agora
+            passos = int(self._credito)
+            self._credito -= passos
+        else:
+            passos = self.lote
+        if self.restantes is not None:
+            passos = min(passos, self.restantes)
+            self.restantes -= passos
+        return passos
+
+    async def aguardar(self):
+        if self.taxa:
+            await asyncio.sleep(PASSO)
+
+
+class Relogio:
+    """Carimbos das placas: começa em `inicio` e avança `cadencia` por leitura."""
+
+    def __init__(self, inicio, cadencia='1s'):
+        self.proximo = np.datetime64(pd.Timestamp(inicio), 'us')
+        self.cadencia = np.timedelta64(pd.Timedelta(cadencia).value // 1000, 'us')
+
+    def avancar(self, n):
+        tempos = self.proximo + np.arange(n) * self.cadencia
+        self.proximo += n * self.cadencia
+        return tempos
+
+
+# -----------------------------------------------------------
+# Destinos
+# -----------------------------------------------------------
+async def simular_tcp(modelo, ritmo, host, porta, relogio=None, primeiro_servidor=1):
+    """Uma conexão por placa com o gateway; respeita o backpressure (drain)."""
+    conexoes = []
+    for i in range(modelo.n_placas):
+        _, escritor = await asyncio.open_connection(host, porta)
+        escritor.write(f'servidor,{primeiro_servidor + i}\n'.encode())
+        conexoes.append(escritor)
+
+    enviadas = 0
+    try:
+        while True:
+            await ritmo.aguardar()
+            passos = ritmo.proximo()
+            if passos is None:
+                break
+            if not passos:
+                continue
+            leituras = modelo.avancar(passos)
+            tempos = None if relogio is None else relogio.avancar(passos)
+            for i, escritor in enumerate(conexoes):
+                escritor.write(formatar_linhas(leituras[:, i], tempos).encode())
+            await asyncio.gather(*(escritor.drain() for escritor in conexoes))
+            enviadas += leituras.shape[0] * leituras.shape[1]
+    finally:
+        for escritor in conexoes:
+            escritor.close()
+        await asyncio.gather(*(escritor.wait_closed() for escritor in conexoes), return_exceptions=True)
+    return enviadas
+
+
+async def simular_fluxo(modelo, ritmo, saida, relogio=None):
+    """Escreve as leituras de todas as placas, intercaladas, em um arquivo texto.
+
+    No fluxo único todas as placas chegam como um só servidor: com datas,
+    cada placa é deslocada de uma fração da cadência para que nenhuma
+    leitura repita o carimbo de outra.
+    """
+    if relogio is not None:
+        deslocamento = np.arange(modelo.n_placas) * (relogio.cadencia // modelo.n_placas)
+    enviadas = 0
+    while True:
+        await ritmo.aguardar()
+        passos = ritmo.proximo()
+        if passos is None:
+            break
+        if not passos:
+            continue
+        leituras = modelo.avancar(passos).reshape(-1, len(CAMPOS_LOG))
+        tempos = None if relogio is None else (relogio.avancar(passos)[:, None] + deslocamento).ravel()
+        saida.write(formatar_linhas(leituras, tempos))
+        saida.flush()
+        enviadas += len(leituras)
+    return enviadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulador de placas ESP32 para testes de carga.')
+    parser.add_argument('--placas', type=int, default=1)
+    parser.add_argument('--taxa', type=float, default=1.0, help='leituras por segundo por placa (0 = sem limite)')
+    parser.add_argument('--duracao', type=float, help='segundos de simulação')
+    parser.add_argument('--leituras', type=int, help='leituras por placa')
+    parser.add_argument('--tcp', metavar='HOST:PORTA', help='envia ao gateway em vez da saída padrão')
+    parser.add_argument('--saida', help='arquivo de saída (padrão: saída padrão)')
+    parser.add_argument('--data-inicial', help='envia a data da leitura no lugar de "log"')
+    parser.add_argument('--cadencia', default='1s', help='intervalo entre as datas enviadas')
+    parser.add_argument('--primeiro-servidor', type=int, default=1)
+    parser.add_argument('--semente', type=int)
+    args = parser.parse_args()
+
+    if args.duracao is None and args.leituras is None:
+        parser.error('informe --duracao ou --leituras')
+
+    modelo = ModeloPlacas(args.placas, semente=args.semente)
+    ritmo = Ritmo(args.taxa, total=args.leituras, duracao=args.duracao)
+    relogio = Relogio(args.data_inicial, args.cadencia) if args.data_inicial else None
+
+    inicio = time.perf_counter()
+    try:
+        if args.tcp:
+            host, porta = args.tcp.rsplit(':', 1)
+            enviadas = asyncio.run(simular_tcp(modelo, ritmo, host, int(porta), relogio, args.primeiro_servidor))
+        elif args.saida:
+            with open(args.saida, 'w') as saida:
+                enviadas = asyncio.run(simular_fluxo(modelo, ritmo, saida, relogio))
+        else:
+            enviadas = asyncio.run(simular_fluxo(modelo, ritmo, sys.stdout, relogio))
+    except (KeyboardInterrupt, BrokenPipeError):
+        return
+
+    segundos = time.perf_counter() - inicio
+    print(f'{enviadas} leituras de {args.placas} placas em {segundos:.2f}s '
+          f'({enviadas / max(segundos, 1e-9):.0f} leituras/s)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# treinamento.py
+# Treinamento paralelo e incremental da floresta aleatória.
+#
+# As árvores são treinadas em lotes com warm_start, usando todos os núcleos
+# (n_jobs=-1), o que permite reportar o progresso a cada lote. Quando já
+# existe uma floresta treinada com os mesmos dados e hiperparâmetros, apenas
+# as árvores que faltam são treinadas; se ela tiver árvores a mais, basta
+# recortá-la. Como o scikit-learn sorteia a semente de cada árvore em
+# sequência, o resultado é idêntico ao de um treino do zero.
+import copy
+import math
+import os
+
+from sklearn.ensemble import RandomForestRegressor
+
+
+def _lote_padrao(n_estimators):
+    # Cada lote deve ocupar todos os núcleos, com ~10 atualizações de progresso
+    return max(os.cpu_count() or 1, math.ceil(n_estimators / 10))
+
+
+def _recortar(modelo, n_estimators):
+    recortado = copy.copy(modelo)
+    recortado.estimators_ = modelo.estimators_[:n_estimators]
+    recortado.n_estimators = n_estimators
+    return recortado
+
+
+def treinar_floresta(X_train, y_train, parametros, modelo_base=None, progresso=None, tamanho_lote=None):
+    """Treina um RandomForestRegressor, aproveitando `modelo_base` se possível.
+
+    `modelo_base` deve ter sido treinado com os mesmos dados e parâmetros,
+    exceto `n_estimators`; ele não é modificado. `progresso(feitas, total)`
+    é chamado após cada lote de árvores.
+    """
+    n_estimators = parametros['n_estimators']
+
+    if modelo_base is not None and len(modelo_base.estimators_) >= n_estimators:
+        modelo = _recortar(modelo_base, n_estimators)
+        if progresso is not None:
+            progresso(n_estimators, n_estimators)
+        return modelo
+
+    if modelo_base is not None:
+        # Copia para não alterar o modelo que continua no registro
+        modelo = copy.deepcopy(modelo_base)
+        modelo.set_params(warm_start=True, n_jobs=-1)
+    else:
+        modelo = RandomForestRegressor(**parametros, warm_start=True, n_jobs=-1)
+
+    feitas = len(getattr(modelo, 'estimators_', []))
+    tamanho_lote = tamanho_lote or _lote_padrao(n_estimators)
+    while feitas < n_estimators:
+        feitas = min(feitas + tamanho_lote, n_estimators)
+        modelo.set_params(n_estimators=feitas)
+        modelo.fit(X_train, y_train)
+        if progresso is not None:
+            progresso(feitas, n_estimators)
+
+    # Previsões de poucas linhas são mais rápidas sem o pool de threads
+    modelo.set_params(warm_start=False, n_jobs=None)
+    return modelo
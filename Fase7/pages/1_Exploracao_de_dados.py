@@ -1,12 +1,15 @@
 # Exploracao_de_dados.py
+# Apenas o necessário para desenhar a página: o mapa de correlação usa Plotly
+# em vez de seaborn/matplotlib, que levavam mais de um segundo para importar.
 import streamlit as st
-import seaborn as sns
-import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
+from farmtech.dados import conjunto_dados, valores_exibicao
+from farmtech.estatisticas import EstatisticasIncrementais
+from farmtech.figuras import (
+    criar_dispersao, criar_grafico_rollup, criar_grafico_temporal, criar_histograma,
+    criar_mapa_correlacao, criar_matriz_dispersao
+)
+from farmtech.rollups import RESOLUCOES, escolher_resolucao, serie
 
 # Configurações gerais
 st.set_page_config(page_title='Análise de Dados Agrícolas', layout='wide')
@@ -16,23 +19,24 @@ st.title('Análise de Dados de Sensoriamento Agrícola')
 # 1. Carregar os Dados
 # ================================================
 st.header('1. Carregar os Dados')
-df = pd.read_csv('data.csv')
-
-# Converter timestamp para datetime
-df['timestamp'] = pd.to_datetime(df['timestamp'])
-df = df.sort_values('timestamp')
-
-# Verificar e remover colunas duplicadas
-df = df.loc[:, ~df.columns.duplicated()]
+# Leitura compartilhada e em cache: o timestamp já vem convertido e ordenado,
+# sem colunas duplicadas e com índice sequencial. Novas leituras anexadas ao
+# CSV são lidas incrementalmente a cada rerun.
+dados = conjunto_dados()
+df = dados.df
+resumo = dados.resumo
+numeric_columns = ['temperatura_c', 'umidade_percent', 'ph', 'fosforo_mg_kg', 'potassio_mg_kg']
 
-# Resetar o índice para evitar problemas
-df = df.reset_index(drop=True)
+# Momentos, co-momentos e esboços de quantis atualizados a cada lote ingerido
+estatisticas = dados.obter_agregado(
+    'estatisticas', lambda: EstatisticasIncrementais(numeric_columns)
+)
 
 st.write("Com base nos dados coletados das últimas safras, faremos uma análise exploratória destes dados, de forma a extrair insights e interpretações que nos ajudarão em tomadas de decisões futuras e na elaboração de nosso modelo de predição.")
 
 # Mostrar os primeiros registros
 st.subheader('Visualização dos Dados')
-st.dataframe(df.head())
+st.dataframe(valores_exibicao(df.head()))
 
 # ================================================
 # 2. Visão Geral dos Dados
@@ -41,9 +45,9 @@ st.header('2. Visão Geral dos Dados')
 
 # Informações básicas
 st.subheader('Informações do DataFrame')
-st.write(f'**Linhas:** {df.shape[0]}')
+st.write(f'**Linhas:** {resumo.contagem}')
 st.write(f'**Colunas:** {df.shape[1]}')
-st.write(f'**Período dos Dados:** {df["timestamp"].min().date()} a {df["timestamp"].max().date()}')
+st.write(f'**Período dos Dados:** {resumo.minimos["timestamp"].date()} a {resumo.maximos["timestamp"].date()}')
 
 # Tipos de dados
 st.subheader('Tipos de Dados')
@@ -57,59 +61,42 @@ st.dataframe(df_types)
 # 3. Análise Univariada
 # ================================================
 st.header('3. Análise Univariada')
-numeric_columns = ['temperatura_c', 'umidade_percent', 'ph', 'fosforo_mg_kg', 'potassio_mg_kg']
 
 # Histogramas com destaque para pH em azul
 st.subheader('Distribuições das Variáveis')
 
 for col in numeric_columns:
-    fig = px.histogram(
-        df,
-        x=col,
-        nbins=30,
-        title=f'Distribuição de {col}',
-        marginal='box',
-        color_discrete_sequence=['#1f77b4'] if col == 'ph' else px.colors.qualitative.Plotly
-    )
+    fig = criar_histograma(df, col, f'Distribuição de {col}')
     st.plotly_chart(fig, use_container_width=True)
 
 # Gráficos temporais
 st.subheader('Evolução Temporal das Variáveis')
 
-def criar_grafico_temporal(df, coluna, titulo):
-    fig = go.Figure()
-    line_color = '#1f77b4'  # Azul para todas as variáveis
-    
-    fig.add_trace(go.Scatter(
-        x=df['timestamp'],
-        y=df[coluna],
-        mode='lines',
-        name=coluna,
-        line=dict(color=line_color, width=2)
-    ))
-
-    fig.update_layout(
-        title=titulo,
-        xaxis_title='Data e Hora',
-        yaxis_title=coluna,
-        template='plotly_white',
-        hovermode='x unified'
-    )
-
-    fig.update_xaxes(
-        rangeslider_visible=True,
-        rangeselector=dict(
-            buttons=list([
-                dict(count=1, label="1d", step="day", stepmode="backward"),
-                dict(count=7, label="1w", step="day", stepmode="backward"),
-                dict(step="all")
-            ])
-        )
-    )
-    return fig
+# Cada gráfico recebe no máximo MAX_PONTOS_GRAFICO pontos. Janelas longas usam
+# os rollups por hora ou por dia (média com faixa de mínimo e máximo); janelas
+# curtas mostram as leituras, reduzidas no servidor.
+inicio_janela, fim_janela = st.slider(
+    'Janela de visualização:',
+    min_value=resumo.minimos['timestamp'].to_pydatetime(),
+    max_value=resumo.maximos['timestamp'].to_pydatetime(),
+    value=(resumo.minimos['timestamp'].to_pydatetime(), resumo.maximos['timestamp'].to_pydatetime()),
+    format='DD/MM/YYYY HH:mm'
+)
+df_janela = dados.janela(inicio_janela, fim_janela)
+resolucao = escolher_resolucao(inicio_janela, fim_janela, len(df_janela))
+if resolucao is not None:
+    nome, fator = resolucao
+    bloco = f'{fator} dias' if fator > 1 else nome
+    st.caption(f'{len(df_janela)} leituras na janela, agregadas por {bloco} (média, mínimo e máximo).')
+    # Do banco, quando existe; senão, agregados em memória
+    blocos = dados.rollup(nome, inicio_janela, fim_janela)
 
 for col in numeric_columns:
-    fig = criar_grafico_temporal(df, col, f'Evolução de {col} ao longo do tempo')
+    titulo = f'Evolução de {col} ao longo do tempo'
+    if resolucao is None:
+        fig = criar_grafico_temporal(df_janela, col, titulo)
+    else:
+        fig = criar_grafico_rollup(serie(blocos, col, RESOLUCOES[nome], fator), col, titulo)
     st.plotly_chart(fig, use_container_width=True)
 
 # ================================================
@@ -134,19 +121,16 @@ variable_pairs = [
 ]
 
 for x_var, y_var in variable_pairs:
-    fig = px.scatter(
+    fig = criar_dispersao(
         df,
-        x=x_var,
-        y=y_var,
-        color='ph',
-        color_continuous_scale='Blues',
-        title=f'{y_var} vs {x_var} (Colorido por pH)',
+        x_var,
+        y_var,
+        titulo=f'{y_var} vs {x_var} (Colorido por pH)',
         labels={
             x_var: x_var.replace('_', ' ').title(),
             y_var: y_var.replace('_', ' ').title(),
             'ph': 'pH'
-        },
-        hover_data=['timestamp']
+        }
     )
     fig.update_coloraxes(
     colorbar=dict(
@@ -161,18 +145,15 @@ for x_var, y_var in variable_pairs:
 
 st.plotly_chart(fig, use_container_width=True)
     
-corr = df[x_var].corr(df[y_var])
+corr = estatisticas.correlacao_par(x_var, y_var)
 st.write(f"**Correlação entre {x_var} e {y_var}:** {corr:.2f}")
 
 # Matriz de dispersão com cor do pH em azul
 st.subheader('Matriz de Dispersão (Colorido por pH)')
-fig = px.scatter_matrix(
+fig = criar_matriz_dispersao(
     df,
-    dimensions=numeric_columns,
-    color='ph',
-    color_continuous_scale='Blues',
-    title='Relações entre Todas as Variáveis (Colorido por pH)',
-    hover_data=['timestamp']
+    numeric_columns,
+    'Relações entre Todas as Variáveis (Colorido por pH)'
 )
 fig.update_coloraxes(
     colorbar=dict(
@@ -196,12 +177,9 @@ st.header('5. Análise de Correlação')
 
 # Mapa de calor
 st.subheader('Mapa de Calor de Correlação')
-corr = df[numeric_columns].corr()
-fig, ax = plt.subplots(figsize=(10, 8))
-sns.heatmap(corr, annot=True, cmap='Blues', ax=ax, center=0,
-            annot_kws={"size": 10, "weight": "bold"})
-plt.title('Correlação entre Variáveis', pad=20)
-st.pyplot(fig)
+corr = estatisticas.correlacao()
+fig = criar_mapa_correlacao(corr, 'Correlação entre Variáveis')
+st.plotly_chart(fig, use_container_width=True)
 
 # ================================================
 # 7. Análise Interativa
@@ -222,19 +200,16 @@ with col2:
 if x_var == y_var:
     st.warning("Por favor, selecione variáveis diferentes para os eixos X e Y.")
 else:
-    fig = px.scatter(
+    fig = criar_dispersao(
         df,
-        x=x_var,
-        y=y_var,
-        color='ph',
-        color_continuous_scale='Blues',
-        title=f'Relação entre {x_var} e {y_var} (Colorido por pH)',
+        x_var,
+        y_var,
+        titulo=f'Relação entre {x_var} e {y_var} (Colorido por pH)',
         labels={
             x_var: x_var.replace('_', ' ').title(),
             y_var: y_var.replace('_', ' ').title(),
             'ph': 'pH'
         },
-        hover_data=['timestamp'],
         size_max=15
     )
     
@@ -251,19 +226,17 @@ else:
     fig.update_layout(
     margin=dict(r=100)  # Aumenta a margem direita para acomodar a barra
 )
-    fig.update_traces(marker=dict(size=10, opacity=0.7))
+    fig.update_traces(marker=dict(size=10, opacity=0.7), selector=dict(type='scatter'))
     
     st.plotly_chart(fig, use_container_width=True)
     
     # Análise estatística
     st.subheader('Análise Estatística')
-    corr_value = df[x_var].corr(df[y_var])
+    corr_value = estatisticas.correlacao_par(x_var, y_var)
     st.write(f"**Correlação de Pearson:** {corr_value:.2f}")
     
     # Mostrar estatísticas por faixa de pH
     st.write("**Estatísticas por Faixa de pH:**")
-    df['pH Category'] = pd.cut(df['ph'], 
-                              bins=[df['ph'].min(), df['ph'].median(), df['ph'].max()], 
-                              labels=['Baixo', 'Alto'])
-    stats = df.groupby('pH Category')[[x_var, y_var]].mean()
+    # Divisão pela mediana do pH a partir do esboço de quantis (sem varrer o frame)
+    stats = estatisticas.medias_por_faixa([x_var, y_var], nome='pH Category')
     st.dataframe(stats.style.format("{:.2f}").background_gradient(cmap='Blues'))
\ No newline at end of file
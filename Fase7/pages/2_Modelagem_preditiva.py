@@ -1,20 +1,24 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import r2_score, mean_squared_error
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime
+import io
+import time
+from farmtech.dados import conjunto_dados
+from farmtech.estimadores import ESTIMADORES
+from farmtech.filtros import motor_filtros
+from farmtech.modelos import impressao_parametros, impressao_recorte, registro_modelos, tamanhos_divisao
+from farmtech.previsao import pontuar_csv
 
 # Configurações gerais
 st.set_page_config(page_title='Modelagem Preditiva Agrícola', layout='wide')
 st.title('Modelagem Preditiva para Parâmetros Agrícolas')
 
 # Carregar os dados
-df = pd.read_csv('data.csv')
-df['timestamp'] = pd.to_datetime(df['timestamp'])
+dados = conjunto_dados()
+df = dados.df
+resumo = dados.resumo
 
 # ================================================
 # 1. Filtros na Barra Lateral
@@ -27,8 +31,8 @@ filters = {}
 numeric_columns = ['temperatura_c', 'umidade_percent', 'ph', 'fosforo_mg_kg', 'potassio_mg_kg']
 
 for col in numeric_columns:
-    min_val = float(df[col].min())
-    max_val = float(df[col].max())
+    min_val = float(resumo.minimos[col])
+    max_val = float(resumo.maximos[col])
     filters[col] = st.sidebar.slider(
         f'{col.replace("_", " ").title()}:',
         min_value=min_val,
@@ -37,8 +41,8 @@ for col in numeric_columns:
     )
 
 # Filtro de data
-min_date = df['timestamp'].min()
-max_date = df['timestamp'].max()
+min_date = resumo.minimos['timestamp']
+max_date = resumo.maximos['timestamp']
 date_range = st.sidebar.date_input(
     'Intervalo de Datas:',
     value=(min_date, max_date),
@@ -46,18 +50,14 @@ date_range = st.sidebar.date_input(
     max_value=max_date
 )
 
-# Aplicar filtros
-filtered_df = df.copy()
-for col, (min_val, max_val) in filters.items():
-    filtered_df = filtered_df[(filtered_df[col] >= min_val) & (filtered_df[col] <= max_val)]
-
-# Filtrar por data
+# Aplicar filtros (índices ordenados por coluna, busca binária nas datas e
+# cache dos filtros recentes)
+periodo = None
 if len(date_range) == 2:
     start_date, end_date = date_range
-    filtered_df = filtered_df[
-        (filtered_df['timestamp'] >= pd.Timestamp(start_date)) & 
-        (filtered_df['timestamp'] <= pd.Timestamp(end_date))
-    ]
+    periodo = (pd.Timestamp(start_date), pd.Timestamp(end_date))
+
+filtered_df = motor_filtros(df, numeric_columns).aplicar(filters, periodo)
 
 # Mostrar estatísticas dos dados filtrados
 st.sidebar.subheader('Dados Filtrados')
@@ -97,16 +97,25 @@ if not selected_features:
 X = filtered_df[selected_features]
 y = filtered_df[target_var]
 
-# Dividir dados ANTES de mostrar estatísticas
+# Impressão digital do recorte: o hash das linhas só é refeito quando o
+# dataset, os filtros ou as variáveis mudam, não a cada interação
+chave_recorte = (sorted(filters.items()), str(periodo), target_var, list(selected_features))
+recorte = st.session_state.get('recorte')
+if recorte is None or recorte[0] is not df or recorte[1] != chave_recorte:
+    st.session_state.recorte = (df, chave_recorte, impressao_recorte(X, y))
+impressao_dados = st.session_state.recorte[2]
+
+# Dividir dados ANTES de mostrar estatísticas (a divisão em si só é feita
+# quando o modelo precisa ser treinado)
 test_size = st.slider('Proporção para teste:', 0.1, 0.5, 0.2, 0.05)
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
+n_train, n_test = tamanhos_divisao(len(X), test_size)
 
 # Agora mostrar estatísticas (DEPOIS da divisão)
 st.subheader('Dados Selecionados para Modelagem')
 st.write(f"**Features selecionadas:** {', '.join(selected_features)}")
 st.write(f"**Total de registros:** {len(X)}")
-st.write(f"**Dados de treino:** {len(X_train)} registros ({100*(1-test_size):.0f}%)")
-st.write(f"**Dados de teste:** {len(X_test)} registros ({100*test_size:.0f}%)")
+st.write(f"**Dados de treino:** {n_train} registros ({100*(1-test_size):.0f}%)")
+st.write(f"**Dados de teste:** {n_test} registros ({100*test_size:.0f}%)")
 
 # ================================================
 # 3. Treinar e Avaliar o Modelo
@@ -115,26 +124,157 @@ st.header('3. Treinamento e Avaliação do Modelo')
 
 # Configurar modelo
 st.subheader('Configuração do Modelo')
-n_estimators = st.slider('Número de Árvores:', 10, 200, 100, 10)
-max_depth = st.slider('Profundidade Máxima:', 1, 20, 10, 1)
-min_samples_split = st.slider('Mínimo de Amostras para Divisão:', 2, 20, 2, 1)
-
-# Treinar modelo
-model = RandomForestRegressor(
-    n_estimators=n_estimators,
-    max_depth=max_depth,
-    min_samples_split=min_samples_split,
-    random_state=42
+tipo_modelo = st.selectbox(
+    'Família de modelo:',
+    options=list(ESTIMADORES),
+    format_func=lambda tipo: ESTIMADORES[tipo]['nome'],
+    help='O gradient boosting por histogramas e o modelo linear treinam em segundos com milhões de linhas.'
 )
 
-with st.spinner('Treinando o modelo...'):
-    model.fit(X_train, y_train)
-    st.success('Modelo treinado com sucesso!')
+# Ajuste automático: busca aleatória com successive halving em um pool de
+# processos; as pontuações ficam em cache para o mesmo recorte de dados
+def aplicar_ajuste(melhor):
+    for nome in ('n_estimators', 'max_depth', 'min_samples_split'):
+        st.session_state[nome] = melhor[nome]
+
+if tipo_modelo == 'floresta':
+    with st.expander('🔎 Ajuste automático dos hiperparâmetros'):
+        st.write(
+            "Sorteia combinações dos parâmetros abaixo e as avalia em rodadas: todas começam com "
+            "poucas linhas de treino e apenas o melhor terço segue para a rodada seguinte, com o triplo "
+            "de linhas. A pontuação usa uma parte do treino como validação; o conjunto de teste não é usado."
+        )
+        n_configuracoes = st.slider('Combinações sorteadas:', 9, 81, 27, 9)
+        impressao_ajuste = impressao_parametros(impressao_dados, test_size=test_size, busca='successive_halving')
+
+        if st.button('Iniciar busca'):
+            from sklearn.model_selection import train_test_split
+            from farmtech.ajuste import busca_sucessiva
+
+            X_train, _, y_train, _ = train_test_split(
+                X.to_numpy(), y.to_numpy(), test_size=test_size, random_state=42
+            )
+            placar = st.empty()
+            tentativas = []
+            with st.spinner('Buscando hiperparâmetros...'):
+                for tentativa in busca_sucessiva(X_train, y_train, impressao_ajuste, n_configuracoes):
+                    tentativas.append(tentativa)
+                    tabela = pd.DataFrame(tentativas).sort_values(['rodada', 'r2'], ascending=[False, False])
+                    placar.dataframe(tabela, hide_index=True)
+            placar.empty()
+            st.session_state.ajuste = (impressao_ajuste, tabela)
+
+        if st.session_state.get('ajuste', (None,))[0] == impressao_ajuste:
+            tabela = st.session_state.ajuste[1]
+            melhor = tabela.iloc[0]
+            st.write(f"**Melhor combinação** (R² de validação {melhor['r2']:.3f}, {len(tabela)} tentativas, "
+                     f"{int(tabela['em_cache'].sum())} reaproveitadas do cache):")
+            st.dataframe(tabela, hide_index=True)
+            st.button(
+                'Aplicar melhores parâmetros',
+                on_click=aplicar_ajuste,
+                args=({nome: int(melhor[nome]) for nome in ('n_estimators', 'max_depth', 'min_samples_split')},)
+            )
+
+    st.session_state.setdefault('n_estimators', 100)
+    st.session_state.setdefault('max_depth', 10)
+    st.session_state.setdefault('min_samples_split', 2)
+    n_estimators = st.slider('Número de Árvores:', 10, 200, step=10, key='n_estimators')
+    max_depth = st.slider('Profundidade Máxima:', 1, 20, step=1, key='max_depth')
+    min_samples_split = st.slider('Mínimo de Amostras para Divisão:', 2, 20, step=1, key='min_samples_split')
+    parametros = dict(n_estimators=n_estimators, max_depth=max_depth, min_samples_split=min_samples_split)
+    tamanho_ensemble = n_estimators
+elif tipo_modelo == 'gradiente':
+    max_iter = st.slider('Número de Iterações:', 10, 500, 100, 10)
+    learning_rate = st.select_slider('Taxa de Aprendizado:', [0.01, 0.05, 0.1, 0.2, 0.3], value=0.1)
+    max_leaf_nodes = st.slider('Máximo de Folhas por Árvore:', 2, 127, 31, 1)
+    parametros = dict(max_iter=max_iter, learning_rate=learning_rate, max_leaf_nodes=max_leaf_nodes)
+    tamanho_ensemble = max_iter
+else:
+    alpha = st.select_slider('Regularização (alpha):', [0.0, 0.01, 0.1, 1.0, 10.0, 100.0], value=1.0)
+    parametros = dict(alpha=alpha)
+    tamanho_ensemble = 1
+parametros.update(ESTIMADORES[tipo_modelo]['fixos'])
+
+# Reutilizar o modelo se o mesmo recorte de dados e hiperparâmetros já foi treinado
+chave_modelo = impressao_parametros(impressao_dados, test_size=test_size, tipo=tipo_modelo, **parametros)
+# Florestas que diferem apenas no número de árvores formam uma família: uma
+# delas pode ser recortada ou completada em vez de treinar a floresta inteira
+familia_modelo = None
+if tipo_modelo == 'floresta':
+    familia_modelo = impressao_parametros(
+        impressao_dados, test_size=test_size, max_depth=max_depth,
+        min_samples_split=min_samples_split, random_state=42
+    )
+treino = registro_modelos.obter(chave_modelo)
+
+# Numa sessão nova, o primeiro treino espera o clique: a página abre sem
+# importar o scikit-learn. Depois disso, mudar os parâmetros retreina.
+if treino is None and not st.session_state.get('treinar_modelo'):
+    st.info('Escolha as variáveis e os hiperparâmetros e clique em "Treinar modelo".')
+    if not st.button('Treinar modelo', type='primary'):
+        st.stop()
+    st.session_state.treinar_modelo = True
 
-# Avaliar modelo
-y_pred = model.predict(X_test)
-r2 = r2_score(y_test, y_pred)
-rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+if treino is None:
+    # O scikit-learn só é importado quando um modelo precisa ser treinado:
+    # filtros e seleção de variáveis já aparecem enquanto ele carrega
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import r2_score, mean_squared_error
+    from farmtech.estimadores import importancias, latencia_previsao, tamanho_modelo, treinar_estimador
+
+    # Treinar modelo
+    X_train, X_test, y_train, y_test = train_test_split(
+        X.to_numpy(), y.to_numpy(), test_size=test_size, random_state=42
+    )
+    base = None
+    if familia_modelo is not None:
+        base = registro_modelos.obter_base(familia_modelo, tamanho_ensemble)
+
+    with st.spinner('Treinando o modelo...'):
+        barra = st.progress(0.0)
+        inicio_treino = time.perf_counter()
+        model = treinar_estimador(
+            tipo_modelo, X_train, y_train, parametros,
+            modelo_base=base['modelo'] if base is not None else None,
+            progresso=lambda feitas, total: barra.progress(
+                feitas / total, text=f'{feitas}/{total} etapas de treino'
+            )
+        )
+        segundos_treino = time.perf_counter() - inicio_treino
+        barra.empty()
+        st.success('Modelo treinado com sucesso!')
+
+    # Avaliar modelo
+    y_pred = model.predict(X_test)
+    latencia_linha, latencia_lote = latencia_previsao(model, X_test)
+    treino = {
+        'familia': familia_modelo,
+        'tamanho': tamanho_ensemble,
+        'modelo': model,
+        'y_test': y_test,
+        'y_pred': y_pred,
+        'r2': r2_score(y_test, y_pred),
+        'rmse': np.sqrt(mean_squared_error(y_test, y_pred)),
+        'segundos_treino': segundos_treino,
+        'latencia_linha': latencia_linha,
+        'latencia_lote': latencia_lote,
+        'bytes_modelo': tamanho_modelo(model),
+        'importancias': importancias(model, X_test, y_test),
+    }
+    if tipo_modelo == 'floresta':
+        # Versão em arrays planos para previsões de poucas linhas
+        from farmtech.compilacao import compilar
+        compilada = compilar(model)
+        treino['compilada'] = compilada
+        treino['latencia_compilada'] = latencia_previsao(compilada, X_test)
+    registro_modelos.guardar(chave_modelo, treino)
+else:
+    st.success('Modelo reaproveitado do cache de treinamentos.')
+
+model = treino['modelo']
+y_test, y_pred = treino['y_test'], treino['y_pred']
+r2, rmse = treino['r2'], treino['rmse']
 
 # Métricas de avaliação
 st.subheader('Desempenho do Modelo')
@@ -142,6 +282,54 @@ col1, col2 = st.columns(2)
 col1.metric("R² (Coeficiente de Determinação)", f"{r2:.3f}")
 col2.metric("RMSE (Raiz do Erro Quadrático Médio)", f"{rmse:.3f}")
 
+# Custos do modelo
+col1, col2, col3, col4 = st.columns(4)
+bytes_modelo = treino['bytes_modelo']
+col1.metric("Tempo de Treino", f"{treino['segundos_treino']:.3f} s")
+col2.metric("Previsão de 1 Linha", f"{treino['latencia_linha'] * 1e3:.2f} ms")
+col3.metric("Previsão em Lote", f"{treino['latencia_lote'] * 1e6:.2f} µs/linha")
+col4.metric(
+    "Tamanho do Modelo",
+    f"{bytes_modelo / 2**20:.2f} MB" if bytes_modelo >= 2**20 else f"{bytes_modelo / 2**10:.1f} KB"
+)
+
+# Floresta compilada: usada na previsão de uma linha e exportável em .floresta
+compilada = treino.get('compilada')
+if compilada is not None:
+    linha_compilada, lote_compilada = treino['latencia_compilada']
+    st.caption(
+        f"Floresta compilada ({compilada.n_nos} nós em arrays planos, {compilada.nbytes / 2**20:.2f} MB): "
+        f"{linha_compilada * 1e3:.3f} ms por previsão de 1 linha e {lote_compilada * 1e6:.2f} µs/linha em lote."
+    )
+    arquivo_floresta = io.BytesIO()
+    compilada.salvar(arquivo_floresta)
+    st.download_button(
+        'Baixar floresta compilada (.floresta)',
+        arquivo_floresta.getvalue(),
+        file_name=f'floresta_{target_var}.floresta',
+        mime='application/octet-stream'
+    )
+
+# Publicação para o serviço HTTP de previsão (python -m farmtech.servico servir)
+with st.expander('📤 Publicar no serviço de previsão'):
+    nome_publicado = st.text_input('Nome do modelo:', value=f'{target_var}_{tipo_modelo}')
+    if st.button('Publicar modelo'):
+        from farmtech.modelos import publicar_modelo
+        try:
+            publicar_modelo(
+                nome_publicado, compilada if compilada is not None else model,
+                selected_features, target_var, tipo_modelo, {'r2': r2, 'rmse': rmse}
+            )
+        except (ValueError, OSError) as erro:
+            st.error(str(erro))
+        else:
+            st.success(f'Modelo publicado como **{nome_publicado}**; o serviço passa a usá-lo na próxima requisição.')
+            st.code(
+                f"curl -X POST http://localhost:8500/prever/{nome_publicado} "
+                f"-d '{{\"linhas\": [[{', '.join('0' for _ in selected_features)}]]}}'",
+                language='bash'
+            )
+
 # Gráfico de valores reais vs preditos
 st.subheader('Valores Reais vs Preditos')
 fig = go.Figure()
@@ -167,7 +355,7 @@ st.plotly_chart(fig, use_container_width=True)
 
 # Importância das features
 st.subheader('Importância das Features')
-importances = model.feature_importances_
+importances = treino['importancias']
 feature_importance_df = pd.DataFrame({
     'Feature': selected_features,
     'Importância': importances
@@ -208,8 +396,9 @@ for i, feature in enumerate(selected_features):
 
 # Botão de previsão
 if st.button('Realizar Previsão'):
-    input_df = pd.DataFrame([input_data])
-    prediction = model.predict(input_df)[0]
+    # O modelo foi treinado com arrays NumPy, na ordem das features selecionadas
+    input_row = np.array([[input_data[feature] for feature in selected_features]])
+    prediction = (compilada if compilada is not None else model).predict(input_row)[0]
     
     st.success(f"**Previsão de {target_var.replace('_', ' ').title()}:** {prediction:.2f}")
     
@@ -220,4 +409,143 @@ if st.button('Realizar Previsão'):
     
     col1, col2 = st.columns(2)
     col1.metric("Valor Previsto", f"{prediction:.2f}")
-    col2.metric("Valor Médio no Conjunto", f"{avg_value:.2f}", f"{diff:.2f}")
\ No newline at end of file
+    col2.metric("Valor Médio no Conjunto", f"{avg_value:.2f}", f"{diff:.2f}")
+
+# Previsão em lote a partir de um CSV
+st.subheader('Previsão em Lote')
+st.write(
+    f"Envie um arquivo CSV com as colunas **{', '.join(selected_features)}** "
+    "para prever todas as leituras de uma vez."
+)
+arquivo_lote = st.file_uploader('Arquivo CSV com leituras dos sensores:', type='csv')
+
+if arquivo_lote is not None:
+    # O resultado fica na sessão enquanto o arquivo e o modelo forem os mesmos
+    chave_lote = (chave_modelo, arquivo_lote.file_id)
+    if st.session_state.get('previsao_lote', (None,))[0] != chave_lote:
+        saida = io.StringIO()
+        try:
+            with st.spinner('Calculando previsões...'):
+                total = pontuar_csv(
+                    model, arquivo_lote, saida, selected_features,
+                    coluna_saida=f'previsao_{target_var}'
+                )
+        except ValueError as erro:
+            st.error(str(erro))
+            st.stop()
+        st.session_state.previsao_lote = (chave_lote, total, saida.getvalue())
+
+    _, total, resultado_csv = st.session_state.previsao_lote
+    st.success(f'{total} registros pontuados.')
+    st.dataframe(pd.read_csv(io.StringIO(resultado_csv), nrows=100))
+    st.download_button(
+        'Baixar previsões (CSV)',
+        resultado_csv,
+        file_name=f'previsoes_{target_var}.csv',
+        mime='text/csv'
+    )
+
+# ================================================
+# 5. Previsão das Próximas Leituras
+# ================================================
+st.header('5. Previsão das Próximas Leituras')
+st.write(
+    "Em vez de relacionar as variáveis no mesmo instante, este modo usa a ordem das leituras: as features "
+    "de cada instante são as últimas leituras das cinco variáveis e suas médias e desvios-padrão móveis, "
+    f"e o modelo prevê as próximas leituras de **{target_var.replace('_', ' ').title()}**. O teste usa as "
+    "leituras mais recentes do período selecionado; os filtros de faixa de valores não se aplicam, pois "
+    "quebrariam a sequência das leituras."
+)
+col1, col2, col3 = st.columns(3)
+horizonte = col1.slider('Leituras à frente:', 1, 24, 6)
+defasagens = col2.slider('Leituras anteriores por variável:', 1, 12, 3)
+janelas = sorted(col3.multiselect('Janelas móveis (em leituras):', [3, 6, 12, 24, 48], default=[6, 24]))
+
+if st.toggle('Treinar o modelo de previsão', help='Usa a família de modelo e os hiperparâmetros da seção 3.'):
+    from farmtech.series import (
+        cache_features, chave_previsao, divisao_temporal, montar_alvos, nomes_features, preparar_serie
+    )
+
+    # A matriz de features depende só dos dados, das defasagens e das janelas:
+    # mudar o horizonte ou o modelo a reaproveita do cache
+    valores, grupos, tempos = preparar_serie(motor_filtros(df, numeric_columns).aplicar({}, periodo), numeric_columns)
+    inicio_features = time.perf_counter()
+    chave_features, X_serie, posicoes = cache_features.obter(valores, grupos, defasagens, janelas)
+    segundos_features = time.perf_counter() - inicio_features
+    st.caption(
+        f"{X_serie.shape[0]} instantes × {X_serie.shape[1]} features "
+        f"({len(nomes_features(numeric_columns, defasagens, janelas))} por instante) em {segundos_features:.2f} s."
+    )
+
+    chave_serie = chave_previsao(
+        chave_features, alvo=target_var, horizonte=horizonte, test_size=test_size,
+        tipo=tipo_modelo, **parametros
+    )
+    treino_serie = registro_modelos.obter(chave_serie)
+    Y_serie, com_futuro = montar_alvos(valores[:, numeric_columns.index(target_var)], grupos, posicoes, horizonte)
+    if treino_serie is None and com_futuro.sum() < 50:
+        st.warning('Poucas leituras em sequência no período selecionado para treinar o modelo de previsão.')
+    elif treino_serie is None:
+        from sklearn.metrics import r2_score
+        from farmtech.estimadores import treinar_estimador
+
+        X_alvo, posicoes_alvo = X_serie[com_futuro], posicoes[com_futuro]
+        em_treino, em_teste = divisao_temporal(tempos, posicoes_alvo, horizonte, test_size)
+        with st.spinner('Treinando o modelo de previsão...'):
+            inicio_treino = time.perf_counter()
+            modelo_serie = treinar_estimador(
+                tipo_modelo, X_alvo[em_treino],
+                Y_serie[em_treino] if horizonte > 1 else Y_serie[em_treino, 0], parametros
+            )
+            segundos_treino_serie = time.perf_counter() - inicio_treino
+        previsto = modelo_serie.predict(X_alvo[em_teste]).reshape(-1, horizonte)
+
+        # Próximas leituras a partir da leitura mais recente (da placa que a enviou)
+        ultima = int(np.argmax(tempos[posicoes]))
+        placa = np.flatnonzero(grupos == grupos[posicoes[ultima]])
+        cadencia = np.median(np.diff(tempos[placa[-100:]]))
+        historico = placa[-max(4 * horizonte, 48):]
+        treino_serie = {
+            'modelo': modelo_serie,
+            'r2': r2_score(Y_serie[em_teste], previsto),
+            'rmse_passos': np.sqrt(np.mean((previsto - Y_serie[em_teste]) ** 2, axis=0)),
+            'segundos_treino': segundos_treino_serie,
+            'tempos_historico': tempos[historico],
+            'historico': valores[historico, numeric_columns.index(target_var)],
+            'tempos_futuros': tempos[posicoes[ultima]] + cadencia * np.arange(1, horizonte + 1),
+            'futuro': modelo_serie.predict(X_serie[ultima:ultima + 1]).reshape(-1),
+        }
+        registro_modelos.guardar(chave_serie, treino_serie)
+
+    if treino_serie is not None:
+        rmse_passos = treino_serie['rmse_passos']
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("R² (teste, todos os passos)", f"{treino_serie['r2']:.3f}")
+        col2.metric("RMSE da Próxima Leitura", f"{rmse_passos[0]:.3f}")
+        col3.metric("RMSE Médio no Horizonte", f"{rmse_passos.mean():.3f}")
+        col4.metric("Tempo de Treino", f"{treino_serie['segundos_treino']:.3f} s")
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=treino_serie['tempos_historico'], y=treino_serie['historico'],
+            mode='lines+markers', name='Leituras', line=dict(color='royalblue')
+        ))
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([treino_serie['tempos_historico'][-1:], treino_serie['tempos_futuros']]),
+            y=np.concatenate([treino_serie['historico'][-1:], treino_serie['futuro']]),
+            mode='lines+markers', name='Previsão', line=dict(color='red', dash='dash')
+        ))
+        fig.update_layout(
+            title=f'Próximas {horizonte} leituras de {target_var}',
+            xaxis_title='Data',
+            yaxis_title=target_var,
+            showlegend=True
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        fig = px.bar(
+            x=np.arange(1, horizonte + 1), y=rmse_passos,
+            labels={'x': 'Leituras à frente', 'y': 'RMSE'},
+            title='Erro no teste por passo do horizonte'
+        )
+        st.plotly_chart(fig, use_container_width=True)
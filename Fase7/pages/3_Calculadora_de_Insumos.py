@@ -1,36 +1,19 @@
 import streamlit as st
-import math
 import pandas as pd
 
-# Inicializa logs em session_state
-if "logs" not in st.session_state:
-    st.session_state.logs = []
+from farmtech.insumos import (
+    banco_insumos, calcular_insumos_lote, carregar_taxas, resumo_por_cultura, taxas_culturas
+)
+
+# Registros persistentes, com ID estável e compartilhados entre as sessões
+banco = banco_insumos()
 
 st.title("📦 Cálculo e Gerenciamento de Insumos Agrícolas")
 
 st.write("Insira as informacões de qual cultura e área(m²) que deseja cultivar e receba as informações de quantidade de insumos que serão usadas para cada item!")
 
-
-# -----------------------------------------------------------
-# Função para calcular insumos
-# -----------------------------------------------------------
-def calcular_insumos(area, cultura):
-    # Batata: 5L/1m
-    quantidade_insumo_batata_aplicacao = (math.sqrt(area) * 5) / 1000
-    quantidade_insumo_batata_total = quantidade_insumo_batata_aplicacao * 5
-
-    # Morango: 2.5L/1m
-    quantidade_insumo_morango_aplicacao = (math.sqrt(area) * 2.5) / 1000
-    quantidade_insumo_morango_total = quantidade_insumo_morango_aplicacao * 5
-
-    return {
-        "area": area,
-        "cultura": cultura,
-        "quant_insumo_batata": quantidade_insumo_batata_total,
-        "quant_aplicacao_batata": quantidade_insumo_batata_aplicacao,
-        "quant_insumo_morango": quantidade_insumo_morango_total,
-        "quant_aplicacao_morango": quantidade_insumo_morango_aplicacao,
-    }
+# Culturas da tabela de taxas (Batata: 5L/1m, Morango: 2.5L/1m e as registradas)
+culturas = list(taxas_culturas)
 
 
 # -----------------------------------------------------------
@@ -39,13 +22,11 @@ def calcular_insumos(area, cultura):
 st.subheader("➕ Registrar novos dados")
 
 area = st.number_input("Área da plantação (m²)", min_value=1, step=1)
-cultura = st.selectbox("Selecione a cultura", ["Batata", "Morango"])
-cultura_valor = 1 if cultura == "Batata" else 2
+cultura = st.selectbox("Selecione a cultura", culturas)
 
 if st.button("Registrar"):
-    registro = calcular_insumos(area, cultura_valor)
-    st.session_state.logs.append(registro)
-    st.success("Registro adicionado com sucesso!")
+    id_registro = banco.inserir(area, cultura)
+    st.success(f"Registro {id_registro} adicionado com sucesso!")
 
 
 # -----------------------------------------------------------
@@ -53,60 +34,114 @@ if st.button("Registrar"):
 # -----------------------------------------------------------
 st.subheader("📋 Registros cadastrados")
 
-if len(st.session_state.logs) == 0:
+total_registros = banco.contar()
+
+if total_registros == 0:
     st.info("Nenhum registro cadastrado ainda.")
 else:
-    df = pd.DataFrame(st.session_state.logs)
-    df["cultura"] = df["cultura"].map({1: "Batata", 2: "Morango"})
+    tamanho_pagina = st.selectbox("Registros por página", [25, 50, 100, 500], index=1)
+    total_paginas = (total_registros + tamanho_pagina - 1) // tamanho_pagina
+
+    # Paginação por chave: a sessão guarda o último ID antes de cada página visitada
+    if st.session_state.get("insumos_tamanho") != tamanho_pagina:
+        st.session_state.insumos_tamanho = tamanho_pagina
+        st.session_state.insumos_cursores = [0]
+    cursores = st.session_state.insumos_cursores
+
+    # Só a página visível é lida do banco e calculada (uma linha a mais indica se há próxima)
+    df = banco.pagina(cursores[-1], tamanho_pagina + 1)
+    while df.empty and len(cursores) > 1:
+        # Registros da página removidos: volta para a anterior
+        cursores.pop()
+        df = banco.pagina(cursores[-1], tamanho_pagina + 1)
+    tem_proxima = len(df) > tamanho_pagina
+    df = df.iloc[:tamanho_pagina]
+
+    col_anterior, col_posicao, col_proxima = st.columns([1, 2, 1])
+    col_anterior.button("◀ Anterior", disabled=len(cursores) == 1, on_click=cursores.pop)
+    col_posicao.write(f"Página {len(cursores)} de {max(total_paginas, len(cursores))}")
+    col_proxima.button(
+        "Próxima ▶", disabled=not tem_proxima, on_click=cursores.append, args=(int(df["id"].iloc[-1]),)
+    )
+
+    quantidades = calcular_insumos_lote(df[["area"]])
+    df = pd.concat([df, quantidades.drop(columns="area")], axis=1).set_index("id")
     st.dataframe(df)
+    st.caption(f"{total_registros} registros no total.")
 
 
-# -----------------------------------------------------------
-# Atualização de registros
-# -----------------------------------------------------------
 # -----------------------------------------------------------
 # Atualização de registros
 # -----------------------------------------------------------
 st.subheader("✏ Atualizar um registro")
 
-if len(st.session_state.logs) > 0:
-    idx_atualizar = st.number_input(
-        "Número do registro para atualizar",
-        min_value=0,
-        max_value=len(st.session_state.logs) - 1,
-        step=1,
-    )
+if total_registros > 0:
+    id_atualizar = st.number_input("ID do registro para atualizar", min_value=1, step=1)
 
     nova_area = st.number_input("Nova área (m²)", min_value=1, step=1)
     nova_cultura = st.selectbox(
         "Nova cultura",
-        ["Batata", "Morango"],
+        culturas,
         key="atualizar"
     )
-    nova_cultura_valor = 1 if nova_cultura == "Batata" else 2
 
     if st.button("Atualizar registro"):
-        novo = calcular_insumos(nova_area, nova_cultura_valor)
-        st.session_state.logs[idx_atualizar] = novo
-        st.success(f"Registro {idx_atualizar} atualizado com sucesso!")
-        st.rerun()   
+        if banco.atualizar(id_atualizar, nova_area, nova_cultura):
+            st.success(f"Registro {id_atualizar} atualizado com sucesso!")
+            st.rerun()
+        else:
+            st.error(f"Registro {id_atualizar} não encontrado.")
 
 # -----------------------------------------------------------
 # Remover registros
 # -----------------------------------------------------------
 st.subheader("🗑 Remover um registro")
 
-if len(st.session_state.logs) > 0:
-    idx_remover = st.number_input(
-        "Número do registro para remover",
-        min_value=0,
-        max_value=len(st.session_state.logs) - 1,
+if total_registros > 0:
+    id_remover = st.number_input(
+        "ID do registro para remover",
+        min_value=1,
         step=1,
         key="remover"
     )
 
     if st.button("Remover registro"):
-        st.session_state.logs.pop(idx_remover)
-        st.success("Registro removido com sucesso!")
-        st.rerun()
+        if banco.remover(id_remover):
+            st.success("Registro removido com sucesso!")
+            st.rerun()
+        else:
+            st.error(f"Registro {id_remover} não encontrado.")
+
 
+# -----------------------------------------------------------
+# Cálculo em lote
+# -----------------------------------------------------------
+st.subheader("📑 Cálculo em lote")
+
+st.write("Envie um CSV com a coluna **area** (m²) e, opcionalmente, **cultura** (nome ou código 1, 2...) para calcular os insumos de todas as plantações de uma vez. Uma tabela de taxas com as colunas **cultura**, **taxa** (L/1m) e **aplicacoes** permite usar outras culturas.")
+
+arquivo_plantacoes = st.file_uploader("Plantações (CSV)", type="csv", key="plantacoes")
+arquivo_taxas = st.file_uploader("Tabela de taxas (CSV, opcional)", type="csv", key="taxas")
+
+if arquivo_plantacoes is not None:
+    try:
+        taxas = None
+        if arquivo_taxas is not None:
+            taxas = {**taxas_culturas, **carregar_taxas(arquivo_taxas)}
+        resultado = calcular_insumos_lote(pd.read_csv(arquivo_plantacoes), taxas)
+    except (ValueError, pd.errors.ParserError) as erro:
+        st.error(f"Não foi possível calcular o lote: {erro}")
+    else:
+        st.write(f"**{len(resultado)}** plantações calculadas.")
+        if "cultura" in resultado.columns:
+            st.dataframe(resumo_por_cultura(resultado))
+        st.dataframe(resultado.head(1000))
+        st.download_button(
+            "Baixar resultado (CSV)",
+            resultado.to_csv(index=False).encode("utf-8"),
+            file_name="insumos_lote.csv",
+            mime="text/csv",
+        )
+        if "cultura" in resultado.columns and st.button("Salvar plantações nos registros"):
+            validas = resultado.dropna(subset=["area", "cultura"])
+            st.success(f"{banco.inserir_lote(validas)} registros adicionados.")
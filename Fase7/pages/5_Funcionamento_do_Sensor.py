@@ -69,31 +69,15 @@ log,68.32,92.14,5.89,23.55,35.7
 with st.expander('⚡Circuito'):
     st.image('imagens/Circuito_Wokwi.png', caption='Diagrama de Circuito simulado no Wokwi')
 
-import streamlit as st
-import requests
+from farmtech.alertas import cliente_alertas
 
 # --------------------------------------------
 # Função para disparar alerta via API Gateway
 # --------------------------------------------
 def disparar_alerta(mensagem: str):
-    url = "https://nhcefqu3vh.execute-api.sa-east-1.amazonaws.com/disparos"
-
-    payload = {"mensagem": mensagem}
-    headers = {"Content-Type": "application/json"}
-
-    try:
-        response = requests.post(url, json=payload, headers=headers)
-
-        return {
-            "status": response.status_code,
-            "body": response.text
-        }
-
-    except requests.exceptions.RequestException as e:
-        return {
-            "status": "erro",
-            "body": str(e)
-        }
+    # O envio acontece em segundo plano (com retry e agrupamento de rajadas);
+    # o retorno é um Future com {"status": ..., "body": ...}
+    return cliente_alertas().enviar(mensagem)
 
 
 # --------------------------------------------
@@ -105,15 +89,37 @@ st.write("Preencha a mensagem abaixo e clique em **Enviar alerta** para disparar
 # Entrada da mensagem
 mensagem = st.text_area("Mensagem do alerta", height=150)
 
+if 'alertas_enviados' not in st.session_state:
+    st.session_state['alertas_enviados'] = []
+
 # Botão para enviar alerta
 if st.button("Enviar alerta"):
     if not mensagem.strip():
         st.error("Por favor, escreva uma mensagem antes de enviar.")
     else:
-        with st.spinner("Enviando alerta para a API..."):
-            resultado = disparar_alerta(mensagem)
-
-        # Exibe resultado
-        st.subheader("📡 Resultado da API")
-        st.write(f"**Status:** {resultado['status']}")
+        st.session_state['alertas_enviados'].insert(0, (mensagem, disparar_alerta(mensagem)))
+        del st.session_state['alertas_enviados'][10:]
+        st.toast("Alerta enfileirado para envio.")
+
+alertas_enviados = st.session_state['alertas_enviados']
+pendentes = any(not futuro.done() for _, futuro in alertas_enviados)
+
+
+# Atualiza apenas este trecho enquanto houver alertas na fila
+@st.fragment(run_every=1 if pendentes else None)
+def exibir_resultados():
+    if not alertas_enviados:
+        return
+    st.subheader("📡 Resultado da API")
+    for texto, futuro in alertas_enviados:
+        if not futuro.done():
+            st.write(f"**Status:** na fila — {texto[:60]}")
+            continue
+        resultado = futuro.result()
+        st.write(f"**Status:** {resultado['status']} — {texto[:60]}")
         st.code(resultado["body"], language="json")
+    if pendentes and all(futuro.done() for _, futuro in alertas_enviados):
+        st.rerun()
+
+
+exibir_resultados()
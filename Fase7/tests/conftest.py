@@ -0,0 +1,11 @@
+# conftest.py
+# Os testes usam caches em disco temporários, nunca o .cache da aplicação.
+import pytest
+
+from farmtech import dados
+
+
+@pytest.fixture(autouse=True)
+def cache_isolado(tmp_path, monkeypatch):
+    monkeypatch.setattr(dados, 'DIRETORIO_CACHE', str(tmp_path / 'cache'))
+    monkeypatch.setattr(dados, '_conjuntos', {})
@@ -0,0 +1,62 @@
+# test_ajuste.py
+# Ajuste automático: a limpeza do disco não remove o recorte de uma busca
+# em andamento (desta ou de outra sessão).
+import os
+import time
+
+import numpy as np
+
+from farmtech import ajuste
+from farmtech.ajuste import CacheTentativas, busca_sucessiva
+
+
+def _dados(semente):
+    rng = np.random.default_rng(semente)
+    X = rng.normal(size=(300, 3))
+    return X, X @ [1.0, 2.0, -1.0] + rng.normal(size=300)
+
+
+def _recortes(diretorio):
+    return sorted(nome for nome in os.listdir(diretorio) if os.path.isdir(os.path.join(diretorio, nome)))
+
+
+def test_limpeza_preserva_recortes_marcados(tmp_path):
+    diretorio = str(tmp_path)
+    ajuste._marcar(os.path.join(diretorio, 'a'))
+    # Marcador de uma busca interrompida há muito tempo não segura o recorte
+    antigo = ajuste._marcar(os.path.join(diretorio, 'b'))
+    os.utime(antigo, (time.time() - 2 * ajuste.VALIDADE_MARCADOR,) * 2)
+    for i, nome in enumerate(['a', 'b', 'c', 'd']):
+        os.makedirs(os.path.join(diretorio, nome), exist_ok=True)
+        os.utime(os.path.join(diretorio, nome), (1000 + i, 1000 + i))
+
+    ajuste._limpar_disco(diretorio, limite=1)
+    assert _recortes(diretorio) == ['a', 'd']
+
+
+def test_busca_nao_remove_o_recorte_de_outra_em_andamento(tmp_path):
+    diretorio = str(tmp_path / 'ajuste')
+    cache = CacheTentativas(diretorio)
+    X, y = _dados(0)
+    primeira = busca_sucessiva(X, y, 'recorte_1', n_configuracoes=1, cache=cache, diretorio=diretorio,
+                               limite_disco=1)
+    tentativa = next(primeira)
+    assert tentativa['em_cache'] is False
+    marcadores = [n for n in os.listdir(os.path.join(diretorio, 'recorte_1')) if n.startswith(ajuste.PREFIXO_MARCADOR)]
+    assert len(marcadores) == 1
+
+    # Outra sessão começa (e termina) uma busca com limite de um recorte em disco
+    X2, y2 = _dados(1)
+    list(busca_sucessiva(X2, y2, 'recorte_2', n_configuracoes=1, cache=cache, diretorio=diretorio, limite_disco=1))
+    assert _recortes(diretorio) == ['recorte_1', 'recorte_2']
+
+    # A primeira termina normalmente e libera o seu recorte
+    list(primeira)
+    assert not any(n.startswith(ajuste.PREFIXO_MARCADOR) for n in os.listdir(os.path.join(diretorio, 'recorte_1')))
+    os.utime(os.path.join(diretorio, 'recorte_1'), (1000, 1000))
+    list(busca_sucessiva(X2, y2, 'recorte_2', n_configuracoes=1, cache=cache, diretorio=diretorio, limite_disco=1))
+    assert _recortes(diretorio) == ['recorte_2']
+
+    # Repetir a busca no mesmo recorte usa o cache, sem treinar
+    assert all(t['em_cache'] for t in busca_sucessiva(X2, y2, 'recorte_2', n_configuracoes=1, cache=cache,
+                                                      diretorio=diretorio, limite_disco=1))
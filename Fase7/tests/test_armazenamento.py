@@ -0,0 +1,112 @@
+# test_armazenamento.py
+# Banco de sensores: texto de data e hora gravado, índice de tempo das
+# partições, consultas por intervalo e rollups com lotes sobrepostos.
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from farmtech.armazenamento import CONSULTA_PARTICAO, BancoSensores, _limite, _separar_data_hora
+from farmtech.configuracao import COLUNA_TEMPO, COLUNAS_NUMERICAS
+
+
+def _leituras(n, inicio='2025-06-30 22:00', passo='7min', semente=0):
+    rng = np.random.default_rng(semente)
+    df = pd.DataFrame({COLUNA_TEMPO: pd.date_range(inicio, periods=n, freq=passo)})
+    for col in COLUNAS_NUMERICAS:
+        df[col] = rng.uniform(1, 90, n).round(2)
+    return df
+
+
+def test_texto_de_data_e_hora():
+    tempo = np.array(['2025-06-19T10:00:00', '2025-06-19T10:00:00.000001', '2025-06-19T10:00:00.5',
+                      '2025-06-19T23:59:59.120000'], dtype='datetime64[ns]')
+    data, hora = _separar_data_hora(tempo)
+    assert data.tolist() == ['2025-06-19'] * 4
+    assert hora.tolist() == ['10:00:00', '10:00:00.000001', '10:00:00.5', '23:59:59.12']
+    # A ordem do texto é a ordem do tempo
+    assert sorted(hora.tolist()) == hora.tolist()
+
+
+def test_consulta_por_intervalo_usa_o_indice_de_tempo(tmp_path):
+    banco = BancoSensores(str(tmp_path / 'sensores.db'))
+    df = _leituras(2000)
+    banco.inserir_dataframe(df, cd_servidor=1)
+    p = banco.particoes()[0]
+    consulta = (CONSULTA_PARTICAO.format(p=p)
+                + ' WHERE (u.data_umidade, u.hora_umidade) >= (?, ?) AND (u.data_umidade, u.hora_umidade) <= (?, ?)')
+    plano = banco._conexao().execute('EXPLAIN QUERY PLAN ' + consulta,
+                                     _limite('2025-06-30 23:00') + _limite('2025-07-01')).fetchall()
+    assert f'USING INDEX ix_sensor_umidade_{p}_tempo' in plano[0][-1]
+
+    inicio, fim = df[COLUNA_TEMPO].iloc[5], df[COLUNA_TEMPO].iloc[900]
+    obtido = banco.consultar(inicio, fim)
+    esperado = df[(df[COLUNA_TEMPO] >= inicio) & (df[COLUNA_TEMPO] <= fim)]
+    assert obtido[COLUNA_TEMPO].tolist() == esperado[COLUNA_TEMPO].tolist()
+
+
+def test_banco_antigo_ganha_o_indice_de_tempo(tmp_path):
+    caminho = str(tmp_path / 'sensores.db')
+    BancoSensores(caminho).inserir_dataframe(_leituras(100), cd_servidor=1)
+    con = sqlite3.connect(caminho)
+    indices = [nome for (nome,) in con.execute("SELECT name FROM sqlite_master WHERE name LIKE '%_tempo'")]
+    for nome in indices:
+        con.execute(f'DROP INDEX {nome}')
+    con.commit()
+    con.close()
+    assert len(indices) == 2  # junho e julho
+
+    BancoSensores(caminho)
+    con = sqlite3.connect(caminho)
+    assert sorted(nome for (nome,) in con.execute("SELECT name FROM sqlite_master WHERE name LIKE '%_tempo'")) \
+        == sorted(indices)
+    con.close()
+
+
+# -----------------------------------------------------------
+# Rollups
+# -----------------------------------------------------------
+def _lotes_sobrepostos():
+    """Lotes de duas placas que repetem leituras (mesmo servidor e horário) com outros valores."""
+    base = _leituras(3000, inicio='2025-06-29 20:00', passo='53s', semente=1)
+    base.loc[np.random.default_rng(2).random(len(base)) < 0.03, 'ph'] = np.nan
+    base['cd_servidor'] = np.where(np.arange(len(base)) % 3 == 0, 2, 1)
+    lotes = [base.iloc[:1200], base.iloc[800:2000], base.iloc[1500:3000], base.iloc[100:400]]
+    repetidos = []
+    for i, lote in enumerate(lotes):
+        lote = lote.copy()
+        lote[COLUNAS_NUMERICAS] = lote[COLUNAS_NUMERICAS] + i  # a repetição traz outros valores
+        repetidos.append(lote)
+    # Um lote com uma leitura repetida dentro dele mesmo
+    repetidos.append(pd.concat([base.iloc[[2999]], base.iloc[[2999]]]).assign(**{COLUNA_TEMPO: pd.Timestamp('2025-07-05')}))
+    return repetidos
+
+
+def _rollup_esperado(aceitas, resolucao):
+    bloco = aceitas[COLUNA_TEMPO].dt.floor({'hora': 'h', 'dia': 'D'}[resolucao])
+    grupos = aceitas.groupby([bloco.rename('inicio'), 'cd_servidor'])[COLUNAS_NUMERICAS]
+    partes = {'n': grupos.count(), 'soma': grupos.sum(), 'min': grupos.min(), 'max': grupos.max()}
+    esperado = pd.DataFrame({f'{e}_{col}': partes[e][col] for col in COLUNAS_NUMERICAS for e in partes})
+    return esperado.reset_index()
+
+
+def test_rollups_iguais_ao_groupby_das_leituras_aceitas(tmp_path):
+    banco = BancoSensores(str(tmp_path / 'sensores.db'))
+    lotes = _lotes_sobrepostos()
+    inseridas = sum(banco.inserir_dataframe(lote) for lote in lotes)
+
+    # O índice único mantém a primeira leitura de cada (servidor, horário)
+    aceitas = pd.concat(lotes, ignore_index=True).drop_duplicates([COLUNA_TEMPO, 'cd_servidor'], keep='first')
+    assert inseridas == len(aceitas) == len(banco.consultar())
+
+    for resolucao in ('hora', 'dia'):
+        esperado = _rollup_esperado(aceitas, resolucao)
+        obtido = banco.consultar_rollup(resolucao)
+        pd.testing.assert_frame_equal(obtido[esperado.columns], esperado, check_dtype=False, rtol=1e-12)
+
+    # Recalcular a partir das leituras gravadas dá os mesmos blocos
+    antes = {r: banco.consultar_rollup(r) for r in ('hora', 'dia')}
+    banco.reconstruir_rollups()
+    for resolucao, tabela in antes.items():
+        # As leituras relidas do banco vêm em float32
+        pd.testing.assert_frame_equal(banco.consultar_rollup(resolucao), tabela, rtol=1e-6)
@@ -0,0 +1,74 @@
+# test_compilacao.py
+# A floresta compilada dá as mesmas previsões que o RandomForestRegressor,
+# inclusive em entradas exatamente sobre os limiares e com valores ausentes,
+# antes e depois de gravada e reaberta com mmap.
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from farmtech.compilacao import FlorestaCompilada, carregar_floresta, compilar
+
+
+@pytest.fixture(scope='module')
+def floresta():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 4)).astype(np.float32)
+    # Valores repetidos geram limiares no meio de dois float32 vizinhos
+    X[:, 3] = np.round(X[:, 3], 1)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    y = np.nan_to_num(X[:, 0]) * 2 + np.nan_to_num(X[:, 1]) ** 2 + rng.normal(size=len(X))
+    return RandomForestRegressor(n_estimators=15, max_depth=8, random_state=0).fit(X, y)
+
+
+def _entradas(modelo):
+    """Linhas aleatórias e linhas sobre cada limiar (e seus vizinhos float32)."""
+    rng = np.random.default_rng(1)
+    aleatorias = rng.normal(size=(500, 4)).astype(np.float32)
+    aleatorias[rng.random(aleatorias.shape) < 0.1] = np.nan
+    limites = []
+    for estimador in modelo.estimators_:
+        arvore = estimador.tree_
+        internos = arvore.children_left != -1
+        for feature, limiar in zip(arvore.feature[internos], arvore.threshold[internos]):
+            if not np.isfinite(limiar):
+                continue  # divisão só entre ausentes e presentes
+            base = np.float32(limiar)
+            for valor in (np.nextafter(base, np.float32(-np.inf)), base, np.nextafter(base, np.float32(np.inf))):
+                linha = rng.normal(size=4).astype(np.float32)
+                linha[feature] = valor
+                limites.append(linha)
+    return np.vstack([aleatorias, np.array(limites)])
+
+
+def _conferir(compilada, modelo, X):
+    esperado = modelo.predict(X)
+    np.testing.assert_allclose(compilada.predict(X), esperado, rtol=1e-12)
+    np.testing.assert_allclose(compilada.predict(X, tamanho_bloco=7), esperado, rtol=1e-12)
+    for linha, valor in zip(X[:300], esperado[:300]):
+        assert compilada.prever_linha(linha) == pytest.approx(valor, rel=1e-12)
+
+
+def test_previsoes_iguais_as_do_scikit_learn(floresta):
+    X = _entradas(floresta)
+    assert len(X) > 1000
+    _conferir(compilar(floresta), floresta, X)
+
+
+def test_previsoes_iguais_depois_de_gravar_e_abrir_com_mmap(floresta, tmp_path):
+    X = _entradas(floresta)
+    caminho = str(tmp_path / 'modelo.floresta')
+    compilar(floresta).salvar(caminho)
+    carregada = carregar_floresta(caminho)
+    assert carregada._buffer is not None
+    _conferir(carregada, floresta, X)
+
+    # Serializada (ex.: para outro processo), vira uma cópia em memória
+    copia = FlorestaCompilada(*carregada.__reduce__()[1])
+    _conferir(copia, floresta, X[:200])
+
+
+def test_arquivo_invalido(tmp_path):
+    caminho = tmp_path / 'modelo.floresta'
+    caminho.write_bytes(b'nao e floresta')
+    with pytest.raises(ValueError):
+        carregar_floresta(str(caminho))
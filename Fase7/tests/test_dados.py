@@ -0,0 +1,136 @@
+# test_dados.py
+# Carregamento do CSV: carga fria, recarga pelo cache .npy, trecho anexado
+# e invalidação do cache quando o arquivo é reescrito ou truncado; anexação
+# fora de ordem no CSV e sincronização incremental do ConjuntoBanco.
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from farmtech import dados
+from farmtech.configuracao import CAMINHO_CSV, COLUNA_TEMPO
+
+LINHAS = open(CAMINHO_CSV, encoding='utf-8').read().splitlines(keepends=True)
+CABECALHO, CORPO = LINHAS[0], LINHAS[1:]
+
+
+def _gravar(caminho, linhas, modo='w'):
+    with open(caminho, modo, encoding='utf-8') as f:
+        f.writelines(linhas)
+
+
+def _referencia(caminho):
+    df = pd.read_csv(caminho)
+    df[COLUNA_TEMPO] = pd.to_datetime(df[COLUNA_TEMPO])
+    return df.sort_values(COLUNA_TEMPO, kind='stable', ignore_index=True)
+
+
+def _conferir(df, caminho):
+    esperado = _referencia(caminho)
+    assert list(df.columns) == list(esperado.columns)
+    assert len(df) == len(esperado)
+    np.testing.assert_array_equal(df[COLUNA_TEMPO].to_numpy(), esperado[COLUNA_TEMPO].to_numpy('datetime64[ns]'))
+    for col in esperado.columns.drop(COLUNA_TEMPO):
+        np.testing.assert_array_equal(df[col].to_numpy(), esperado[col].to_numpy(np.float32))
+
+
+def _sem_parse(monkeypatch):
+    """Falha o teste se o CSV for lido do início."""
+    original = dados._ler_trecho
+
+    def ler(caminho, inicio, cabecalho=None):
+        assert inicio > 0, 'CSV relido do início'
+        return original(caminho, inicio, cabecalho)
+
+    monkeypatch.setattr(dados, '_ler_trecho', ler)
+
+
+@pytest.fixture
+def csv(tmp_path):
+    caminho = str(tmp_path / 'sensores.csv')
+    _gravar(caminho, [CABECALHO] + CORPO[:1000])
+    return caminho
+
+
+def test_carga_fria_cache_e_anexacao(csv, monkeypatch):
+    conjunto = dados.ConjuntoDados(csv)
+    _conferir(conjunto.sincronizar(), csv)
+    assert os.path.exists(os.path.join(dados._diretorio_cache(csv), 'meta.json'))
+
+    # Novo processo: as colunas vêm do cache em disco, sem parse do CSV
+    with monkeypatch.context() as m:
+        _sem_parse(m)
+        _conferir(dados.ConjuntoDados(csv).sincronizar(), csv)
+
+    # Linhas anexadas: só o trecho novo é lido, no mesmo conjunto e num novo
+    _gravar(csv, CORPO[1000:1500], modo='a')
+    with monkeypatch.context() as m:
+        _sem_parse(m)
+        _conferir(conjunto.sincronizar(), csv)
+        _conferir(dados.ConjuntoDados(csv).sincronizar(), csv)
+
+
+def test_mesmo_conteudo_com_novo_mtime_usa_o_cache(csv, monkeypatch):
+    dados.ConjuntoDados(csv).sincronizar()
+    os.utime(csv, ns=(1, 1))
+    with monkeypatch.context() as m:
+        _sem_parse(m)
+        _conferir(dados.ConjuntoDados(csv).sincronizar(), csv)
+
+
+def _reescrever(caminho):
+    # Mesmo tamanho, valores diferentes (troca 2 por 3 numa leitura do meio)
+    linhas = [CABECALHO] + CORPO[:1000]
+    linhas[500] = linhas[500][:20] + linhas[500][20:].replace('2', '3')
+    assert linhas[500] != CORPO[499]
+    _gravar(caminho, linhas)
+
+
+@pytest.mark.parametrize('alterar', [
+    _reescrever,
+    lambda caminho: _gravar(caminho, [CABECALHO] + CORPO[:600]),
+    lambda caminho: _gravar(caminho, [CABECALHO] + CORPO[:600] + CORPO[1200:1800]),
+], ids=['reescrito', 'truncado', 'truncado_e_crescido'])
+def test_arquivo_alterado_invalida_o_cache(csv, alterar):
+    conjunto = dados.ConjuntoDados(csv)
+    conjunto.sincronizar()
+    alterar(csv)
+    # O conjunto em memória e um novo (que encontra o cache em disco) relêem o arquivo
+    _conferir(conjunto.sincronizar(), csv)
+    _conferir(dados.ConjuntoDados(csv).sincronizar(), csv)
+
+
+# -----------------------------------------------------------
+# Anexação incremental (CSV e banco)
+# -----------------------------------------------------------
+def test_anexacao_fora_de_ordem_e_linha_parcial(csv):
+    conjunto = dados.ConjuntoDados(csv)
+    conjunto.sincronizar()
+    # Leituras antigas chegando depois e uma última linha ainda sem quebra
+    _gravar(csv, CORPO[200:210] + [CORPO[1000].rstrip('\n')], modo='a')
+    _conferir(conjunto.sincronizar(), csv)
+    _gravar(csv, ['\n'] + CORPO[1001:1100], modo='a')
+    _conferir(conjunto.sincronizar(), csv)
+    assert conjunto.resumo.contagem == len(conjunto.df)
+
+
+def test_conjunto_banco_sincroniza_so_as_novas(tmp_path):
+    banco = dados.BancoSensores(str(tmp_path / 'sensores.db'))
+    original = _referencia(CAMINHO_CSV)
+    banco.inserir_dataframe(original.iloc[:800], cd_servidor=1)
+    conjunto = dados.ConjuntoBanco(banco)
+    pd.testing.assert_frame_equal(conjunto.sincronizar(), banco.consultar().drop(columns='codigo'))
+
+    lidas = []
+    consultar_desde = banco.consultar_desde
+    banco.consultar_desde = lambda codigo, ate=None: lidas.append(codigo) or consultar_desde(codigo, ate)
+    banco.inserir_dataframe(original.iloc[800:1000], cd_servidor=2)
+    df = conjunto.sincronizar()
+    assert lidas == [800]
+    pd.testing.assert_frame_equal(df, banco.consultar().drop(columns='codigo'))
+    assert conjunto.resumo.contagem == 1000
+
+    # Sem inserções, nada é consultado
+    conjunto.sincronizar()
+    assert lidas == [800]
@@ -0,0 +1,117 @@
+# test_estatisticas.py
+# Estatísticas incrementais contra o pandas: combinação de Welford/Chan,
+# correlação, erro do esboço de quantis e médias por faixa de pH, com os
+# dados chegando em vários lotes.
+import numpy as np
+import pandas as pd
+import pytest
+
+from farmtech.estatisticas import EsbocoQuantis, EstatisticasIncrementais
+
+COLUNAS = ['ph', 'temperatura_c', 'umidade_percent']
+
+
+def _dados(n=20000, semente=0):
+    rng = np.random.default_rng(semente)
+    ph = rng.normal(6.5, 0.6, n)
+    df = pd.DataFrame({
+        'ph': ph,
+        'temperatura_c': 20 + 2 * ph + rng.normal(0, 1, n),
+        # Deriva ao longo do tempo: os últimos lotes saem da faixa dos primeiros
+        'umidade_percent': 60 - 5 * ph + np.linspace(0, 300, n) + rng.normal(0, 3, n),
+    })
+    df.loc[rng.random(n) < 0.02, 'temperatura_c'] = np.nan
+    return df
+
+
+def _lotes(df, cortes=(1, 50, 51, 3000, 12000)):
+    limites = [0, *cortes, len(df)]
+    return [df.iloc[a:b] for a, b in zip(limites[:-1], limites[1:])]
+
+
+@pytest.fixture(scope='module')
+def df():
+    return _dados()
+
+
+@pytest.fixture(scope='module')
+def estatisticas(df):
+    estatisticas = EstatisticasIncrementais(COLUNAS)
+    for lote in _lotes(df):
+        estatisticas.atualizar(lote)
+    return estatisticas
+
+
+def test_momentos_iguais_aos_do_pandas(df, estatisticas):
+    completas = df.dropna()
+    assert estatisticas.n == len(completas)
+    np.testing.assert_allclose(estatisticas.media, completas.mean().to_numpy(), rtol=1e-12)
+    pd.testing.assert_series_equal(estatisticas.variancia(), completas.var(), rtol=1e-10)
+    pd.testing.assert_frame_equal(estatisticas.correlacao(), completas.corr(), rtol=1e-10)
+    assert estatisticas.correlacao_par('ph', 'umidade_percent') == pytest.approx(
+        completas['ph'].corr(completas['umidade_percent']), rel=1e-10)
+
+
+def test_ordem_dos_lotes_nao_muda_o_resultado(df, estatisticas):
+    invertida = EstatisticasIncrementais(COLUNAS)
+    for lote in reversed(_lotes(df, cortes=(7, 8000))):
+        invertida.atualizar(lote)
+    pd.testing.assert_frame_equal(invertida.correlacao(), estatisticas.correlacao(), rtol=1e-10)
+    np.testing.assert_allclose(invertida.comomentos, estatisticas.comomentos, rtol=1e-9)
+
+
+@pytest.mark.parametrize('coluna', COLUNAS)
+def test_erro_dos_quantis_limitado_por_um_bin(df, estatisticas, coluna):
+    completas = df.dropna()[coluna]
+    esboco = estatisticas.esbocos[coluna]
+    assert esboco.contagem == len(completas)
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        assert abs(esboco.quantil(q) - completas.quantile(q)) <= esboco.largura, q
+
+
+def test_esboco_dobra_a_faixa_para_os_dois_lados():
+    esboco = EsbocoQuantis(n_bins=64)
+    valores = np.random.default_rng(1).uniform(0, 1, 5000)
+    esboco.atualizar(valores[:100] * 0.01 + 0.5)
+    largura = esboco.largura
+    esboco.atualizar(valores[100:] * 100 - 50)
+    assert esboco.largura > largura
+    assert esboco.contagem == 5000
+    todos = np.concatenate([valores[:100] * 0.01 + 0.5, valores[100:] * 100 - 50])
+    for q in (0.05, 0.5, 0.95):
+        assert abs(esboco.quantil(q) - np.quantile(todos, q)) <= esboco.largura
+
+
+def _medias_pd_cut(df, colunas):
+    completas = df.dropna()
+    ph = completas['ph']
+    faixa = pd.cut(ph, bins=[ph.min(), ph.median(), ph.max()], labels=['Baixo', 'Alto'], include_lowest=True)
+    return completas.groupby(faixa, observed=False)[colunas].mean()
+
+
+@pytest.mark.parametrize('semente', [0, 1, 2])
+def test_medias_por_faixa_com_empates_na_mediana(semente):
+    # pH com uma casa decimal, como no sensor: grandes grupos empatados na
+    # mediana, que pode cair em qualquer ponto do seu bin
+    df = _dados(semente=semente)
+    df['ph'] = df['ph'].round(1)
+    estatisticas = EstatisticasIncrementais(COLUNAS)
+    for lote in _lotes(df):
+        estatisticas.atualizar(lote)
+    colunas = ['temperatura_c', 'umidade_percent']
+    esperado = _medias_pd_cut(df, colunas)
+    assert (df['ph'] == df['ph'].median()).sum() > 1000
+    obtido = estatisticas.medias_por_faixa(colunas)
+    np.testing.assert_allclose(obtido.to_numpy(), esperado.to_numpy(), rtol=1e-10)
+
+
+def test_medias_por_faixa_em_valores_continuos(df, estatisticas):
+    # Sem empates, só os valores a menos de um bin da mediana podem mudar de faixa
+    colunas = ['temperatura_c', 'umidade_percent']
+    esperado = _medias_pd_cut(df, colunas)
+    esboco = estatisticas.esbocos['ph']
+    ph = df.dropna()['ph']
+    perto = (abs(ph - ph.median()) <= esboco.largura).sum()
+    assert perto < len(ph) * 0.005
+    obtido = estatisticas.medias_por_faixa(colunas)
+    np.testing.assert_allclose(obtido.to_numpy(), esperado.to_numpy(), rtol=perto * 4 / len(ph))
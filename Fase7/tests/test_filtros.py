@@ -0,0 +1,77 @@
+# test_filtros.py
+# O motor de filtros devolve as mesmas linhas que o filtro encadeado do
+# pandas: limites inclusivos, valores ausentes, faixas vazias e períodos
+# abertos.
+import numpy as np
+import pandas as pd
+import pytest
+
+from farmtech.filtros import MotorFiltros
+
+COLUNAS = ['a', 'b', 'c']
+
+
+@pytest.fixture(scope='module')
+def df():
+    rng = np.random.default_rng(3)
+    n = 2000
+    dados = pd.DataFrame({
+        'timestamp': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 30 * 86400, n)), unit='s'),
+        # Valores com uma casa decimal: muitos empates exatamente sobre os limites
+        'a': rng.normal(50, 10, n).round(1).astype(np.float32),
+        'b': rng.integers(0, 20, n).astype(np.float32),
+        'c': rng.uniform(0, 1, n).astype(np.float32),
+    })
+    dados.loc[rng.random(n) < 0.05, 'a'] = np.nan
+    dados.loc[rng.random(n) < 0.05, 'c'] = np.nan
+    return dados
+
+
+def _encadeado(df, intervalos, periodo=None):
+    filtrado = df.copy()
+    for col, (minimo, maximo) in intervalos.items():
+        filtrado = filtrado[(filtrado[col] >= minimo) & (filtrado[col] <= maximo)]
+    if periodo is not None:
+        inicio, fim = periodo
+        if inicio is not None:
+            filtrado = filtrado[filtrado['timestamp'] >= pd.Timestamp(inicio)]
+        if fim is not None:
+            filtrado = filtrado[filtrado['timestamp'] <= pd.Timestamp(fim)]
+    return filtrado
+
+
+def _extremos(df, col):
+    return float(df[col].min()), float(df[col].max())
+
+
+CASOS = {
+    'sem_filtro': lambda df: ({}, None),
+    'faixas_completas': lambda df: ({col: _extremos(df, col) for col in COLUNAS}, None),
+    'limites_sobre_valores': lambda df: ({'a': (float(df['a'].iloc[10]), float(df['a'].iloc[20])), 'b': (3.0, 3.0)}, None),
+    'varias_colunas': lambda df: ({'a': (40.0, 60.0), 'b': (2.0, 15.0), 'c': (0.1, 0.9)}, None),
+    'faixa_vazia': lambda df: ({'b': (5.0, 4.0)}, None),
+    'faixa_fora_dos_dados': lambda df: ({'a': (1000.0, 2000.0), 'c': (0.2, 0.8)}, None),
+    'periodo': lambda df: ({'b': (5.0, 10.0)}, (pd.Timestamp('2024-01-05'), pd.Timestamp('2024-01-20'))),
+    'periodo_sobre_leitura': lambda df: ({}, (df['timestamp'].iloc[100], df['timestamp'].iloc[300])),
+    'periodo_aberto_no_inicio': lambda df: ({'a': (45.0, 55.0)}, (None, pd.Timestamp('2024-01-10'))),
+    'periodo_aberto_no_fim': lambda df: ({}, (pd.Timestamp('2024-01-25'), None)),
+    'periodo_vazio': lambda df: ({'c': (0.0, 1.0)}, (pd.Timestamp('2024-01-10'), pd.Timestamp('2024-01-09'))),
+}
+
+
+@pytest.mark.parametrize('caso', CASOS)
+def test_igual_ao_filtro_encadeado(df, caso):
+    intervalos, periodo = CASOS[caso](df)
+    esperado = _encadeado(df, intervalos, periodo)
+    motor = MotorFiltros(df, COLUNAS)
+    obtido = motor.aplicar(intervalos, periodo)
+    pd.testing.assert_frame_equal(obtido, esperado)
+    # A segunda chamada vem do cache e dá o mesmo resultado
+    pd.testing.assert_frame_equal(motor.aplicar(intervalos, periodo), esperado)
+
+
+def test_ausentes_saem_mesmo_com_a_faixa_completa(df):
+    motor = MotorFiltros(df, COLUNAS)
+    obtido = motor.aplicar({'a': _extremos(df, 'a')})
+    assert len(obtido) == df['a'].notna().sum()
+    assert motor.posicoes({'b': _extremos(df, 'b')}) is None
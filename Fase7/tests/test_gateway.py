@@ -0,0 +1,183 @@
+# test_gateway.py
+# Ingestão pelo gateway TCP: leituras de uma placa no mesmo segundo, códigos
+# das placas (anônimas, reconexões e duplicadas), falhas dos ouvintes e
+# descarga periódica do ingestor seguindo uma fonte contínua.
+#
+# Uso (a partir da pasta Fase7):
+#     python -m pytest tests
+import asyncio
+import socket
+import time
+
+import numpy as np
+import pytest
+
+from farmtech.armazenamento import BancoSensores
+from farmtech.configuracao import COLUNA_TEMPO
+from farmtech.gateway import GatewaySensores
+from farmtech.ingestao import IngestorLog
+
+N = 500
+
+
+def _linhas(n, semente=0):
+    valores = np.random.default_rng(semente).uniform(1, 90, (n, 5))
+    return ''.join('log' + ',%.2f' * 5 % tuple(v) + '\n' for v in valores)
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _executar(gateway, cenario, esperadas):
+    """Roda `cenario(porta)` com o gateway no ar e espera `esperadas` leituras processadas."""
+    porta = _porta_livre()
+
+    async def principal():
+        pronto = asyncio.Event()
+        tarefa = asyncio.create_task(gateway.servir('127.0.0.1', porta, pronto=pronto))
+        await pronto.wait()
+        await cenario(porta)
+        for _ in range(200):
+            if gateway.gravadas.total + gateway.ignoradas + gateway.falhas >= esperadas and not gateway.dispositivos:
+                break
+            await asyncio.sleep(0.05)
+        tarefa.cancel()
+
+    asyncio.run(principal())
+
+
+async def _enviar(porta, texto, fechar=True):
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    escritor.write(texto.encode())
+    await escritor.drain()
+    if fechar:
+        escritor.close()
+        await escritor.wait_closed()
+    return leitor, escritor
+
+
+def test_ingestor_grava_leituras_do_mesmo_segundo(tmp_path):
+    banco = BancoSensores(str(tmp_path / 'sensores.db'))
+    ingestor = IngestorLog(banco, cd_servidor=3, relogio=lambda: 1_750_000_000.0)
+    texto = _linhas(N)
+    metade = len(texto) // 2
+    ingestor.processar_texto(texto[:metade])
+    ingestor.descarregar()
+    ingestor.processar_texto(texto[metade:])
+    ingestor.descarregar(incluir_resto=True)
+
+    df = banco.consultar(cd_servidor=3)
+    assert ingestor.lidas == ingestor.gravadas == N
+    assert len(df) == N
+    assert df[COLUNA_TEMPO].is_unique
+    assert (df[COLUNA_TEMPO].dt.floor('s') == df[COLUNA_TEMPO].iloc[0].floor('s')).all()
+
+
+def test_gateway_grava_bloco_de_uma_placa(tmp_path):
+    banco = BancoSensores(str(tmp_path / 'sensores.db'))
+    gateway = GatewaySensores(banco, intervalo=0.05)
+
+    _executar(gateway, lambda porta: _enviar(porta, 'servidor,7\n' + _linhas(N)), N)
+    assert gateway.recebidas.total == N
+    assert gateway.gravadas.total == N
+    assert gateway.ignoradas == 0
+    assert len(banco.consultar(cd_servidor=7)) == N
+
+
+def test_placa_anonima_recebe_codigo_reservado(tmp_path):
+    banco = BancoSensores(str(tmp_path / 'sensores.db'))
+    gateway = GatewaySensores(banco, intervalo=0.05)
+
+    async def cenario(porta):
+        await _enviar(porta, 'servidor,1\n' + _linhas(10, 1))
+        await _enviar(porta, _linhas(10, 2))
+        await _enviar(porta, 'servidor,x\n' + _linhas(10, 3))
+
+    _executar(gateway, cenario, 30)
+    servidores = banco.consultar()['cd_servidor'].value_counts().to_dict()
+    assert servidores[1] == 10
+    assert sorted(k for k in servidores if k != 1) == [-2, -1]
+    assert gateway.gravadas.total == 30
+
+
+def test_reconexao_espera_a_fila_anterior(tmp_path):
+    banco = BancoSensores(str(tmp_path / 'sensores.db'))
+    # O gravador só roda depois do intervalo: a primeira conexão fecha com a fila cheia
+    gateway = GatewaySensores(banco, intervalo=0.3)
+
+    async def cenario(porta):
+        await _enviar(porta, 'servidor,5\n' + _linhas(N, 1))
+        await asyncio.sleep(0.05)
+        assert 5 in gateway.dispositivos and gateway.dispositivos[5].fechando
+        await _enviar(porta, 'servidor,5\n' + _linhas(N, 2))
+
+    _executar(gateway, cenario, 2 * N)
+    assert gateway.recusadas == 0
+    assert gateway.gravadas.total == 2 * N
+    assert banco.consultar()['cd_servidor'].unique().tolist() == [5]
+
+
+def test_conexao_duplicada_e_recusada(tmp_path):
+    banco = BancoSensores(str(tmp_path / 'sensores.db'))
+    gateway = GatewaySensores(banco, intervalo=0.05)
+
+    async def cenario(porta):
+        _, primeira = await _enviar(porta, 'servidor,5\n' + _linhas(10, 1), fechar=False)
+        await asyncio.sleep(0.1)
+        leitor, _ = await _enviar(porta, 'servidor,5\n' + _linhas(10, 2), fechar=False)
+        resposta = await asyncio.wait_for(leitor.read(), 5)
+        assert resposta.startswith(b'erro,')
+        primeira.close()
+        await primeira.wait_closed()
+
+    _executar(gateway, cenario, 10)
+    assert gateway.recusadas == 1
+    assert gateway.gravadas.total == 10
+    assert len(banco.consultar(cd_servidor=5)) == 10
+
+
+def test_falha_do_ouvinte_nao_conta_como_falha_de_gravacao(tmp_path):
+    banco = BancoSensores(str(tmp_path / 'sensores.db'))
+
+    def ouvinte(tempo, matriz, servidores):
+        raise RuntimeError('regra quebrada')
+
+    gateway = GatewaySensores(banco, intervalo=0.05, ouvintes=[ouvinte])
+    _executar(gateway, lambda porta: _enviar(porta, 'servidor,2\n' + _linhas(20)), 20)
+    assert gateway.falhas == 0
+    assert gateway.falhas_ouvintes == 1
+    assert gateway.gravadas.total == 20
+    assert len(banco.consultar(cd_servidor=2)) == 20
+
+
+class _FonteContinua:
+    """Fonte que sempre tem uma linha nova (nunca pausa) e termina após `n` leituras."""
+
+    class Fim(Exception):
+        pass
+
+    def __init__(self, n, intervalo=0.01):
+        self.linhas = _linhas(n, 4).splitlines(keepends=True)
+        self.intervalo = intervalo
+
+    def read(self, tamanho):
+        if not self.linhas:
+            raise self.Fim
+        time.sleep(self.intervalo)
+        return self.linhas.pop(0)
+
+
+def test_consumir_seguindo_descarrega_pelo_tempo(tmp_path):
+    banco = BancoSensores(str(tmp_path / 'sensores.db'))
+    lotes = []
+    ingestor = IngestorLog(banco, cd_servidor=4, ouvintes=[lambda tempo, matriz, servidor: lotes.append(len(matriz))])
+    fonte = _FonteContinua(40)
+    with pytest.raises(_FonteContinua.Fim):
+        ingestor.consumir(fonte, seguir=True, espera=0.1)
+    # Sem pausa na fonte, as leituras saem a cada ~0,1 s em vez de esperar o lote cheio
+    assert len(lotes) >= 2
+    assert max(lotes) < 40
+    assert len(banco.consultar(cd_servidor=4)) == sum(lotes) == ingestor.gravadas
@@ -0,0 +1,56 @@
+# test_insumos.py
+# Registros da Calculadora de Insumos: paginação pela chave, atualização e
+# remoção pelo ID.
+import pandas as pd
+
+from farmtech.insumos import BancoInsumos
+
+
+def _banco(tmp_path, n=23):
+    banco = BancoInsumos(str(tmp_path / 'insumos.db'))
+    plantacoes = pd.DataFrame({'area': range(1, n + 1), 'cultura': ['Batata', 'Morango'] * (n // 2) + ['Batata'] * (n % 2)})
+    banco.inserir_lote(plantacoes)
+    return banco
+
+
+def _paginas(banco, tamanho, cultura=None):
+    paginas, depois_de = [], 0
+    while not (pagina := banco.pagina(depois_de, tamanho, cultura)).empty:
+        paginas.append(pagina['id'].tolist())
+        depois_de = pagina['id'].iloc[-1]
+    return paginas
+
+
+def test_paginacao_pela_chave(tmp_path):
+    banco = _banco(tmp_path)
+    paginas = _paginas(banco, 5)
+    assert [len(p) for p in paginas] == [5, 5, 5, 5, 3]
+    assert sum(paginas, []) == list(range(1, 24))
+
+    batatas = _paginas(banco, 4, cultura='Batata')
+    assert sum(batatas, []) == [i for i in range(1, 24) if i % 2 == 1 or i == 23]
+    assert len(sum(batatas, [])) == banco.contar('Batata')
+
+
+def test_remocao_nao_desloca_as_paginas_seguintes(tmp_path):
+    banco = _banco(tmp_path)
+    primeira = banco.pagina(0, 5)
+    # Com OFFSET, remover um registro da primeira página puxaria o 11 para a segunda
+    assert banco.remover(3)
+    assert banco.pagina(primeira['id'].iloc[-1], 5)['id'].tolist() == [6, 7, 8, 9, 10]
+    assert banco.pagina(0, 5)['id'].tolist() == [1, 2, 4, 5, 6]
+    assert banco.contar() == 22
+
+
+def test_atualizar_e_remover_pelo_id(tmp_path):
+    banco = _banco(tmp_path)
+    assert banco.atualizar(7, 250, 'Morango')
+    assert banco.obter(7) == {'id': 7, 'area': 250.0, 'cultura': 'Morango'}
+    assert not banco.atualizar(99, 1, 'Batata')
+
+    assert banco.remover(7)
+    assert banco.obter(7) is None
+    assert not banco.remover(7)
+    # IDs não são reaproveitados
+    assert banco.inserir(10, 'Batata') == 24
+    assert banco.obter(6)['area'] == 6.0
@@ -0,0 +1,130 @@
+# test_regras.py
+# Motor de regras: disparo na transição falso -> verdadeiro, cooldown por
+# placa e regra, e as regras de desvio, variação e média móvel, com os
+# alertas conferidos um a um.
+import numpy as np
+import pytest
+
+from farmtech.regras import MotorRegras
+
+
+def _tempo(segundos):
+    return np.array(segundos, dtype='datetime64[s]')
+
+
+def _motor(**regra):
+    regra = {'nome': 'r', 'coluna': 'x', 'operador': '>', 'valor': 10, 'cooldown': 0, **regra}
+    enviados = []
+    return MotorRegras([regra], despachar=enviados.append, colunas=['x']), enviados
+
+
+def _disparos(motor, valores, segundos=None, placas=0):
+    segundos = range(len(valores)) if segundos is None else segundos
+    alertas = motor(_tempo(segundos), np.array(valores, dtype=float)[:, None], placas)
+    return [(a['cd_servidor'], int(a['tempo'].astype('datetime64[s]').astype(np.int64))) for a in alertas]
+
+
+def test_dispara_so_na_transicao():
+    motor, enviados = _motor()
+    assert _disparos(motor, [5, 11, 12, 13, 9, 15, 15]) == [(0, 1), (0, 5)]
+    # O estado "ativo" continua no lote seguinte
+    assert _disparos(motor, [20, 5, 11], segundos=[7, 8, 9]) == [(0, 9)]
+    assert len(enviados) == motor.disparos == 3
+    assert enviados[0] == 'Placa 0: regra r disparada (x = 11.00).'
+
+
+def test_operador_inclusivo_e_ausentes():
+    motor, _ = _motor(operador='>=')
+    assert _disparos(motor, [9, 10, np.nan, 10]) == [(0, 1), (0, 3)]
+
+
+def test_cooldown_por_placa_e_regra():
+    motor, _ = _motor(cooldown=10)
+    valores = [11, 0, 11, 0, 11, 0, 11]
+    segundos = [0, 2, 4, 6, 12, 14, 16]
+    # 4 cai no cooldown do disparo em 0; 12 não; 16 cai no cooldown de 12
+    assert _disparos(motor, valores, segundos) == [(0, 0), (0, 12)]
+    # Entre lotes o cooldown vale a partir do último disparo aceito (12)
+    assert _disparos(motor, [0, 11, 0, 11], [18, 20, 21, 22]) == [(0, 22)]
+    # Outra placa tem o seu próprio cooldown
+    assert _disparos(motor, [11], [23], placas=1) == [(1, 23)]
+
+
+def test_placas_intercaladas_no_mesmo_lote():
+    motor, _ = _motor()
+    valores = [11, 0, 11, 11, 0, 11]
+    placas = np.array([1, 2, 2, 1, 1, 2])
+    assert _disparos(motor, valores, placas=placas) == [(1, 0), (2, 2)]
+
+
+def test_desvio():
+    motor, enviados = _motor(tipo='desvio', alvo=6.5, valor=1.0,
+                             mensagem='{regra}: {leitura:.1f} desvio {valor:.1f}')
+    # |7.5 - 6.5| = 1 não passa do limite; 7.6 e 5.4 passam
+    assert _disparos(motor, [6.5, 7.5, 7.6, 6.0, 5.4, 5.5]) == [(0, 2), (0, 4)]
+    assert enviados == ['r: 7.6 desvio 1.1', 'r: 5.4 desvio 1.1']
+
+
+def test_variacao():
+    motor, _ = _motor(tipo='variacao', valor=5)
+    # A primeira leitura não tem anterior; depois compara com a vizinha da mesma placa
+    assert _disparos(motor, [20, 26, 27, 21, 21]) == [(0, 1), (0, 3)]
+    # A leitura anterior vem do lote passado
+    assert _disparos(motor, [30], [5]) == [(0, 5)]
+    # Placas intercaladas não se misturam
+    assert _disparos(motor, [0, 30, 1, 31], [6, 7, 8, 9], placas=np.array([3, 0, 3, 0])) == []
+
+
+def test_media_movel():
+    motor, enviados = _motor(tipo='media', janela=3, operador='<', valor=5)
+    # Só há média com 3 leituras; médias: -, -, 6, 3, 3, 6, 9, 6, 3
+    assert _disparos(motor, [9, 9, 0, 0, 9, 9, 9, 0, 0]) == [(0, 3), (0, 8)]
+    assert enviados == ['Placa 0: regra r disparada (x = 0.00).'] * 2
+
+
+def test_media_movel_atravessa_lotes_e_ignora_ausentes():
+    motor, _ = _motor(tipo='media', janela=3, operador='<', valor=5)
+    assert _disparos(motor, [1, 1], [0, 1]) == []
+    # A janela junta o lote anterior ao novo
+    assert _disparos(motor, [1], [2]) == [(0, 2)]
+    motor, _ = _motor(tipo='media', janela=3, operador='<', valor=5)
+    # Um ausente na janela deixa a média indefinida até sair dela
+    assert _disparos(motor, [1, np.nan, 1, 1, 1]) == [(0, 4)]
+
+
+def _referencia(regra, segundos, valores, placas):
+    """Avaliação linha a linha, como o firmware faria."""
+    historico, ativo, ultimo, disparos = {}, {}, {}, []
+    for t, x, p in zip(segundos, valores, placas):
+        anteriores = historico.setdefault(p, [])
+        if regra['tipo'] == 'variacao':
+            q = abs(x - anteriores[-1]) if anteriores else np.nan
+        else:
+            janela = (anteriores + [x])[-regra['janela']:]
+            q = np.mean(janela) if len(janela) == regra['janela'] else np.nan
+        anteriores.append(x)
+        agora = q > regra['valor']
+        if agora and not ativo.get(p, False) and t - ultimo.get(p, -10 ** 9) >= regra['cooldown']:
+            disparos.append((p, t))
+            ultimo[p] = t
+        ativo[p] = agora
+    return disparos
+
+
+@pytest.mark.parametrize('tipo', ['variacao', 'media'])
+def test_lotes_aleatorios_iguais_a_avaliacao_linha_a_linha(tipo):
+    rng = np.random.default_rng(5)
+    n = 3000
+    segundos = np.cumsum(rng.integers(0, 3, n))
+    valores = rng.normal(10, 3, n).round(1)
+    placas = rng.integers(0, 4, n)
+    # Limites fora da grade das médias e diferenças (evita empates de arredondamento)
+    regra = {'tipo': tipo, 'janela': 4, 'valor': 11.01 if tipo == 'media' else 4.05, 'cooldown': 20}
+    motor, _ = _motor(**regra)
+    obtidos = []
+    cortes = [0, 1, 17, 500, 1800, n]
+    for a, b in zip(cortes[:-1], cortes[1:]):
+        obtidos += _disparos(motor, valores[a:b], segundos[a:b], placas=placas[a:b])
+    esperados = _referencia(regra, segundos.tolist(), valores.tolist(), placas.tolist())
+    assert len(esperados) > 20
+    assert sorted(obtidos, key=lambda d: (d[1], d[0])) == sorted(esperados, key=lambda d: (d[1], d[0]))
@@ -0,0 +1,75 @@
+# test_series.py
+# Features de séries contra a referência do pandas (shift e rolling com
+# ddof=0 por placa), com duas placas intercaladas e blocos pequenos.
+import numpy as np
+import pandas as pd
+import pytest
+
+from farmtech.configuracao import COLUNA_TEMPO
+from farmtech.series import construir_features, montar_alvos, nomes_features, preparar_serie
+
+COLUNAS = ['temperatura_c', 'umidade_percent', 'ph']
+DEFASAGENS, JANELAS = 3, (4, 10)
+
+
+@pytest.fixture(scope='module')
+def df():
+    rng = np.random.default_rng(0)
+    n = 700
+    df = pd.DataFrame({
+        COLUNA_TEMPO: pd.date_range('2025-06-01', periods=n, freq='5min'),
+        # Placas intercaladas, com trechos seguidos da mesma placa
+        'cd_servidor': np.where(rng.random(n) < 0.6, 3, 8),
+        'temperatura_c': 25 + np.cumsum(rng.normal(0, 0.3, n)),
+        'umidade_percent': rng.uniform(30, 90, n),
+        'ph': 1e3 + rng.normal(6.5, 0.2, n),  # média grande: testa o erro numérico das janelas
+    })
+    df.loc[rng.random(n) < 0.03, 'umidade_percent'] = np.nan
+    return df
+
+
+def _referencia(df):
+    completas = df.dropna(subset=COLUNAS)
+    completas = completas.iloc[np.argsort(completas['cd_servidor'].to_numpy(), kind='stable')]
+    por_placa = completas.groupby('cd_servidor')
+    partes = {}
+    for col in COLUNAS:
+        partes[col] = completas[col]
+        for k in range(1, DEFASAGENS):
+            partes[f'{col}_lag{k}'] = por_placa[col].shift(k)
+        for janela in JANELAS:
+            moveis = por_placa[col].rolling(janela)
+            partes[f'{col}_media{janela}'] = moveis.mean().droplevel(0)
+            partes[f'{col}_desvio{janela}'] = moveis.std(ddof=0).droplevel(0)
+    return completas, pd.DataFrame(partes)
+
+
+@pytest.mark.parametrize('tamanho_bloco', [7, 1 << 16])
+def test_features_iguais_ao_pandas(df, tamanho_bloco):
+    valores, grupos, tempo = preparar_serie(df, COLUNAS)
+    X, posicoes = construir_features(valores, grupos, DEFASAGENS, JANELAS, tamanho_bloco=tamanho_bloco)
+
+    completas, esperado = _referencia(df)
+    np.testing.assert_array_equal(tempo, completas[COLUNA_TEMPO].to_numpy())
+    np.testing.assert_array_equal(grupos, completas['cd_servidor'].to_numpy())
+    # Só as posições com a maior janela inteira dentro da mesma placa
+    completo = esperado.notna().all(axis=1).to_numpy()
+    np.testing.assert_array_equal(posicoes, np.flatnonzero(completo))
+    assert list(esperado.columns) == nomes_features(COLUNAS, DEFASAGENS, JANELAS)
+    np.testing.assert_allclose(X, esperado.to_numpy()[completo].astype(np.float32), rtol=1e-5, atol=1e-4)
+
+
+@pytest.mark.parametrize('horizonte', [1, 5])
+def test_alvos_iguais_ao_shift_por_placa(df, horizonte):
+    valores, grupos, _ = preparar_serie(df, COLUNAS)
+    _, posicoes = construir_features(valores, grupos, DEFASAGENS, JANELAS)
+    alvo = valores[:, COLUNAS.index('ph')]
+    Y, com_futuro = montar_alvos(alvo, grupos, posicoes, horizonte)
+
+    serie = pd.Series(alvo)
+    futuros = pd.concat([serie.groupby(grupos).shift(-h) for h in range(1, horizonte + 1)], axis=1).to_numpy()
+    futuros = futuros[posicoes]
+    np.testing.assert_array_equal(com_futuro, ~np.isnan(futuros).any(axis=1))
+    np.testing.assert_array_equal(Y, futuros[com_futuro])
+    # As últimas leituras de cada placa não têm futuro completo
+    assert (~com_futuro).sum() >= 2 * horizonte - 1
@@ -0,0 +1,123 @@
+# test_servico.py
+# Micro-lotes do serviço de previsão: requisições concorrentes são juntadas
+# numa única chamada de predict e cada uma recebe as suas previsões.
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from farmtech.modelos import publicar_modelo
+from farmtech.servico import ServicoPrevisao
+
+FEATURES = ['temperatura_c', 'umidade_percent', 'ph']
+
+
+class ModeloLento:
+    """Envolve um modelo e registra o tamanho de cada chamada de predict."""
+
+    def __init__(self, modelo, espera=0.05):
+        self.modelo = modelo
+        self.espera = espera
+        self.chamadas = []
+        self.lock = threading.Lock()
+
+    def predict(self, X):
+        with self.lock:
+            self.chamadas.append(len(X))
+        time.sleep(self.espera)
+        if not np.isfinite(X).all():
+            raise ValueError('valores ausentes')
+        return self.modelo.predict(X)
+
+
+@pytest.fixture
+def publicado(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, len(FEATURES)))
+    modelo = LinearRegression().fit(X, X @ [1.0, -2.0, 3.0] + 0.5)
+    diretorio = str(tmp_path / 'publicados')
+    publicar_modelo('linear', modelo, FEATURES, 'alvo', 'Regressão Linear', diretorio=diretorio)
+    return modelo, diretorio
+
+
+def _requisicoes(n, semente=1):
+    rng = np.random.default_rng(semente)
+    return [rng.normal(size=(int(rng.integers(1, 6)), len(FEATURES))) for _ in range(n)]
+
+
+def _rodar(servico, cenario):
+    async def principal():
+        servido = await servico._servido('linear')
+        lento = ModeloLento(servido.modelo)
+        servido.modelo = lento
+        return lento, await cenario()
+
+    return asyncio.run(principal())
+
+
+def test_requisicoes_concorrentes_viram_um_lote(publicado):
+    modelo, diretorio = publicado
+    servico = ServicoPrevisao(diretorio, janela=0.5)
+    matrizes = _requisicoes(30)
+
+    async def cenario():
+        primeira = asyncio.create_task(servico.prever('linear', matrizes[0]))
+        await asyncio.sleep(0.01)
+        # Com a primeira em execução, as demais esperam e saem num só lote
+        return await asyncio.gather(primeira, *(servico.prever('linear', m) for m in matrizes[1:]))
+
+    lento, resultados = _rodar(servico, cenario)
+    assert lento.chamadas == [len(matrizes[0]), sum(len(m) for m in matrizes[1:])]
+    assert servico.lotes == 2
+    assert list(servico.tamanhos_lote) == [1, 29]
+    for matriz, previsto in zip(matrizes, resultados):
+        np.testing.assert_allclose(previsto, modelo.predict(matriz))
+    assert servico.previsoes.total == sum(len(m) for m in matrizes)
+
+
+def test_lote_maximo_fecha_o_lote_antes_da_janela(publicado):
+    modelo, diretorio = publicado
+    servico = ServicoPrevisao(diretorio, janela=5.0, lote_maximo=8)
+    matrizes = [np.full((3, len(FEATURES)), float(i)) for i in range(7)]
+
+    async def cenario():
+        primeira = asyncio.create_task(servico.prever('linear', matrizes[0]))
+        await asyncio.sleep(0.01)
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(primeira, *(servico.prever('linear', m) for m in matrizes[1:]))
+        return time.perf_counter() - inicio, resultados
+
+    lento, (duracao, resultados) = _rodar(servico, cenario)
+    # 3 requisições de 3 linhas passam de 8 e fecham o lote; a janela de 5 s nunca expira
+    assert lento.chamadas == [3, 9, 9]
+    assert duracao < 2
+    for matriz, previsto in zip(matrizes, resultados):
+        np.testing.assert_allclose(previsto, modelo.predict(matriz))
+
+
+def test_erro_no_predict_chega_a_todo_o_lote(publicado):
+    _, diretorio = publicado
+    servico = ServicoPrevisao(diretorio, janela=0.5)
+    matrizes = _requisicoes(4)
+    matrizes[2] = matrizes[2].copy()
+    matrizes[2][0, 0] = np.nan
+
+    async def cenario():
+        primeira = asyncio.create_task(servico.prever('linear', matrizes[0]))
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(primeira, *(servico.prever('linear', m) for m in matrizes[1:]),
+                                    return_exceptions=True)
+
+    _, resultados = _rodar(servico, cenario)
+    assert isinstance(resultados[0], np.ndarray)
+    assert all(isinstance(r, ValueError) for r in resultados[1:])
+
+
+def test_modelo_nao_publicado(publicado):
+    _, diretorio = publicado
+    servico = ServicoPrevisao(diretorio)
+    with pytest.raises(KeyError):
+        asyncio.run(servico.prever('outro', np.zeros((1, len(FEATURES)))))